@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+代码执行输出吞吐基准测试
+运行一个打印大量行的脚本，统计 execute_code 的耗时、CPU时间和队列消息数
+
+用法:
+  python benchmarks/bench_code_output.py --lines 100000 --language python
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tools.code import Code
+
+
+SCRIPTS = {
+    "python": "for i in range({lines}):\n    print(f'line {{i}}')",
+    "bash": "for ((i=0; i<{lines}; i++)); do echo \"line $i\"; done",
+}
+
+
+def drain(result_queue):
+    """读取队列直到结束信号，返回 (消息数, 输出字符数)"""
+    messages = 0
+    chars = 0
+    while True:
+        msg = result_queue.get()
+        if msg["type"] == "end":
+            return messages, chars
+        messages += 1
+        chars += len(msg.get("content", ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="代码执行输出吞吐基准")
+    parser.add_argument("--lines", type=int, default=100000, help="脚本打印的行数")
+    parser.add_argument("--language", choices=sorted(SCRIPTS), default="python")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    executor = Code()
+    script = SCRIPTS[args.language].format(lines=args.lines)
+
+    # 预热：启动内核/Shell，不计入结果
+    drain(executor.run(args.language, "print(1)" if args.language == "python" else "echo 1"))
+
+    for run in range(1, args.runs + 1):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        messages, chars = drain(executor.run(args.language, script))
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        print(f"run {run}: wall={wall * 1000:8.1f}ms  cpu={cpu * 1000:8.1f}ms  "
+              f"messages={messages:7d}  chars={chars}")
+
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+get_context 组装基准
+模拟 GUI 任务（每轮一张截图）和 Code 任务（每轮一次工具调用），对比：
+1. 每轮组装 Context 的 CPU 时间：缓存版 get_context 与每次全部重建
+2. 前缀稳定性：相邻两轮 Context 序列化后逐字节相同的前缀长度（按字节和按消息数），
+   以及 system 消息是否不变。GUI 任务中视觉遗忘会改写较早的截图消息，前缀在该处断开，
+   因此按字节计算的比例主要受截图大小影响
+
+用法:
+  python benchmarks/bench_context.py [--iterations 50] [--image-kb 300]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.agents.agent_memory.memory import MemoryManager
+
+
+def rebuild_context(memory: MemoryManager):
+    """不使用缓存的组装方式：每轮重新拼接 system 消息、重新生成每条消息的字典"""
+    messages = []
+    content = memory.system_prompt.content
+    if memory.insights:
+        content += "\n\n[长期记忆/Insights]:\n" + "\n".join(f"- {k}: {v}" for k, v in memory.insights.items())
+    if memory.function_stats:
+        sorted_funcs = sorted(memory.function_stats.items(), key=lambda x: x[1], reverse=True)[:5]
+        content += "\n\n[常用工具统计]:\n" + "\n".join(f"- {name}: {count}次" for name, count in sorted_funcs)
+    messages.append({"role": "system", "content": content})
+    for msg in memory.history:
+        messages.append(msg._build_dict())
+    return messages
+
+
+def shared_prefix(previous: bytes, current: bytes) -> int:
+    limit = min(len(previous), len(current))
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if previous[:mid] == current[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def serialize(messages) -> bytes:
+    return json.dumps(messages, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def run(scenario: str, iterations: int, image_kb: int, save_dir: str):
+    memory = MemoryManager(
+        agent_name=f"bench_{scenario}",
+        max_tokens=10 ** 9,
+        keep_last_screenshots=2,
+        save_dir=save_dir,
+        model="gpt-4o"
+    )
+    memory.set_system_prompt("You are a helpful agent. " * 200)
+    for i in range(10):
+        memory.insights[f"topic_{i}"] = f"经验 {i}：" + "注意事项。" * 20
+    memory.function_stats.update({"execute_code": 30, "read_output": 12, "screenshot": 8})
+    image = base64.b64encode(os.urandom(image_kb * 1024 * 3 // 4)).decode("ascii")
+
+    cached_time = rebuild_time = 0.0
+    prefix_ratios = []
+    prefix_messages = []
+    system_stable = 0
+    previous = None
+    previous_system = None
+    previous_messages = []
+    for i in range(iterations):
+        if scenario == "gui":
+            memory.add("user", f"第{i}步截图", image_base64=image)
+            memory.add("assistant", f"Action: click(start_box='<point>{i} {i}</point>')")
+        else:
+            memory.add_function_call([{"id": f"call_{i}", "type": "function",
+                                       "function": {"name": "execute_code", "arguments": "{}"}}])
+            memory.add_function_result(f"call_{i}", "execute_code", {"success": True, "output": f"result {i}\n" * 20})
+
+        start = time.process_time()
+        messages = memory.get_context()
+        cached_time += time.process_time() - start
+
+        start = time.process_time()
+        rebuild_context(memory)
+        rebuild_time += time.process_time() - start
+
+        current = serialize(messages)
+        if previous is not None:
+            prefix_ratios.append(shared_prefix(previous, current) / len(previous))
+            system_stable += messages[0] == previous_system
+            same = 0
+            for old, new in zip(previous_messages, messages):
+                if old != new:
+                    break
+                same += 1
+            prefix_messages.append(same / len(previous_messages))
+        previous, previous_system = current, messages[0]
+        previous_messages = [dict(m) for m in messages]
+
+    print(f"[{scenario}] {iterations} iterations, {len(memory.history)} msgs")
+    print(f"  rebuild     : {rebuild_time / iterations * 1e3:8.3f} ms/iter")
+    print(f"  get_context : {cached_time / iterations * 1e3:8.3f} ms/iter "
+          f"({(1 - cached_time / rebuild_time) * 100 if rebuild_time else 0:.1f}% less CPU)")
+    print(f"  system message unchanged: {system_stable}/{iterations - 1} iterations")
+    print(f"  shared prefix with previous context: avg {sum(prefix_ratios) / len(prefix_ratios) * 100:.1f}%, "
+          f"min {min(prefix_ratios) * 100:.1f}%")
+    print(f"  shared prefix messages: avg {sum(prefix_messages) / len(prefix_messages) * 100:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="get_context 组装基准")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--image-kb", type=int, default=300, help="每张截图 base64 的大小 (KB)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as save_dir:
+        run("gui", args.iterations, args.image_kb, save_dir)
+        run("code", args.iterations, args.image_kb, save_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+注视点截图基准
+对比三种发送方式的图片 token 数、注视区域的分辨率（发送像素 / 屏幕像素）和编码耗时：
+原分辨率整屏、按图片 token 预算缩放的整屏、注视点拼接图（缩小的整屏 + 注视区域原分辨率裁剪图）；
+并检查模型在拼接图上给出的坐标（落在概览图或裁剪图上）映射回屏幕的最大误差
+
+用法:
+  python benchmarks/bench_foveated.py
+  python benchmarks/bench_foveated.py --model gpt-4o --budget 1105
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from core.agents.agent_memory.token_budget import (
+    DEFAULT_IMAGE_TOKEN_BUDGET,
+    choose_image_detail,
+    estimate_image_tokens,
+    fit_image_size,
+)
+from core.agents.gui_agent.foveation import plan_foveated_frame
+from core.tools.screen.encoder import ScreenshotEncoder
+
+SCREENS = [(1920, 1080), (2560, 1440), (3840, 2160)]
+
+
+def make_screen(size):
+    """合成的桌面截图：一屏 10px 高的小字"""
+    image = Image.new("RGB", size, (245, 245, 245))
+    draw = ImageDraw.Draw(image)
+    for y in range(10, size[1] - 12, 14):
+        draw.text((10, y), "File Edit View 1.25 OK Cancel " * (size[0] // 180), fill=(30, 30, 30))
+    return image
+
+
+def encode_ms(encoder, image, size) -> float:
+    start = time.perf_counter()
+    encoder.encode_bytes(image, size=size)
+    return (time.perf_counter() - start) * 1000
+
+
+def mapping_error(frame):
+    """
+    拼接图上每隔几个像素取一个点，按模型的 0-1000 相对坐标映射回屏幕，与该点真实位置的最大误差（像素），
+    返回 (概览图误差, 裁剪图误差)；0-1000 坐标本身的量化步长为拼接图宽度的 1/1000
+    """
+    width, height = frame.size
+    worst = [0, 0]
+    for px in range(0, width, 5):
+        for py in range(0, height, 37):
+            mapped = frame.to_screen(round((px + 0.5) / width * 1000), round((py + 0.5) / height * 1000))
+            part = int(px >= frame.overview_size[0])
+            if part == 0:
+                true = (px + 0.5) * frame.screen_size[0] / frame.overview_size[0], (py + 0.5) * frame.screen_size[1] / frame.overview_size[1]
+            else:
+                true = frame.crop_box[0] + px - frame.overview_size[0] + 0.5, frame.crop_box[1] + py + 0.5
+            worst[part] = max(worst[part], abs(mapped[0] - true[0]), abs(mapped[1] - true[1]))
+    return round(worst[0]), round(worst[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="volcengine/doubao-1-5-ui-tars")
+    parser.add_argument("--budget", type=int, default=DEFAULT_IMAGE_TOKEN_BUDGET)
+    args = parser.parse_args()
+
+    encoder = ScreenshotEncoder()
+    encoder.encode_bytes(make_screen((640, 480)), size=(320, 240))  # 预热
+    detail = choose_image_detail(args.model, args.budget)
+    print(f"{args.model} (budget {args.budget}, detail {detail})")
+    for size in SCREENS:
+        image = make_screen(size)
+        fitted = fit_image_size(size, args.model, args.budget, detail)
+        composite_size = fit_image_size((size[0] * 2, size[1]), args.model, args.budget, detail)
+        frame = plan_foveated_frame(size, composite_size, (size[0] // 2, size[1] // 2))
+        start = time.perf_counter()
+        composite = frame.compose(image, encoder.resample)
+        compose_ms = (time.perf_counter() - start) * 1000
+        overview_error, crop_error = mapping_error(frame)
+        grid = frame.size[0] / 1000
+
+        print(f"  {size[0]}x{size[1]}")
+        print(f"    full-res   {size[0]}x{size[1]:<5} {estimate_image_tokens(size, args.model, detail):>5} tok  "
+              f"focus scale 1.00  {encode_ms(encoder, image, size):6.1f}ms")
+        print(f"    budget     {fitted[0]}x{fitted[1]:<5} {estimate_image_tokens(fitted, args.model, detail):>5} tok  "
+              f"focus scale {fitted[0] / size[0]:.2f}  {encode_ms(encoder, image, fitted):6.1f}ms")
+        print(f"    foveated   {frame.size[0]}x{frame.size[1]:<5} {estimate_image_tokens(frame.size, args.model, detail):>5} tok  "
+              f"focus scale 1.00  {compose_ms + encode_ms(encoder, composite, frame.size):6.1f}ms  "
+              f"(overview scale {frame.overview_size[0] / size[0]:.2f}, crop {frame.crop_box[2] - frame.crop_box[0]}x"
+              f"{frame.crop_box[3] - frame.crop_box[1]})")
+        print(f"    mapping error: overview {overview_error}px (grid {grid * size[0] / frame.overview_size[0]:.1f}px), "
+              f"crop {crop_error}px (grid {grid:.1f}px)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+GUIAgent 回复结构化压缩基准
+模拟 50 轮 GUI 任务（每轮一张截图 + 一条含 Thought 的回复），在 8000 token 预算下对比
+开启/关闭 turn_compactor 时 Context 中保留的动作历史轮数和 token 数
+
+用法:
+  python benchmarks/bench_gui_compaction.py [--iterations 50] [--max-tokens 8000]
+"""
+
+import argparse
+import base64
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.agents.agent_memory.memory import MemoryManager
+from core.agents.gui_agent.action_parser import compact_turn
+
+
+def make_turn(i: int) -> str:
+    thought = (f"第{i}步：当前屏幕上显示的是文件管理器窗口，左侧是导航栏，右侧是文件列表。"
+               "根据任务要求，我需要先找到目标文件夹，然后打开其中的报表文件并检查内容是否正确。"
+               "上一步的操作已经生效，窗口已经切换到了正确的位置。接下来点击目标文件夹。") * 2
+    return (f"Thought: {thought}\n"
+            f"Action: click(point='<point>{100 + i} {200 + i}</point>')\n"
+            f"Action_Summary: 点击第{i}个文件夹")
+
+
+def run(compaction: bool, iterations: int, max_tokens: int, save_dir: str):
+    memory = MemoryManager(
+        agent_name="bench_gui",
+        max_tokens=max_tokens,
+        keep_last_screenshots=2,
+        save_dir=save_dir,
+        model="gpt-4o",
+        turn_compactor=compact_turn if compaction else None,
+        keep_verbatim_turns=3
+    )
+    memory.set_system_prompt("You are a GUI agent.")
+    screenshot = base64.b64encode(os.urandom(30000)).decode("ascii")
+    for i in range(iterations):
+        memory.add("user", "(Current Screen State)", image_base64=screenshot)
+        memory.add("assistant", make_turn(i))
+
+    turns = [m for m in memory.history if m.role == "assistant"]
+    oldest = int(re.search(r"<point>(\d+)", turns[0].content).group(1)) - 100
+    print(f"compaction={'on ' if compaction else 'off'}  turns kept={len(turns):>3}/{iterations}  "
+          f"history tokens={memory.get_total_tokens():>5}  oldest kept turn=#{oldest}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUIAgent 回复结构化压缩基准")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--max-tokens", type=int, default=8000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as save_dir:
+        run(False, args.iterations, args.max_tokens, save_dir)
+        run(True, args.iterations, args.max_tokens, save_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按图片 token 预算选择截图分辨率的基准
+对比固定缩放 0.8 与 fit_image_size 在不同屏幕尺寸和模型下发送的分辨率、图片 token 数和编码耗时，
+并检查坐标映射：模型在截图上给出的相对坐标映射回屏幕后，误差不超过相对坐标本身的量化误差
+
+用法:
+  python benchmarks/bench_image_budget.py
+  python benchmarks/bench_image_budget.py --budget 1200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from core.agents.agent_memory.token_budget import (
+    DEFAULT_IMAGE_TOKEN_BUDGET,
+    choose_image_detail,
+    estimate_image_tokens,
+    fit_image_size,
+)
+from core.agents.gui_agent.action_parser import to_screen_point
+from core.tools.screen.encoder import ScreenshotEncoder
+
+SCREENS = [(800, 600), (1366, 768), (1920, 1080), (2560, 1440), (3840, 2160)]
+MODELS = ["volcengine/doubao-1-5-ui-tars", "gpt-4o", "claude-3-5-sonnet", "gemini-2.0-flash"]
+
+
+def make_screen(size):
+    """合成的桌面截图：标题栏、侧边栏和若干文字行"""
+    image = Image.new("RGB", size, (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    draw.rectangle((0, 0, width, 40), fill=(30, 60, 120))
+    draw.rectangle((0, 40, width // 6, height), fill=(220, 220, 225))
+    for y in range(60, height - 20, 24):
+        draw.text((width // 6 + 20, y), f"row {y} " * 8, fill=(20, 20, 20))
+    return image
+
+
+def mapping_error(screen_size, sent_size) -> float:
+    """屏幕上每个像素按截图中的位置取整到 0-1000 的相对坐标，再映射回屏幕的最大误差（像素）"""
+    width, height = screen_size
+    worst = 0.0
+    for x in range(0, width, 7):
+        # 模型看到的是缩放后的截图，给出的相对坐标基于截图尺寸
+        sent_x = (x + 0.5) * sent_size[0] / width
+        x_rel = min(999, round(sent_x / sent_size[0] * 1000))
+        mapped, _ = to_screen_point(x_rel, 0, width, height)
+        worst = max(worst, abs(mapped - x))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=int, default=DEFAULT_IMAGE_TOKEN_BUDGET)
+    args = parser.parse_args()
+
+    encoder = ScreenshotEncoder()
+    for model in MODELS:
+        detail = choose_image_detail(model, args.budget)
+        print(f"{model} (budget {args.budget}, detail {detail})")
+        for size in SCREENS:
+            image = make_screen(size)
+            fixed = (int(size[0] * 0.8), int(size[1] * 0.8))
+            fitted = fit_image_size(size, model, args.budget, detail)
+            timings = []
+            for target in (fixed, fitted):
+                start = time.perf_counter()
+                encoder.encode_bytes(image, size=target)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"  {size[0]}x{size[1]:<5} fixed 0.8: {fixed[0]}x{fixed[1]:<5} "
+                  f"{estimate_image_tokens(fixed, model):>5} tok {timings[0]:6.1f}ms | "
+                  f"budget: {fitted[0]}x{fitted[1]:<5} {estimate_image_tokens(fitted, model, detail):>5} tok "
+                  f"{timings[1]:6.1f}ms | max mapping error {mapping_error(size, fitted):.0f}px "
+                  f"(grid {size[0] / 1000:.1f}px)")
+
+
+if __name__ == "__main__":
+    main()
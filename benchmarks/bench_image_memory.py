@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+GUI 任务图片内存基准
+模拟 50 轮 GUIAgent 循环：截图(base64) -> 推送给客户端队列 -> 写入记忆 -> 组装 Context 并序列化为请求体，
+每隔几轮出现一次 wait()（与上一帧完全相同的截图）。记忆配置与 GUIAgent 相同（2 张原图 + 4 张缩略图）。
+报告进程峰值 RSS、循环期间的 tracemalloc 峰值、循环结束时仍被持有的内存，以及图片存储的统计
+
+用法:
+  python benchmarks/bench_image_memory.py [--iterations 50] [--width 1536] [--height 864]
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from core.agents.agent_memory.memory import MemoryManager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1024 / 1024
+        except Exception:
+            return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 为 KB，macOS 为字节
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def make_frame(index: int, size) -> bytes:
+    """类似桌面截图的帧：色块界面 + 一块高熵区域（图片/视频内容），PNG 约数百 KB"""
+    rng = random.Random(index)
+    image = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(30):
+        x, y = rng.randrange(size[0] - 200), rng.randrange(size[1] - 100)
+        draw.rectangle([x, y, x + rng.randrange(50, 200), y + rng.randrange(20, 100)],
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    noise = Image.frombytes("RGB", (size[0] // 3, size[1] // 3), rng.randbytes(size[0] // 3 * size[1] // 3 * 3))
+    image.paste(noise, (size[0] // 2, size[1] // 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format="png")
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUI 任务图片内存基准")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--width", type=int, default=1536)
+    parser.add_argument("--height", type=int, default=864)
+    parser.add_argument("--wait-every", type=int, default=4, help="每隔多少轮出现一次画面不变的 wait()")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="模拟每轮模型调用耗时（秒）")
+    args = parser.parse_args()
+
+    # 预先生成帧，避免生成过程计入差异
+    frame_count = args.iterations - args.iterations // args.wait_every
+    frames = [make_frame(i, (args.width, args.height)) for i in range(frame_count)]
+    baseline = peak_rss_mb()
+
+    # 模拟 UI 每 100ms 取一次消息
+    message_to_client = queue.Queue()
+    stop = threading.Event()
+
+    def consume():
+        while not stop.is_set():
+            while not message_to_client.empty():
+                message_to_client.get_nowait()
+            time.sleep(0.1)
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+
+    with tempfile.TemporaryDirectory() as save_dir:
+        memory = MemoryManager(agent_name="bench_image", max_tokens=8000, keep_last_screenshots=2,
+                               keep_thumbnails=4, save_dir=save_dir, model="gpt-4o")
+        memory.set_system_prompt("You are a GUI agent.")
+        frame_index = -1
+        body_bytes = 0
+        tracemalloc.start()
+        start = time.perf_counter()
+        for i in range(args.iterations):
+            if i % args.wait_every != args.wait_every - 1:
+                frame_index += 1
+            screenshot = base64.b64encode(frames[frame_index]).decode("utf-8")
+            message_to_client.put({"name": "GUIAgent", "type": "image/png", "content": screenshot})
+            memory.add("user", "(Current Screen State)", image_base64=screenshot)
+            del screenshot
+            body = json.dumps({"messages": memory.get_context()})
+            body_bytes = max(body_bytes, len(body))
+            del body
+            time.sleep(args.llm_latency)
+            memory.add("assistant", f"Action: click(point='<point>{i} {i}</point>')")
+        elapsed = time.perf_counter() - start
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stop.set()
+    consumer.join()
+
+    print(f"frames: {frame_count} unique / {args.iterations} iterations, "
+          f"avg PNG {sum(map(len, frames)) / len(frames) / 1024:.0f}KB")
+    print(f"peak RSS: {peak_rss_mb():.1f}MB (after generating frames: {baseline:.1f}MB, "
+          f"delta {peak_rss_mb() - baseline:.1f}MB)")
+    print(f"tracemalloc peak during loop: {traced_peak / 1024 / 1024:.1f}MB, "
+          f"retained after loop: {traced_current / 1024 / 1024:.1f}MB")
+    print(f"largest request body: {body_bytes / 1024 / 1024:.2f}MB, loop time {elapsed:.2f}s (incl. simulated LLM latency)")
+    try:
+        from core.agents.agent_memory.blob_store import get_image_store
+        print(f"image store: {get_image_store().get_stats()}")
+    except ImportError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
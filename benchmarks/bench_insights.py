@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Insights 检索基准
+经验库规模为 100 / 1k / 5k 条时，对比全部注入与按任务检索 top-k 注入的 System Prompt token 数，
+并测量检索与增量 add_insight 的耗时
+
+用法:
+  python benchmarks/bench_insights.py [--sizes 100 1000 5000] [--top-k 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.agents.agent_memory.memory import MemoryManager, count_text_tokens
+
+APPS = ["Excel", "Word", "Chrome", "微信", "记事本", "文件管理器", "PowerPoint", "终端", "邮箱", "日历"]
+ACTIONS = ["打开", "保存", "搜索", "复制", "删除", "重命名", "导出", "登录", "设置", "截图"]
+TIPS = ["先等待窗口加载完成", "使用快捷键更可靠", "注意弹出的确认对话框", "路径中不要包含空格",
+        "失败时先截屏确认状态", "优先用 pandas 处理表格", "滚动后重新定位元素"]
+
+
+def make_insight(rng: random.Random, i: int):
+    app, action = rng.choice(APPS), rng.choice(ACTIONS)
+    return f"{app}_{action}_{i}", f"在{app}中{action}时，{rng.choice(TIPS)}，{rng.choice(TIPS)}。"
+
+
+def bench(size: int, top_k: int, save_dir: str):
+    rng = random.Random(size)
+    memory = MemoryManager(agent_name=f"bench_{size}", save_dir=save_dir, model="gpt-4o", insight_top_k=top_k)
+    memory.set_system_prompt("You are a helpful agent.")
+
+    start = time.perf_counter()
+    for i in range(size):
+        memory.add_insight(*make_insight(rng, i))
+    add_time = (time.perf_counter() - start) / size
+
+    all_insights = "\n".join(f"- {k}: {v}" for k, v in memory.insights.items())
+    all_tokens = count_text_tokens(all_insights)
+
+    tasks = [f"帮我{rng.choice(ACTIONS)}{rng.choice(APPS)}里的文件" for _ in range(20)]
+    start = time.perf_counter()
+    selected_tokens = 0
+    for task in tasks:
+        memory.set_task(task)
+        selected_tokens += count_text_tokens("\n".join(memory.select_insights()))
+    select_time = (time.perf_counter() - start) / len(tasks)
+
+    print(f"{size:>6} insights  all={all_tokens:>8} tokens  top-{top_k}={selected_tokens / len(tasks):7.1f} tokens  "
+          f"select={select_time * 1e3:7.2f}ms  add_insight={add_time * 1e6:7.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Insights 检索基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as save_dir:
+        for size in args.sizes:
+            bench(size, args.top_k, save_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+MemoryManager 微基准测试
+在 history 规模为 100 / 1k / 10k 条消息时，测量 add(含修剪) 与 get_context 的单次耗时，
+以及 history 已满、每次 add 都触发 token 淘汰时的稳态耗时
+
+用法:
+  python benchmarks/bench_memory.py [--sizes 100 1000 10000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.agents.agent_memory.memory import MemoryManager
+
+
+def fill(memory: MemoryManager, count: int):
+    """按 CodeAgent 的节奏填充消息：用户消息、工具调用、工具结果交替出现"""
+    for i in range(count // 3):
+        memory.add("user", f"第{i}步：请继续执行任务。" * 3)
+        memory.add_function_call(
+            [{"id": f"call_{i}", "type": "function",
+              "function": {"name": "execute_code", "arguments": '{"language":"python","code":"print(1)"}'}}]
+        )
+        memory.add_function_result(f"call_{i}", "execute_code", {"success": True, "output": f"result {i}\n" * 5})
+
+
+def bench(size: int, rounds: int, save_dir: str):
+    memory = MemoryManager(
+        agent_name="bench",
+        max_tokens=10 ** 9,  # 不触发 token 淘汰，使 history 保持目标规模
+        keep_last_screenshots=2,
+        keep_function_calls=10 ** 9,
+        save_dir=save_dir,
+        model="gpt-4o"
+    )
+    memory.set_system_prompt("You are a helpful agent.")
+    fill(memory, size)
+
+    add_start = time.perf_counter()
+    for i in range(rounds):
+        memory.add("user", f"追加消息 {i}")
+    add_time = (time.perf_counter() - add_start) / rounds
+
+    context_start = time.perf_counter()
+    for _ in range(rounds):
+        memory.get_context()
+    context_time = (time.perf_counter() - context_start) / rounds
+
+    print(f"{len(memory.history):>7} msgs  add+prune={add_time * 1e6:10.1f}us  "
+          f"get_context={context_time * 1e6:10.1f}us")
+
+
+def bench_evict(size: int, rounds: int, save_dir: str):
+    """history 达到 token 上限后，每次 add 都会淘汰最早的消息"""
+    memory = MemoryManager(
+        agent_name="bench",
+        max_tokens=10 ** 9,
+        keep_last_screenshots=2,
+        keep_function_calls=5,
+        save_dir=save_dir,
+        model="gpt-4o"
+    )
+    memory.set_system_prompt("You are a helpful agent.")
+    fill(memory, size)
+    memory.max_tokens = memory.get_total_tokens()
+
+    add_start = time.perf_counter()
+    for i in range(rounds):
+        memory.add("user", f"追加消息 {i}")
+    add_time = (time.perf_counter() - add_start) / rounds
+
+    print(f"{len(memory.history):>7} msgs  add+evict={add_time * 1e6:10.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MemoryManager 微基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as save_dir:
+        for size in args.sizes:
+            bench(size, args.rounds, save_dir)
+        for size in args.sizes:
+            bench_evict(size, args.rounds, save_dir)
+
+
+if __name__ == "__main__":
+    main()
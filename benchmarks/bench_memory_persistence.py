@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+长期记忆持久化开销基准
+模拟 agent 循环中的 add_function_call（每次调用都会更新 function 统计），对比：
+1. sync-legacy : 每次调用同步重写整个 JSON 文件（原实现）
+2. sync-atomic : 每次调用同步 flush（文件锁 + 合并 + 原子替换）
+3. write-behind: 只在内存中标记 dirty，由后台线程批量写回
+
+用法:
+  python benchmarks/bench_memory_persistence.py [--calls 2000] [--functions 50]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.agents.agent_memory.memory import MemoryManager
+
+TOOL_CALL = [{"id": "call_0", "type": "function", "function": {"name": "execute_code", "arguments": "{}"}}]
+
+
+def legacy_save(memory: MemoryManager):
+    with open(memory.function_stats_file, "w", encoding="utf-8") as f:
+        json.dump(memory.function_stats, f, ensure_ascii=False, indent=2)
+
+
+def run(mode: str, calls: int, functions: int):
+    with tempfile.TemporaryDirectory() as save_dir:
+        memory = MemoryManager(agent_name="bench", max_tokens=2000, save_dir=save_dir, model="gpt-4o")
+        for i in range(functions):
+            memory.function_stats[f"function_{i}"] = i
+            memory._function_stats_store.set(f"function_{i}", i)
+        memory.flush()
+
+        start = time.perf_counter()
+        for _ in range(calls):
+            memory.add_function_call(TOOL_CALL)
+            if mode == "sync-legacy":
+                legacy_save(memory)
+            elif mode == "sync-atomic":
+                memory.flush()
+        loop_time = time.perf_counter() - start
+
+        final_flush = 0.0
+        if mode != "sync-legacy":
+            # 原实现不经过 store，跳过最后的 flush 以免重复累加
+            start = time.perf_counter()
+            memory.flush()
+            final_flush = time.perf_counter() - start
+
+        with open(memory.function_stats_file, "r", encoding="utf-8") as f:
+            saved = json.load(f)["execute_code"]
+        print(f"{mode:>12}: {loop_time / calls * 1e6:9.1f} us/call  "
+              f"final flush={final_flush * 1e3:6.2f} ms  execute_code={saved}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="长期记忆持久化开销基准")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--functions", type=int, default=50, help="统计文件中已有的函数数量")
+    args = parser.parse_args()
+
+    for mode in ("sync-legacy", "sync-atomic", "write-behind"):
+        run(mode, args.calls, args.functions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+PythonLanguage 单次调用延迟基准测试
+对比「每次调用启动新内核」(旧行为) 与「常驻内核」(新行为) 的 execute_code 延迟，
+以及有无预热池(KernelPool)时重置内核的耗时
+
+用法:
+  python benchmarks/bench_python_kernel.py --runs 10
+"""
+
+import argparse
+import os
+import queue
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tools.code.languages import PythonLanguage, KernelPool
+
+
+def run_once(lang: PythonLanguage, code: str) -> float:
+    """同步执行一次代码，返回耗时（秒）"""
+    message = queue.Queue()
+    start = time.perf_counter()
+    lang._execute_jupyter(code, message)
+    return time.perf_counter() - start
+
+
+def report(name: str, samples):
+    print(f"{name:<12} mean={statistics.mean(samples) * 1000:8.1f}ms  "
+          f"median={statistics.median(samples) * 1000:8.1f}ms  "
+          f"max={max(samples) * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PythonLanguage 内核延迟基准")
+    parser.add_argument("--runs", type=int, default=10, help="每种模式的调用次数")
+    args = parser.parse_args()
+
+    code = "x = sum(range(1000))\nprint(x)"
+    lang = PythonLanguage()
+
+    # 旧行为：每次调用前关闭内核，强制重新启动
+    cold = []
+    for _ in range(args.runs):
+        lang.stop()
+        cold.append(run_once(lang, code))
+
+    # 新行为：内核常驻，首次调用之外不再启动
+    lang.stop()
+    run_once(lang, code)
+    warm = [run_once(lang, code) for _ in range(args.runs)]
+    lang.stop()
+
+    report("cold kernel", cold)
+    report("warm kernel", warm)
+    print(f"speedup      x{statistics.mean(cold) / statistics.mean(warm):.1f}")
+
+    # 重置（崩溃恢复/强制重启）耗时：无预热池 vs 预热池
+    reset_plain = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        lang.reset()
+        reset_plain.append(time.perf_counter() - start)
+    lang.stop()
+
+    pool = KernelPool(size=1, max_size=2)
+    pooled = PythonLanguage(pool=pool)
+    run_once(pooled, code)
+    reset_pool = []
+    for _ in range(args.runs):
+        # 等待池补充备用内核，模拟两次重启之间的正常间隔
+        while pool.get_stats()["standby"] < pool.size:
+            time.sleep(0.05)
+        start = time.perf_counter()
+        pooled.reset()
+        reset_pool.append(time.perf_counter() - start)
+    pooled.stop()
+
+    report("reset", reset_plain)
+    report("reset+pool", reset_pool)
+    print(f"pool stats   {pool.get_stats()}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
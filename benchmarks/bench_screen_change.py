@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+画面变化检测基准
+用合成的 1536x864 截图比较各类变化是否被判定为"有变化"，以及每帧检测耗时。
+期望：完全相同 / 光标闪烁 判定为无变化（不发送截图、不调用模型），其余判定为有变化
+
+用法:
+  python benchmarks/bench_screen_change.py [--repeat 20]
+"""
+
+import argparse
+import base64
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from core.agents.gui_agent.screen_change import ScreenChangeDetector
+
+SIZE = (1536, 864)
+
+
+def base_frame() -> Image.Image:
+    rng = random.Random(0)
+    image = Image.new("RGB", SIZE, (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(SIZE[0] - 200), rng.randrange(SIZE[1] - 60)
+        draw.rectangle([x, y, x + rng.randrange(40, 200), y + rng.randrange(16, 60)],
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    for row in range(20):
+        draw.text((40, 40 + row * 18), f"Line {row}: lorem ipsum dolor sit amet", fill="black")
+    return image
+
+
+def encode(image: Image.Image) -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, format="png")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def variant(name: str) -> Image.Image:
+    image = base_frame()
+    draw = ImageDraw.Draw(image)
+    if name == "caret blink":
+        draw.line([(600, 500), (600, 515)], fill="black")
+    elif name == "checkbox tick":
+        draw.rectangle([700, 600, 714, 614], outline="black")
+        draw.line([(702, 607), (706, 612), (713, 601)], fill="black", width=2)
+    elif name == "typed word":
+        draw.text((600, 500), "hello", fill="black")
+    elif name == "dialog opened":
+        draw.rectangle([568, 282, 968, 582], fill="white", outline="gray")
+        draw.text((590, 300), "Save changes?", fill="black")
+    elif name == "scrolled":
+        image = image.transform(SIZE, Image.Transform.AFFINE, (1, 0, 0, 0, 1, 120), fillcolor=(240, 240, 240))
+    elif name == "new window":
+        image = Image.new("RGB", SIZE, (30, 30, 60))
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser(description="画面变化检测基准")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    reference = encode(base_frame())
+    names = ["identical", "caret blink", "checkbox tick", "typed word", "dialog opened", "scrolled", "new window"]
+    for name in names:
+        frame = reference if name == "identical" else encode(variant(name))
+        elapsed = 0.0
+        for _ in range(args.repeat):
+            detector = ScreenChangeDetector(policy="wait", max_unchanged=3)
+            detector.is_changed(reference)
+            start = time.perf_counter()
+            changed = detector.is_changed(frame)
+            elapsed += time.perf_counter() - start
+        print(f"{name:<14} changed={str(changed):<5}  check={elapsed / args.repeat * 1000:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
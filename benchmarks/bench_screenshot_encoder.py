@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+截图编码器基准
+在合成的桌面截图（或 --images 指定的真实截图）上比较各编码配置的耗时（缩放 + 编码）、字节数和估算的图片 token 数，
+并给出 GUIAgent 流水线中（后台编码与画面变化检测并行）关键路径上的耗时
+
+用法:
+  python benchmarks/bench_screenshot_encoder.py [--images a.png b.png] [--resize-factor 0.8] [--repeat 5]
+                                                [--model volcengine/doubao-1-5-ui-tars-250428]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from core.tools.screen.encoder import ScreenshotEncoder
+from core.agents.agent_memory.token_budget import estimate_image_tokens
+from core.agents.gui_agent.screen_change import ScreenChangeDetector
+
+CONFIGS = [
+    # (名称, 格式, 质量, 缩放, png 压缩级别)
+    ("png lanczos (old)", "png", None, "lanczos", 6),
+    ("png fast", "png", None, "fast", 6),
+    ("png fast level1", "png", None, "fast", 1),
+    ("jpeg85 lanczos", "jpeg", 85, "lanczos", None),
+    ("jpeg85 fast", "jpeg", 85, "fast", None),
+    ("webp80 fast", "webp", 80, "fast", None),
+]
+
+
+def make_desktop(size, seed: int = 0) -> Image.Image:
+    """合成的桌面截图：任务栏、窗口、文字、图标和一块照片区域"""
+    rng = random.Random(seed)
+    width, height = size
+    image = Image.new("RGB", size, (32, 92, 150))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, height - 48, width, height], fill=(30, 30, 30))
+    for i in range(12):
+        draw.rectangle([10 + i * 56, height - 42, 46 + i * 56, height - 6], fill=tuple(rng.randrange(256) for _ in range(3)))
+    left, top = width // 10, height // 12
+    draw.rectangle([left, top, width - left, height - 100], fill="white", outline="gray")
+    draw.rectangle([left, top, width - left, top + 32], fill=(230, 230, 230))
+    for row in range((height - 200) // 18):
+        words = " ".join(rng.choice(["file", "edit", "view", "report", "data", "2024", "total", "value"]) for _ in range(12))
+        draw.text((left + 20, top + 50 + row * 18), words, fill="black")
+    photo = Image.effect_noise((width // 4, height // 4), 80).convert("RGB").filter(ImageFilter.GaussianBlur(3))
+    image.paste(photo, (width - left - width // 4 - 20, top + 60))
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser(description="截图编码器基准")
+    parser.add_argument("--images", nargs="*", help="真实截图路径（默认使用合成的 1920x1080 和 2560x1440 截图）")
+    parser.add_argument("--resize-factor", type=float, default=0.8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model", default="volcengine/doubao-1-5-ui-tars-250428")
+    args = parser.parse_args()
+
+    if args.images:
+        fixtures = [(os.path.basename(path), Image.open(path).convert("RGB")) for path in args.images]
+    else:
+        fixtures = [("1920x1080", make_desktop((1920, 1080))), ("2560x1440", make_desktop((2560, 1440), 1))]
+
+    for name, image in fixtures:
+        print(f"== {name}")
+        detector = ScreenChangeDetector(policy="reprompt")
+        detect_ms = statistics.median(
+            (lambda start: (detector.reset(), detector.is_changed(image), time.perf_counter() - start)[2])(time.perf_counter())
+            for _ in range(args.repeat)
+        ) * 1000
+        for label, format, quality, resample, level in CONFIGS:
+            encoder = ScreenshotEncoder(format=format, quality=quality, resample=resample, png_compress_level=level)
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                data = encoder.encode_bytes(image, args.resize_factor)
+                timings.append(time.perf_counter() - start)
+            encode_ms = statistics.median(timings) * 1000
+
+            # 流水线: 后台编码的同时做画面变化检测
+            pipelined = []
+            for _ in range(args.repeat):
+                detector.reset()
+                start = time.perf_counter()
+                future = encoder.submit(image, args.resize_factor)
+                detector.is_changed(image)
+                future.result()
+                pipelined.append(time.perf_counter() - start)
+
+            resized = (int(image.size[0] * args.resize_factor), int(image.size[1] * args.resize_factor))
+            tokens = estimate_image_tokens(resized, args.model)
+            print(f"{label:<18} {encoder.mime:<11} encode={encode_ms:7.1f}ms  "
+                  f"encode+detect sequential={encode_ms + detect_ms:7.1f}ms pipelined={statistics.median(pipelined) * 1000:7.1f}ms  "
+                  f"bytes={len(data) / 1024:7.1f}KB  tokens={tokens}")
+
+
+if __name__ == "__main__":
+    main()
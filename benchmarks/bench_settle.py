@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+动作后画面稳定检测基准
+用按时间变化的合成低分辨率帧模拟不同速度的界面（动作后 transition 秒内画面持续变化，之后静止），
+对比固定等待（其他动作 0.5s、wait() 5s）与 SettleDetector 的等待时间，以及截图时界面是否仍在变化
+
+用法:
+  python benchmarks/bench_settle.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from core.agents.gui_agent.settle import SettleDetector
+
+SIZE = (192, 108)  # 1536x864 截屏缩小 8 倍
+
+
+def make_capture(transition: float, region=(0, 0, 192, 108), forever: bool = False):
+    """动作后 transition 秒内 region 区域持续变化（forever 时一直变化），其余时间画面静止"""
+    start = time.monotonic()
+
+    def capture():
+        elapsed = time.monotonic() - start
+        image = Image.new("L", SIZE, 200)
+        if forever or elapsed < transition:
+            phase = int(elapsed * 20)
+            ImageDraw.Draw(image).rectangle(region, fill=(phase * 37) % 200)
+        else:
+            ImageDraw.Draw(image).rectangle(region, fill=30)
+        return image
+
+    return capture
+
+
+SCENARIOS = [
+    # (名称, 动作, 变化持续时间, 变化区域, 一直变化)
+    ("instant click", "click", 0.0, (40, 40, 90, 60), False),
+    ("menu fade", "click", 0.25, (10, 10, 60, 100), False),
+    ("window open", "left_double", 1.2, (0, 0, 192, 108), False),
+    ("type text", "type", 0.05, (50, 50, 120, 56), False),
+    ("page load wait", "wait", 2.5, (0, 20, 192, 108), False),
+    ("short wait", "wait", 0.3, (0, 20, 192, 108), False),
+    ("video playing", "click", 0.0, (60, 30, 130, 80), True),
+]
+
+
+def main():
+    fixed_total = adaptive_total = 0.0
+    for name, action, transition, region, forever in SCENARIOS:
+        fixed = 5.0 if action == "wait" else 0.5
+        detector = SettleDetector(capture=make_capture(transition, region, forever))
+        result = detector.wait(action)
+        fixed_mid = forever or fixed < transition
+        adaptive_mid = forever or result.waited < transition
+        fixed_total += fixed
+        adaptive_total += result.waited
+        print(f"{name:<15} {action:<12} fixed={fixed:4.2f}s{' (mid-transition)' if fixed_mid else '':<17} "
+              f"settle={result.waited:4.2f}s {result.reason:<7}{' (mid-transition)' if adaptive_mid else ''}")
+    print(f"total wait: fixed {fixed_total:.2f}s, settle {adaptive_total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+GUIAgent 停滞/循环检测基准
+用脚本化的动作序列和合成截图（经过 ScreenChangeDetector 得到画面状态）驱动 StagnationDetector，
+报告每个场景在第几轮被判定为停滞、相对 max_iterations=50 省下的模型调用次数。
+form fill、wizard pages 是正常推进的场景，不应被判定为停滞
+
+用法:
+  python benchmarks/bench_stagnation.py [--max-iterations 50]
+"""
+
+import argparse
+import base64
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from core.agents.gui_agent.screen_change import ScreenChangeDetector
+from core.agents.gui_agent.stagnation import StagnationDetector
+
+SIZE = (1536, 864)
+
+
+def frame(page: int = 0, menu_open: bool = False, typed: int = 0) -> str:
+    rng = random.Random(page)
+    image = Image.new("RGB", SIZE, (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    for _ in range(30):
+        x, y = rng.randrange(SIZE[0] - 200), rng.randrange(SIZE[1] - 60)
+        draw.rectangle([x, y, x + rng.randrange(40, 200), y + rng.randrange(16, 60)],
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    for field in range(typed):
+        x, y = 40 + field // 18 * 480, 60 + field % 18 * 44
+        draw.rectangle([x, y, x + 400, y + 28], fill="white", outline="gray")
+        draw.text((x + 5, y + 5), f"value {field}", fill="black")
+    if menu_open:
+        draw.rectangle([100, 60, 400, 500], fill="white", outline="black")
+    buffer = io.BytesIO()
+    image.save(buffer, format="png")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def menu_toggle(i):
+    # 反复打开/关闭同一个菜单
+    return frame(menu_open=i % 2 == 1), "click", {"point": f"<point>{120 + i % 3} 40</point>"}
+
+
+def dead_button(i):
+    # 点击没有反应的按钮（与 wait 策略配合时画面无变化，这里每轮都重新发送）
+    return frame(), "click", {"point": f"<point>{500 + (i * 7) % 15} 600</point>"}
+
+
+def three_state_loop(i):
+    # 在三个界面之间来回切换
+    return frame(page=i % 3), "click", {"point": f"<point>{300 * (i % 3) + 100} 700</point>"}
+
+
+def wander(i):
+    # 在两个界面之间做各种不同的操作，始终没有新画面
+    actions = [("scroll", {"point": f"<point>{100 + i * 37 % 800} 300</point>", "direction": "down"}),
+               ("hotkey", {"key": "ctrl a"}), ("type", {"content": f"attempt {i}"}),
+               ("click", {"point": f"<point>{200 + i * 53 % 600} 500</point>"})]
+    name, args = actions[i % len(actions)]
+    return frame(page=i % 2), name, args
+
+
+def form_fill(i):
+    # 逐个填写表单字段：每轮只有一小块区域变化
+    return frame(typed=i), "type", {"content": f"value {i}"}
+
+
+def wizard(i):
+    # 向导逐页推进
+    return frame(page=100 + i), "click", {"point": "<point>900 900</point>"}
+
+
+SCENARIOS = [
+    ("menu toggle", menu_toggle, True),
+    ("dead button", dead_button, True),
+    ("3-screen loop", three_state_loop, True),
+    ("wander 2 screens", wander, True),
+    ("form fill", form_fill, False),
+    ("wizard pages", wizard, False),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUIAgent 停滞/循环检测基准")
+    parser.add_argument("--max-iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    for name, script, stuck in SCENARIOS:
+        monitor = ScreenChangeDetector(policy="reprompt")
+        detector = StagnationDetector()
+        fired = None
+        for i in range(1, args.max_iterations + 1):
+            screenshot, action, action_args = script(i)
+            monitor.is_changed(screenshot)
+            event = detector.record(action, action_args, monitor.state_id)
+            if event:
+                fired = (i, event)
+                break
+        if fired:
+            i, event = fired
+            detail = f"period={event['period']}" if event["kind"] == "cycle" else f"streak={event['streak']}"
+            result = f"detected at #{i:<2} ({event['kind']}, {detail}), saved {args.max_iterations - i} calls"
+        else:
+            result = "not detected"
+        expected = "stuck" if stuck else "progress"
+        print(f"{name:<17} [{expected:<8}] {result}")
+
+
+if __name__ == "__main__":
+    main()
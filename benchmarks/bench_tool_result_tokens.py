@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+工具结果编码 token 基准测试
+基于录制的 CodeAgent 会话，对比 json.dumps 完整结果字典与 encode_function_result 紧凑编码
+在每次迭代中占用的 tokens
+
+用法:
+  python benchmarks/bench_tool_result_tokens.py [--session benchmarks/fixtures/code_agent_session.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.agents.agent_memory.memory import Message, encode_function_result
+
+
+def count_tokens(text: str, model: str) -> int:
+    return Message("tool", text).estimate_tokens(model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工具结果编码 token 基准")
+    parser.add_argument(
+        "--session",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "code_agent_session.json")
+    )
+    parser.add_argument("--model", default=os.getenv("CodeAgent_MODEL", "gpt-4o"))
+    args = parser.parse_args()
+
+    with open(args.session, "r", encoding="utf-8") as f:
+        session = json.load(f)
+
+    print(session.get("description", ""))
+    print(f"{'iter':>4} {'json.dumps':>12} {'compact':>10} {'saved':>8}")
+    total_before = total_after = 0
+    for i, iteration in enumerate(session["iterations"], 1):
+        before = sum(count_tokens(json.dumps(r, ensure_ascii=False), args.model) for r in iteration["results"])
+        after = sum(count_tokens(encode_function_result(r), args.model) for r in iteration["results"])
+        total_before += before
+        total_after += after
+        saved = f"{(1 - after / before) * 100:.0f}%" if before else "-"
+        print(f"{i:>4} {before:>12} {after:>10} {saved:>8}")
+
+    iterations = len(session["iterations"])
+    print(f"{'avg':>4} {total_before / iterations:>12.1f} {total_after / iterations:>10.1f} "
+          f"{(1 - total_after / total_before) * 100:>7.0f}%")
+
+
+if __name__ == "__main__":
+    main()
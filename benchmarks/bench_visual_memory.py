@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分层视觉记忆基准
+用合成截图模拟 GUI 任务：每隔若干帧切换一次界面（大幅变化），其余帧只有光标移动（几乎相同）。
+对比只保留 2 张原图（较早截图直接移除）、2 张原图 + 缩略图、以及相同深度全部保留原图三种配置下，每轮 Context 中图片消息的
+估算 token 数、base64 字节数，以及保留下来的缩略图是否为画面大幅变化后的帧
+
+用法:
+  python benchmarks/bench_visual_memory.py [--iterations 50] [--thumbnails 4] [--scene-every 6]
+"""
+
+import argparse
+import base64
+import io
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from core.agents.agent_memory.memory import MemoryManager
+
+
+def make_frame(scene: int, step: int, size=(1600, 900)) -> str:
+    rng = random.Random(scene)
+    image = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(size[0] - 300), rng.randrange(size[1] - 200)
+        draw.rectangle([x, y, x + rng.randrange(100, 300), y + rng.randrange(50, 200)],
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    # 光标
+    cx, cy = 200 + step * 15, 300 + step * 7
+    draw.polygon([(cx, cy), (cx, cy + 20), (cx + 12, cy + 14)], fill="white", outline="black")
+    buffer = io.BytesIO()
+    image.save(buffer, format="png")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def run(keep_last: int, thumbnails: int, iterations: int, scene_every: int, save_dir: str):
+    memory = MemoryManager(
+        agent_name="bench_visual",
+        max_tokens=10 ** 9,
+        keep_last_screenshots=keep_last,
+        keep_thumbnails=thumbnails,
+        save_dir=save_dir,
+        model="gpt-4o"
+    )
+    memory.set_system_prompt("You are a GUI agent.")
+
+    image_tokens = image_bytes = 0
+    for i in range(iterations):
+        memory.add("user", f"(Current Screen State) frame={i}", image_base64=make_frame(i // scene_every, i % scene_every))
+        memory.add("assistant", "Action: wait()")
+        for msg in memory.history:
+            if msg.has_image:
+                image_tokens += msg.estimate_tokens(memory.model)
+                image_bytes += len(msg.image_base64)
+
+    kept = [msg.content.split("frame=")[1] for msg in memory.history if msg.image_detail == "low"]
+    print(f"full={keep_last} thumbnails={thumbnails}  image tokens/iter={image_tokens / iterations:7.1f}  "
+          f"image bytes/iter={image_bytes / iterations / 1024:8.1f}KB  thumbnail frames={kept}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分层视觉记忆基准")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--thumbnails", type=int, default=4)
+    parser.add_argument("--scene-every", type=int, default=6, help="每隔多少帧切换一次界面")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as save_dir:
+        run(2, 0, args.iterations, args.scene_every, save_dir)
+        run(2, args.thumbnails, args.iterations, args.scene_every, save_dir)
+        # 同样的视觉历史深度全部使用原图
+        run(2 + args.thumbnails, 0, args.iterations, args.scene_every, save_dir)
+        print(f"(界面切换发生在 frame % {args.scene_every} == 0 的帧)")
+
+
+if __name__ == "__main__":
+    main()
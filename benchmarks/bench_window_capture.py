@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+窗口截图基准
+对比整屏截图与只截取应用窗口时编码的像素数、图片 token 数（按 GUIAgent 的图片 token 预算缩放）和编码耗时；
+窗口区域由 clip_region 裁剪到屏幕内，与 capture_screen_win32 只捕获该区域时的结果相同
+
+用法:
+  python benchmarks/bench_window_capture.py
+  python benchmarks/bench_window_capture.py --screen 3840x2160
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from core.agents.agent_memory.token_budget import (
+    DEFAULT_IMAGE_TOKEN_BUDGET,
+    choose_image_detail,
+    estimate_image_tokens,
+    fit_image_size,
+)
+from core.tools.screen.encoder import ScreenshotEncoder
+from core.tools.screen.screen import clip_region
+
+MODEL = "volcengine/doubao-1-5-ui-tars"
+
+# (名称, 窗口相对屏幕的位置和大小 (left, top, width, height) 的比例)
+WINDOWS = [
+    ("full screen", (0, 0, 1, 1)),
+    ("maximized", (-0.004, -0.007, 1.008, 0.98)),
+    ("half screen", (0, 0, 0.5, 0.96)),
+    ("editor", (0.1, 0.1, 0.66, 0.66)),
+    ("dialog", (0.35, 0.35, 0.3, 0.25)),
+    ("partly off", (0.7, 0.5, 0.5, 0.6)),
+]
+
+
+def make_screen(size):
+    image = Image.new("RGB", size, (235, 235, 240))
+    draw = ImageDraw.Draw(image)
+    for y in range(0, size[1], 18):
+        draw.text((8, y), "Lorem ipsum 12.5 Save Open " * (size[0] // 160), fill=(40, 40, 40))
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--screen", default="1920x1080")
+    parser.add_argument("--budget", type=int, default=DEFAULT_IMAGE_TOKEN_BUDGET)
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.screen.split("x"))
+    image = make_screen((width, height))
+    encoder = ScreenshotEncoder()
+    encoder.encode_bytes(image, size=(320, 180))  # 预热
+    detail = choose_image_detail(MODEL, args.budget)
+
+    for name, (left, top, w, h) in WINDOWS:
+        region = clip_region((int(left * width), int(top * height), int(w * width), int(h * height)), width, height)
+        x, y, region_width, region_height = region
+        start = time.perf_counter()
+        capture = image.crop((x, y, x + region_width, y + region_height))
+        size = fit_image_size(capture.size, MODEL, args.budget, detail)
+        data = encoder.encode_bytes(capture, size=size)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{name:<12} capture {region_width}x{region_height:<5} at ({x},{y}) -> sent {size[0]}x{size[1]:<5} "
+              f"{estimate_image_tokens(size, MODEL, detail):>5} tok {len(data) / 1024:7.1f}KB {elapsed:6.1f}ms "
+              f"(scale {size[0] / region_width:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,11 @@
 Memory module for Agent4
 """
 
-from .memory import MemoryManager, Message
+from .blob_store import ImageBlobStore, get_image_store
+from .history import IndexedHistory
+from .insight_index import InsightIndex
+from .summarizer import HistorySummarizer
+from .token_budget import choose_image_detail, estimate_image_tokens, fit_image_size, get_context_budget, supports_vision
+from .memory import MemoryManager, Message, encode_function_result, split_function_result_images
 
-__all__ = ['MemoryManager', 'Message']
\ No newline at end of file
+__all__ = ['MemoryManager', 'Message', 'encode_function_result', 'split_function_result_images', 'IndexedHistory', 'InsightIndex', 'HistorySummarizer', 'ImageBlobStore', 'get_image_store', 'estimate_image_tokens', 'fit_image_size', 'choose_image_detail', 'get_context_budget', 'supports_vision']
\ No newline at end of file
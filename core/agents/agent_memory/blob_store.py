@@ -0,0 +1,81 @@
+"""
+按内容寻址的图片存储
+消息只保存图片的哈希引用，图片以编码后的字节（PNG/JPEG，而不是 base64）保存一份：
+相同的帧（例如 wait() 前后的截图）只存一次；base64 只在序列化时临时生成。
+"""
+
+import base64
+import collections
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+
+class ImageBlobStore:
+    """
+    带引用计数的图片存储
+
+    - put(): 按内容哈希存入并增加引用计数，返回 key
+    - release(): 减少引用计数；计数为 0 的图片进入 LRU，超过 max_unreferenced 张后淘汰
+      （刚被移出 Context 又重新出现的画面可以直接复用；仍在 Context 中的相同画面靠引用计数去重，不占 LRU）
+    """
+
+    def __init__(self, max_unreferenced: int = 1):
+        self.max_unreferenced = max_unreferenced
+        self._blobs: Dict[str, list] = {}  # key -> [data, refcount]
+        self._unreferenced = collections.OrderedDict()  # key -> None，按释放时间排序
+        self._lock = threading.Lock()
+        self.dedup_hits = 0
+
+    def put(self, data: bytes) -> str:
+        key = hashlib.blake2b(data, digest_size=16).hexdigest()
+        with self._lock:
+            blob = self._blobs.get(key)
+            if blob is None:
+                self._blobs[key] = [data, 1]
+            else:
+                blob[1] += 1
+                self.dedup_hits += 1
+                self._unreferenced.pop(key, None)
+        return key
+
+    def put_base64(self, image_base64: str) -> str:
+        return self.put(base64.b64decode(image_base64))
+
+    def release(self, key: str):
+        with self._lock:
+            blob = self._blobs.get(key)
+            if blob is None:
+                return
+            blob[1] -= 1
+            if blob[1] > 0:
+                return
+            self._unreferenced[key] = None
+            while len(self._unreferenced) > self.max_unreferenced:
+                evicted, _ = self._unreferenced.popitem(last=False)
+                del self._blobs[evicted]
+
+    def get(self, key: str) -> Optional[bytes]:
+        blob = self._blobs.get(key)
+        return blob[0] if blob else None
+
+    def get_base64(self, key: str) -> Optional[str]:
+        data = self.get(key)
+        return base64.b64encode(data).decode("ascii") if data is not None else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "blobs": len(self._blobs),
+                "unreferenced": len(self._unreferenced),
+                "bytes": sum(len(blob[0]) for blob in self._blobs.values()),
+                "dedup_hits": self.dedup_hits,
+            }
+
+
+# 进程内共享的图片存储
+_image_store = ImageBlobStore()
+
+
+def get_image_store() -> ImageBlobStore:
+    return _image_store
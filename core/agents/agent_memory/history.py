@@ -0,0 +1,183 @@
+import collections
+import heapq
+from typing import Iterator, List, Optional
+
+
+class _ToolCallGroup:
+    """一次function calling：assistant的tool_calls消息及紧随其后的tool消息"""
+
+    __slots__ = ("members", "alive")
+
+    def __init__(self, head):
+        self.members = [head]
+        self.alive = True
+
+
+class IndexedHistory:
+    """
+    带增量索引的对话历史容器，修剪时无需全量扫描。
+
+    - 图片索引: 按顺序记录仍带截图的消息，视觉遗忘每次只取最早的一条
+    - Tool call 分组索引: 按顺序记录 assistant->tool 调用组
+    - 淘汰队列: 按顺序记录未 Pin 的消息，token 淘汰每次只取最早的一条
+
+    删除采用惰性标记，索引中失效的条目在访问时跳过，墓碑过多时整体压缩，
+    因此追加、视觉遗忘、调用组解除 Pin、token 淘汰均摊 O(1)。
+    遍历顺序与淘汰规则与原先基于 list 的实现一致。
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        for msg in getattr(self, "_items", ()):
+            msg._removed = True
+        self._items = collections.deque()  # 含已删除的墓碑
+        self._live = 0
+        self._dead = 0
+        self._seq = 0
+
+        self._images = collections.deque()
+        self.image_count = 0
+
+        self._groups = collections.deque()
+        self._open_group: Optional[_ToolCallGroup] = None
+        self.group_count = 0
+
+        # 追加时即未 Pin 的消息天然有序；之后才解除 Pin 的消息放入小顶堆
+        self._evictable = collections.deque()
+        self._late_evictable = []
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __iter__(self) -> Iterator:
+        return (m for m in self._items if not m._removed)
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __bool__(self) -> bool:
+        return self._live > 0
+
+    def __contains__(self, msg) -> bool:
+        return getattr(msg, "_removed", True) is False
+
+    def append(self, msg):
+        self._seq += 1
+        msg._seq = self._seq
+        msg._removed = False
+        self._items.append(msg)
+        self._live += 1
+
+        # 图片索引
+        msg._indexed_image = msg.has_image
+        if msg._indexed_image:
+            self._images.append(msg)
+            self.image_count += 1
+
+        # Tool call 分组索引
+        msg._tool_call_group = None
+        if msg.tool_calls:
+            group = _ToolCallGroup(msg)
+            msg._tool_call_group = group
+            self._groups.append(group)
+            self.group_count += 1
+            self._open_group = group
+        elif msg.role == "tool" and self._open_group is not None:
+            self._open_group.members.append(msg)
+        else:
+            self._open_group = None
+
+        # 淘汰队列
+        if not msg.pinned:
+            self._evictable.append(msg)
+
+    def pop_oldest_image(self):
+        """取出最早的仍带截图的消息（调用方负责移除其图片）"""
+        while self._images:
+            msg = self._images.popleft()
+            if msg._indexed_image and not msg._removed:
+                msg._indexed_image = False
+                self.image_count -= 1
+                return msg
+        return None
+
+    def pop_oldest_group(self) -> List:
+        """取出最早的调用组，返回其中仍在历史中的消息"""
+        while self._groups:
+            group = self._groups.popleft()
+            if group.alive:
+                group.alive = False
+                self.group_count -= 1
+                if group is self._open_group:
+                    self._open_group = None
+                return [m for m in group.members if not m._removed]
+        return []
+
+    def unpin(self, msg):
+        """解除 Pin，使消息可以被 token 淘汰"""
+        if msg.pinned:
+            msg.pinned = False
+            heapq.heappush(self._late_evictable, (msg._seq, msg))
+
+    def evict(self):
+        """
+        淘汰一条消息并返回：最早的未 Pin 消息（不含最后一条）；
+        不存在时淘汰最早的消息。
+        """
+        if not self._live:
+            return None
+        last = self._items[-1]
+        msg = self._peek_evictable()
+        if msg is None or msg is last:
+            msg = self._first()
+        self._remove(msg)
+        return msg
+
+    def _peek_evictable(self):
+        queue = self._evictable
+        while queue and (queue[0]._removed or queue[0].pinned):
+            queue.popleft()
+        heap = self._late_evictable
+        while heap and (heap[0][1]._removed or heap[0][1].pinned):
+            heapq.heappop(heap)
+
+        candidates = []
+        if queue:
+            candidates.append(queue[0])
+        if heap:
+            candidates.append(heap[0][1])
+        if not candidates:
+            return None
+        return min(candidates, key=lambda m: m._seq)
+
+    def _first(self):
+        while self._items[0]._removed:
+            self._items.popleft()
+            self._dead -= 1
+        return self._items[0]
+
+    def _remove(self, msg):
+        msg._removed = True
+        self._live -= 1
+        self._dead += 1
+
+        if msg._indexed_image:
+            msg._indexed_image = False
+            self.image_count -= 1
+
+        group = msg._tool_call_group
+        if group is not None and group.alive:
+            group.alive = False
+            self.group_count -= 1
+            if group is self._open_group:
+                self._open_group = None
+
+        # 清理队首墓碑；墓碑多于存活消息时整体压缩
+        while self._items and self._items[0]._removed:
+            self._items.popleft()
+            self._dead -= 1
+        if self._dead > self._live:
+            self._items = collections.deque(m for m in self._items if not m._removed)
+            self._dead = 0
@@ -0,0 +1,88 @@
+"""
+Insights 检索索引
+本地倒排索引 + BM25 打分，按任务描述选出最相关的经验，避免把整个经验库注入每次请求。
+分词不依赖第三方库：英文/数字按单词切分，中日韩文字切为单字和相邻双字（bigram）。
+"""
+
+import collections
+import heapq
+import math
+import re
+from typing import Dict, List, Tuple
+
+
+# 英文单词/数字，或连续的中日韩文字（假名、汉字、谚文）
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def tokenize(text: str) -> List[str]:
+    """CJK 感知的分词：英文按单词，中日韩文字输出单字和 bigram"""
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if _CJK_PATTERN.match(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+class InsightIndex:
+    """
+    BM25 倒排索引，文档为一条 insight（topic + knowledge）。
+    add / remove 只更新该文档涉及的倒排表，检索开销与命中的倒排表长度相关，与经验库总量无关。
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = collections.defaultdict(dict)  # term -> {topic: tf}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}  # topic -> {term: tf}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, topic: str, knowledge: str):
+        """添加或更新一条 insight"""
+        self.remove(topic)
+        terms = collections.Counter(tokenize(f"{topic} {knowledge}"))
+        self._doc_terms[topic] = terms
+        length = sum(terms.values())
+        self._doc_lengths[topic] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings[term][topic] = tf
+
+    def remove(self, topic: str):
+        terms = self._doc_terms.pop(topic, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(topic)
+        for term in terms:
+            posting = self._postings[term]
+            posting.pop(topic, None)
+            if not posting:
+                del self._postings[term]
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Returns:
+            按 BM25 得分降序的 [(topic, score)]，只包含与查询有共同词项的 insight
+        """
+        doc_count = len(self._doc_lengths)
+        if not doc_count or top_k <= 0:
+            return []
+        avg_length = self._total_length / doc_count or 1
+        scores: Dict[str, float] = collections.defaultdict(float)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for topic, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[topic] / avg_length)
+                scores[topic] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
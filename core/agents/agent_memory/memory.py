@@ -1,9 +1,20 @@
+import base64
+import collections
+import io
 import time
 import json
 import os
-from typing import List, Optional, Dict, Any, Union
+import weakref
+from typing import Callable, List, Optional, Dict, Any, Union
 from dotenv import load_dotenv
 
+from .blob_store import get_image_store
+from .history import IndexedHistory
+from .insight_index import InsightIndex
+from .persistence import JsonFileStore, SqliteStore, get_flusher
+from .summarizer import HistorySummarizer
+from .token_budget import estimate_image_tokens, get_image_size, supports_vision
+
 load_dotenv()
 
 try:
@@ -13,9 +24,52 @@ try:
 except ImportError:
     litellm = None
 
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# 工具结果中的图片作为附件发送时的最大边长
+ATTACHMENT_MAX_SIZE = 1024
+# 较早截图保留为缩略图时的最大边长
+THUMBNAIL_SIZE = 256
+# 与前一帧的画面变化低于该值的缩略图视为重复画面（例如只有光标移动）
+THUMBNAIL_DUPLICATE_CHANGE = 0.02
+# 无法读取图片尺寸时每张图片的估算 token 数；detail=low 的缩略图按固定的低分辨率计费
+IMAGE_TOKENS = 1100
+LOW_DETAIL_IMAGE_TOKENS = 85
+
+
+def sniff_image_mime(data: Optional[bytes]) -> Optional[str]:
+    """根据文件头判断图片格式，无法识别时返回 None"""
+    if not data:
+        return None
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    return None
+
+
+def count_text_tokens(text: str, model: str = "gpt-4o") -> int:
+    """计算文本 Token 数。优先使用 litellm，失败则回退到简易算法。"""
+    if litellm:
+        try:
+            return litellm.token_counter(model=model, text=text)
+        except Exception:
+            pass
+    return len(text) // 4
+
+
 class Message:
     """
     消息实体，支持文本、图片和function calling。
+    Token 数与 API 格式的字典在首次计算后缓存，修改 content / image_base64 时自动失效。
+    图片以字节保存在共享的 ImageBlobStore 中，消息只持有引用，base64 在序列化时才生成。
     """
     def __init__(
         self, 
@@ -25,10 +79,19 @@ class Message:
         pinned: bool = False,
         function_call: Optional[Dict[str, Any]] = None,
         tool_calls: Optional[List[Dict[str, Any]]] = None,
-        tool_call_id: Optional[str] = None
+        tool_call_id: Optional[str] = None,
+        image_mime: str = "image/png",
+        image_detail: Optional[str] = None
     ):
+        self._token_cache = None  # (model, tokens)
+        self._dict_cache = None
+        self._image_key: Optional[str] = None
+        self._image_release = None
         self.role = role  # system, user, assistant, tool
         self.content = content
+        self.image_mime = image_mime
+        self.image_detail = image_detail  # 缩略图为 "low"
+        self.image_size: Optional[tuple] = None  # (宽, 高)，用于估算图片 token
         self.image_base64 = image_base64
         self.pinned = pinned
         self.timestamp = time.time()
@@ -38,8 +101,70 @@ class Message:
         self.tool_calls = tool_calls  # 新格式
         self.tool_call_id = tool_call_id  # tool role需要的id
 
+    @property
+    def content(self) -> Optional[str]:
+        return self._content
+
+    @content.setter
+    def content(self, value: Optional[str]):
+        self._content = value
+        self.invalidate_cache()
+
+    @property
+    def has_image(self) -> bool:
+        return self._image_key is not None
+
+    @property
+    def image_bytes(self) -> Optional[bytes]:
+        return get_image_store().get(self._image_key) if self._image_key else None
+
+    @property
+    def image_base64(self) -> Optional[str]:
+        """每次访问都会重新编码，判断是否有图片请使用 has_image"""
+        return get_image_store().get_base64(self._image_key) if self._image_key else None
+
+    @image_base64.setter
+    def image_base64(self, value: Optional[str]):
+        self.set_image_bytes(base64.b64decode(value) if value else None, self.image_mime, self.image_detail)
+
+    def set_image(self, image_base64: Optional[str], mime: str = "image/png", detail: Optional[str] = None):
+        """替换图片及其格式"""
+        self.set_image_bytes(base64.b64decode(image_base64) if image_base64 else None, mime, detail)
+
+    def set_image_bytes(self, data: Optional[bytes], mime: str = "image/png", detail: Optional[str] = None):
+        """替换图片（编码后的字节）及其格式，旧图片的引用随之释放"""
+        store = get_image_store()
+        if self._image_release is not None:
+            self._image_release()  # 释放旧引用（finalize 只会执行一次）
+        self._image_key = self._image_release = None
+        self.image_size = get_image_size(data) if data else None
+        # 以图片实际的格式为准，避免 data URI 的 MIME 与内容不符
+        mime = sniff_image_mime(data) or mime
+        if data:
+            self._image_key = store.put(data)
+            # 消息被回收时自动释放引用
+            self._image_release = weakref.finalize(self, store.release, self._image_key)
+        self.image_mime = mime
+        self.image_detail = detail
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        """其他字段（如tool_calls）被修改后手动使缓存失效"""
+        self._token_cache = None
+        self._dict_cache = None
+
     def to_dict(self) -> Dict[str, Any]:
-        """构造兼容 LLM API 的格式"""
+        """
+        构造兼容 LLM API 的格式（缓存结果，调用方不应修改）。
+        图片消息不缓存，data URI 在每次序列化时从图片字节生成，不常驻内存。
+        """
+        if self.has_image:
+            return self._build_dict()
+        if self._dict_cache is None:
+            self._dict_cache = self._build_dict()
+        return self._dict_cache
+
+    def _build_dict(self) -> Dict[str, Any]:
         result = {"role": self.role}
         
         # 处理tool role
@@ -56,11 +181,14 @@ class Message:
             return result
         
         # 处理图片消息
-        if self.image_base64:
+        if self.has_image:
             content_list = []
             if self.content:
                 content_list.append({"type": "text", "text": self.content})
-            content_list.append({"type": "image_url", "image_url": {"url": f"data:image/png;base64,{self.image_base64}"}})
+            image_url = {"url": f"data:{self.image_mime};base64,{self.image_base64}"}
+            if self.image_detail:
+                image_url["detail"] = self.image_detail
+            content_list.append({"type": "image_url", "image_url": image_url})
             result["content"] = content_list
             return result
         
@@ -70,21 +198,25 @@ class Message:
 
     def estimate_tokens(self, model: str = "gpt-4o") -> int:
         """
-        估算 Token 数。优先使用 litellm，失败则回退到简易算法。
+        估算 Token 数（结果按模型缓存）。
+        """
+        if self._token_cache is None or self._token_cache[0] != model:
+            self._token_cache = (model, self._compute_tokens(model))
+        return self._token_cache[1]
+
+    def _compute_tokens(self, model: str) -> int:
+        """
+        计算 Token 数。优先使用 litellm，失败则回退到简易算法。
         """
         # 1. 图片 tokens
-        image_tokens = 1100 if self.image_base64 else 0
+        image_tokens = 0
+        if self.image_size is not None:
+            image_tokens = estimate_image_tokens(self.image_size, model, self.image_detail)
+        elif self.has_image:
+            image_tokens = LOW_DETAIL_IMAGE_TOKENS if self.image_detail == "low" else IMAGE_TOKENS
         
         # 2. 文本 tokens
-        text_tokens = 0
-        if self.content:
-            if litellm:
-                try:
-                    text_tokens = litellm.token_counter(model=model, text=self.content)
-                except Exception:
-                    text_tokens = len(self.content) // 4
-            else:
-                text_tokens = len(self.content) // 4
+        text_tokens = count_text_tokens(self.content, model) if self.content else 0
         
         # 3. Function calling tokens (粗略估计)
         function_tokens = 0
@@ -96,58 +228,237 @@ class Message:
 
         return text_tokens + image_tokens + function_tokens
 
+# 工具结果中发送给模型时使用的短键名
+FUNCTION_RESULT_SHORT_KEYS = {
+    "success": "ok",
+    "output": "out",
+    "error": "err",
+    "error_type": "etype",
+    "language": "lang",
+    "message": "msg",
+    "output_truncated": "trunc",
+    "output_ref": "ref",
+    "output_total_chars": "total",
+}
+
+# 与其他字段内容重复的字段（列表形式的输出已合并在output/error中）
+FUNCTION_RESULT_DUPLICATE_KEYS = {
+    "outputs": "output",
+    "errors": "error",
+}
+
+
+def encode_function_result(result: Dict[str, Any]) -> str:
+    """
+    将工具结果编码为发送给模型的紧凑文本：
+    输出只保留一份、去掉空字段、使用短键名和紧凑JSON。
+    完整的结果字典仍由调用方发送给UI。
+    """
+    compact = {}
+    for key, value in result.items():
+        duplicate_of = FUNCTION_RESULT_DUPLICATE_KEYS.get(key)
+        if duplicate_of and duplicate_of in result:
+            continue
+        if value is None or value == "" or value == [] or value == {}:
+            continue
+        if isinstance(value, bool):
+            value = int(value)
+        compact[FUNCTION_RESULT_SHORT_KEYS.get(key, key)] = value
+    return json.dumps(compact, ensure_ascii=False, separators=(",", ":"))
+
+
+def split_function_result_images(result: Dict[str, Any], attach: bool = True):
+    """
+    从工具结果中拆出图片（形如 {"type": "image/png", "content": base64} 的字段）。
+
+    Args:
+        result: 工具结果字典
+        attach: 图片是否会作为附件发送（模型不支持图片输入时为 False，占位文本据此说明）
+
+    Returns:
+        (替换为占位文本后的结果字典, [(字段名, base64)])
+    """
+    images = []
+    text_result = {}
+    for key, value in result.items():
+        if (
+            isinstance(value, dict)
+            and str(value.get("type", "")).startswith("image/")
+            and isinstance(value.get("content"), str)
+        ):
+            images.append((key, value["content"]))
+            text_result[key] = "[图片已作为附件发送]" if attach else "[图片未发送：当前模型不支持图片输入]"
+        else:
+            text_result[key] = value
+    return text_result, images
+
+
+def downscale_image_base64(image_base64: str, max_size: int = ATTACHMENT_MAX_SIZE) -> str:
+    """将base64图片缩小到最大边长不超过max_size（PNG），Pillow不可用或无需缩小时原样返回"""
+    if Image is None:
+        return image_base64
+    try:
+        image = Image.open(io.BytesIO(base64.b64decode(image_base64)))
+        if max(image.size) <= max_size:
+            return image_base64
+        image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="png")
+        return base64.b64encode(buffer.getvalue()).decode("utf-8")
+    except Exception:
+        return image_base64
+
+
+def make_thumbnail(image_data: bytes, max_size: int = THUMBNAIL_SIZE, quality: int = 60):
+    """
+    生成 JPEG 缩略图及用于比较画面变化的签名（16x16 灰度像素）
+
+    Returns:
+        (缩略图字节, 签名)，Pillow 不可用或解码失败时返回 None
+    """
+    if Image is None:
+        return None
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        image.draft("RGB", (max_size, max_size))  # JPEG 源图可直接按比例解码
+        image = image.convert("RGB")
+        image.thumbnail((max_size, max_size), Image.Resampling.BILINEAR)
+        buffer = io.BytesIO()
+        image.save(buffer, format="jpeg", quality=quality)
+        signature = image.convert("L").resize((16, 16), Image.Resampling.BILINEAR).tobytes()
+        return buffer.getvalue(), signature
+    except Exception:
+        return None
+
+
+def frame_change(previous: Optional[bytes], current: bytes) -> float:
+    """两帧签名的平均像素差（0~1），没有上一帧（无法比较）时为 0"""
+    if previous is None or len(previous) != len(current):
+        return 0.0
+    return sum(abs(a - b) for a, b in zip(previous, current)) / (255 * len(current))
+
+
 class MemoryManager:
     """
     混合记忆管理器：
     1. Short-term: 滑动窗口 + 视觉遗忘 + 关键信息Pin住 + Function Calling历史
+       压缩模式下，被淘汰的消息在后台合并为一条滚动摘要（见 summarizer.py）
+       配置 turn_compactor 时，较早的 assistant 回复被改写为精简形式（不调用 LLM）
+       视觉记忆分层：最近 keep_last_screenshots 张原图，之前的 keep_thumbnails 张保留为缩略图，
+       缩略图超出数量时优先移除与前一帧几乎相同的画面，其次移除最早的（最新的缩略图总是保留）
     2. Long-term:  基于 JSON 的经验/技能库 (Insights) + Function Calling统计
+       修改先写入内存，由后台线程批量写回磁盘（见 persistence.py），任务结束时调用 flush()
+       存储后端: "json"（每个 agent 两个 JSON 文件）或 "sqlite"（save_dir/memory.db，可由多个 agent 共享）
     """
     def __init__(
         self, 
         agent_name: str = "default_agent",
         max_tokens: int = 8000, 
         keep_last_screenshots: int = 2,
+        keep_thumbnails: int = 0,  # 超出 keep_last_screenshots 的截图保留为缩略图的数量
         keep_function_calls: int = 5,  # 保留最近的function call数量
+        insight_top_k: int = 5,  # 每个任务最多注入的insight数量
+        insight_token_budget: int = 800,  # 注入的insights的token上限
         save_dir: str = "./memory_storage",
-        model: str = None
+        model: str = None,
+        backend: str = None,
+        compaction: Optional[bool] = None,
+        turn_compactor: Optional[Callable[[str], Optional[str]]] = None,
+        keep_verbatim_turns: int = 3,  # 配置 turn_compactor 时，保留原文的最近 assistant 回复数
+        vision: Optional[bool] = None  # 模型是否接受图片输入，默认按 litellm 的模型元数据判断
     ):
         if model is None:
             model = os.getenv("CodeAgent_MODEL", "gpt-4o")
+        if backend is None:
+            backend = os.getenv("MEMORY_BACKEND", "json")
+        if compaction is None:
+            compaction = os.getenv("MEMORY_COMPACTION", "0").lower() in ("1", "true", "yes")
         self.agent_name = agent_name
-        self.history: List[Message] = []
+        self.history = IndexedHistory()
         self.system_prompt: Optional[Message] = None
+        # 工具结果中拆出的图片，在本轮工具结果全部写入后作为图片消息追加
+        self._pending_images: List[Message] = []
+        # history 的 token 总数，随消息增删增量维护
+        self._total_tokens = 0
+        # 压缩模式：被淘汰历史的滚动摘要，位于 system 消息之后、history 之前
+        self.summarizer = HistorySummarizer() if compaction else None
+        self._summary_message: Optional[Message] = None
+        # 结构化压缩：尚未压缩的 assistant 回复（按时间顺序）
+        self.turn_compactor = turn_compactor
+        self.keep_verbatim_turns = keep_verbatim_turns
+        self._verbatim_turns = collections.deque()
+        # 组装好的 system 消息，system prompt / insights 变化时失效
+        self._system_cache: Optional[Dict[str, Any]] = None
+        # 常用工具统计在会话开始时取快照，避免每次调用都改变 system 消息
+        self._stats_snapshot: Optional[str] = None
         self.model = model
+        # 不支持图片输入时，工具结果中的图片只保留占位文本，不作为图片消息发送
+        self.vision = supports_vision(model) if vision is None else vision
         
         # 长期记忆：经验/Insights + Function统计
         self.insights: Dict[str, str] = {} 
+        self.insight_index = InsightIndex()
+        self.insight_top_k = insight_top_k
+        self.insight_token_budget = insight_token_budget
+        # 当前任务描述，用于检索相关的insights
+        self._task_query: Optional[str] = None
         self.function_stats: Dict[str, int] = {}  # 记录function调用次数
         
         self.max_tokens = max_tokens
         self.keep_last_screenshots = keep_last_screenshots
+        self.keep_thumbnails = keep_thumbnails
+        # 缩略图层: [(与前一帧的画面变化, 消息)]，按时间顺序
+        self._thumbnails: List[tuple] = []
+        self._last_signature: Optional[bytes] = None
         self.keep_function_calls = keep_function_calls
         
         self.save_dir = save_dir
         self.insights_file = os.path.join(save_dir, f"{agent_name}_insights.json")
         self.function_stats_file = os.path.join(save_dir, f"{agent_name}_function_stats.json")
+        if backend == "sqlite":
+            # 首次使用时从上面的 JSON 文件迁移
+            self.db_file = os.path.join(save_dir, "memory.db")
+            self._insights_store = SqliteStore(
+                self.db_file, "insights", agent_name, "TEXT", legacy_json=self.insights_file
+            )
+            self._function_stats_store = SqliteStore(
+                self.db_file, "function_stats", agent_name, "INTEGER NOT NULL DEFAULT 0",
+                legacy_json=self.function_stats_file
+            )
+        elif backend == "json":
+            self._insights_store = JsonFileStore(self.insights_file)
+            self._function_stats_store = JsonFileStore(self.function_stats_file)
+        else:
+            raise ValueError(f"不支持的记忆存储后端: {backend}")
+        flusher = get_flusher()
+        flusher.register(self._insights_store)
+        flusher.register(self._function_stats_store)
         
         self._load_insights()
         self._load_function_stats()
 
     def set_system_prompt(self, content: str):
         self.system_prompt = Message("system", content, pinned=True)
+        self._system_cache = None
+        self._stats_snapshot = None
 
     def add(
         self, 
         role: str, 
         content: Optional[str] = None, 
         image_base64: Optional[str] = None, 
-        pinned: bool = False
+        pinned: bool = False,
+        image_mime: str = "image/png",
+        image_detail: Optional[str] = None
     ):
         """
         添加普通消息并触发修剪。
         """
-        msg = Message(role, content, image_base64, pinned)
-        self.history.append(msg)
+        self._flush_pending_images()
+        msg = Message(role, content, image_base64, pinned, image_mime=image_mime, image_detail=image_detail)
+        self._append(msg)
+        if role == "assistant" and content and self.turn_compactor:
+            self._verbatim_turns.append(msg)
         self._prune_history()
 
     def add_function_call(
@@ -162,73 +473,127 @@ class MemoryManager:
             tool_calls: OpenAI格式的tool_calls列表
             assistant_content: 可选的思考过程文本
         """
+        self._flush_pending_images()
         msg = Message(
             role="assistant",
             content=assistant_content,
             tool_calls=tool_calls
         )
-        self.history.append(msg)
+        self._append(msg)
         
         # 更新function统计
         for tool_call in tool_calls:
             func_name = tool_call.get("function", {}).get("name", "unknown")
             self.function_stats[func_name] = self.function_stats.get(func_name, 0) + 1
+            self._function_stats_store.increment(func_name)
         
-        self._save_function_stats()
         self._prune_history()
 
     def add_function_result(
         self, 
         tool_call_id: str, 
         function_name: str,
-        result: str
+        result: Union[str, Dict[str, Any]],
+        images: Optional[List[str]] = None
     ):
         """
         添加function执行结果。
         
+        结果中的图片不会以base64文本写入tool消息，而是在本轮工具结果之后
+        作为图片消息追加（缩小后发送），tool消息中只保留占位文本；
+        模型不支持图片输入（vision=False）时图片被丢弃，只保留占位文本。
+        
         Args:
             tool_call_id: 对应的tool call id
             function_name: 函数名称
-            result: 执行结果（字符串形式）
+            result: 执行结果（字符串，或结果字典，字典会拆出图片并用encode_function_result编码）
+            images: 已从结果中拆出的base64图片
         """
+        images = list(images or [])
+        if isinstance(result, dict):
+            result, result_images = split_function_result_images(result, attach=self.vision)
+            images.extend(image for _, image in result_images)
+            result = encode_function_result(result)
+        if not self.vision:
+            images = []
+        for image in images:
+            self._pending_images.append(Message(
+                role="user",
+                content=f"[{function_name} 返回的图片]",
+                image_base64=downscale_image_base64(image)
+            ))
         msg = Message(
             role="tool",
             content=result,
             tool_call_id=tool_call_id
         )
-        self.history.append(msg)
+        self._append(msg)
         self._prune_history()
 
     def add_insight(self, topic: str, knowledge: str):
         """
         添加长期记忆（经验/技能）。
         """
+        if self.insights.get(topic) == knowledge:
+            return
         self.insights[topic] = knowledge
-        self._save_insights()
+        self._system_cache = None
+        self.insight_index.add(topic, knowledge)
+        self._insights_store.set(topic, knowledge)
+
+    def set_task(self, description: str):
+        """设置当前任务描述，System Prompt 中只注入与任务相关的 insights"""
+        self._task_query = description
+        self._system_cache = None
+
+    def select_insights(self) -> List[str]:
+        """
+        选出本次注入的 insights：按与任务描述的 BM25 相关度取 top-k，
+        总量不超过 insight_token_budget。未设置任务时取最近添加的 insights。
+        """
+        if self._task_query:
+            topics = [topic for topic, _ in self.insight_index.search(self._task_query, self.insight_top_k)]
+        else:
+            topics = list(self.insights)[-self.insight_top_k:] if self.insight_top_k > 0 else []
+
+        selected = []
+        used_tokens = 0
+        for topic in topics:
+            line = f"- {topic}: {self.insights[topic]}"
+            tokens = count_text_tokens(line, self.model)
+            if used_tokens + tokens > self.insight_token_budget:
+                continue
+            selected.append(line)
+            used_tokens += tokens
+        return selected
+
+    def flush(self):
+        """立即把长期记忆的修改写入磁盘（任务结束时调用）"""
+        self._insights_store.flush()
+        self._function_stats_store.flush()
 
     def get_context(self) -> List[Dict[str, Any]]:
         """
         构造最终发送给 LLM 的 Context。
+
+        布局固定为 system prompt -> insights -> 工具统计 -> history，
+        system 消息和每条历史消息的字典都会缓存，只有底层数据变化时才重新生成，
+        因此相邻两轮的 Context 前缀逐字节一致，可以命中服务端的 prompt caching。
+        返回的消息字典是缓存对象，调用方不应修改。
         """
+        self._flush_pending_images()
         messages = []
         
         # 1. 动态注入长期记忆到 System Prompt
         if self.system_prompt:
-            final_sys_content = self.system_prompt.content
-            
-            # 注入insights
-            if self.insights:
-                insights_str = "\n".join([f"- {k}: {v}" for k, v in self.insights.items()])
-                final_sys_content += f"\n\n[长期记忆/Insights]:\n{insights_str}"
-            
-            # 注入function统计 (top 5)
-            if self.function_stats:
-                sorted_funcs = sorted(self.function_stats.items(), key=lambda x: x[1], reverse=True)[:5]
-                stats_str = "\n".join([f"- {name}: {count}次" for name, count in sorted_funcs])
-                final_sys_content += f"\n\n[常用工具统计]:\n{stats_str}"
-            
-            sys_msg_dict = {"role": "system", "content": final_sys_content}
-            messages.append(sys_msg_dict)
+            if self._system_cache is None:
+                self._system_cache = self._build_system_message()
+            messages.append(self._system_cache)
+        
+        # 被淘汰历史的摘要（压缩模式）
+        self._apply_summary()
+        if self._summary_message:
+            messages.append(self._summary_message.to_dict())
         
         # 2. 添加短期对话历史
         for msg in self.history:
@@ -236,71 +601,133 @@ class MemoryManager:
             
         return messages
 
+    def _build_system_message(self) -> Dict[str, Any]:
+        final_sys_content = self.system_prompt.content
+        
+        # 注入与当前任务相关的insights
+        insights = self.select_insights()
+        if insights:
+            insights_str = "\n".join(insights)
+            final_sys_content += f"\n\n[长期记忆/Insights]:\n{insights_str}"
+        
+        # 注入function统计 (top 5)，使用快照，会话内调用次数的变化不会使前缀失效
+        if self._stats_snapshot is None:
+            self._stats_snapshot = ""
+            if self.function_stats:
+                sorted_funcs = sorted(self.function_stats.items(), key=lambda x: x[1], reverse=True)[:5]
+                stats_str = "\n".join([f"- {name}: {count}次" for name, count in sorted_funcs])
+                self._stats_snapshot = f"\n\n[常用工具统计]:\n{stats_str}"
+        final_sys_content += self._stats_snapshot
+        
+        return {"role": "system", "content": final_sys_content}
+
+    def _append(self, msg: Message):
+        self.history.append(msg)
+        self._total_tokens += msg.estimate_tokens(self.model)
+
+    def get_total_tokens(self) -> int:
+        """当前 history 的 token 总数"""
+        return self._total_tokens
+
+    def _flush_pending_images(self):
+        """
+        将工具结果中的图片作为图片消息追加到历史。
+        tool消息必须紧跟在对应的tool_calls之后，因此图片在下一条非tool消息之前统一追加。
+        """
+        if not self._pending_images:
+            return
+        for msg in self._pending_images:
+            self._append(msg)
+        self._pending_images = []
+        self._prune_history()
+
     def _prune_history(self):
         """
         维护 Context Window 的核心逻辑
         """
         # --- 1. 视觉遗忘 (Visual Pruning) ---
         if self.keep_last_screenshots > 0:
-            img_msgs = [m for m in self.history if m.image_base64]
-            if len(img_msgs) > self.keep_last_screenshots:
-                num_to_remove = len(img_msgs) - self.keep_last_screenshots
-                removed_count = 0
-                for msg in self.history:
-                    if msg.image_base64:
-                        if removed_count < num_to_remove:
-                            msg.image_base64 = None
-                            msg.content = f"[截图已移除] {msg.content or ''}"
-                            removed_count += 1
-                        else:
-                            break
-
-        # --- 2. Function Call 修剪 (保留最近的N组) ---
+            while self.history.image_count > self.keep_last_screenshots:
+                msg = self.history.pop_oldest_image()
+                self._total_tokens -= msg.estimate_tokens(self.model)
+                if not self._demote_to_thumbnail(msg):
+                    msg.set_image_bytes(None)
+                    msg.content = f"[截图已移除] {msg.content or ''}"
+                self._total_tokens += msg.estimate_tokens(self.model)
+            self._prune_thumbnails()
+
+        # --- 2. 结构化压缩 (较早的 assistant 回复只保留动作) ---
+        if self.turn_compactor:
+            while len(self._verbatim_turns) > self.keep_verbatim_turns:
+                msg = self._verbatim_turns.popleft()
+                if msg not in self.history:
+                    continue
+                compacted = self.turn_compactor(msg.content)
+                if compacted and compacted != msg.content:
+                    self._total_tokens -= msg.estimate_tokens(self.model)
+                    msg.content = compacted
+                    self._total_tokens += msg.estimate_tokens(self.model)
+
+        # --- 3. Function Call 修剪 (保留最近的N组) ---
         if self.keep_function_calls > 0:
-            # 找到所有function call对(assistant->tool)
-            func_call_pairs = []
-            i = 0
-            while i < len(self.history):
-                msg = self.history[i]
-                if msg.tool_calls:
-                    # 找到对应的tool responses
-                    pair_indices = [i]
-                    for j in range(i + 1, len(self.history)):
-                        if self.history[j].role == "tool":
-                            pair_indices.append(j)
-                        else:
-                            break
-                    func_call_pairs.append(pair_indices)
-                i += 1
-            
-            # 如果超过限制，标记旧的为可删除
-            if len(func_call_pairs) > self.keep_function_calls:
-                num_to_remove = len(func_call_pairs) - self.keep_function_calls
-                for pair_idx in range(num_to_remove):
-                    for msg_idx in func_call_pairs[pair_idx]:
-                        self.history[msg_idx].pinned = False  # 确保可以被删除
-
-        # --- 3. 基于 Token 的滑动窗口 (Token Pruning) ---
-        current_tokens = sum(m.estimate_tokens(self.model) for m in self.history)
-        
-        while current_tokens > self.max_tokens and len(self.history) > 1:
-            # 寻找可以删除的消息（跳过 Pinned 和最后一条）
-            remove_index = -1
-            for i in range(len(self.history) - 1): 
-                if not self.history[i].pinned:
-                    remove_index = i
-                    break
-            
-            if remove_index != -1:
-                removed_msg = self.history.pop(remove_index)
-                current_tokens -= removed_msg.estimate_tokens(self.model)
-            else:
-                # 极端情况：只能删最早的非 System
-                if len(self.history) > 1:
-                    self.history.pop(0)
-                    current_tokens = sum(m.estimate_tokens(self.model) for m in self.history)
-                else:
-                    break
+            # 超过限制时，最早的调用组(assistant->tool)标记为可删除
+            while self.history.group_count > self.keep_function_calls:
+                for msg in self.history.pop_oldest_group():
+                    self.history.unpin(msg)  # 确保可以被删除
+
+        # --- 4. 基于 Token 的滑动窗口 (Token Pruning) ---
+        # 优先删除最早的非 Pinned 消息（不含最后一条），极端情况下删除最早的消息
+        self._apply_summary()
+        summary_tokens = self._summary_message.estimate_tokens(self.model) if self._summary_message else 0
+        evicted = []
+        while self._total_tokens + summary_tokens > self.max_tokens and len(self.history) > 1:
+            msg = self.history.evict()
+            self._total_tokens -= msg.estimate_tokens(self.model)
+            evicted.append(msg)
+
+        # 压缩模式：被淘汰的消息交给后台摘要，不阻塞主循环
+        if evicted and self.summarizer:
+            self.summarizer.submit(evicted)
+
+    def _demote_to_thumbnail(self, msg: Message) -> bool:
+        """把移出原图层的截图替换为缩略图，并记录它相对前一帧的画面变化"""
+        if self.keep_thumbnails <= 0:
+            return False
+        thumbnail = make_thumbnail(msg.image_bytes)
+        if thumbnail is None:
+            return False
+        image_data, signature = thumbnail
+        change = frame_change(self._last_signature, signature)
+        self._last_signature = signature
+        msg.set_image_bytes(image_data, "image/jpeg", "low")
+        msg.content = f"[缩略图] {msg.content or ''}"
+        self._thumbnails.append((change, msg))
+        return True
+
+    def _prune_thumbnails(self):
+        """
+        缩略图超出数量时，优先移除与前一帧几乎相同的（变化最小的），没有重复画面时移除最早的；
+        最新的缩略图紧接在原图之前，总是保留
+        """
+        self._thumbnails = [(change, msg) for change, msg in self._thumbnails if msg in self.history]
+        while len(self._thumbnails) > self.keep_thumbnails:
+            newest = len(self._thumbnails) - 1
+            index = min(range(newest), key=lambda i: self._thumbnails[i][0])
+            if self._thumbnails[index][0] >= THUMBNAIL_DUPLICATE_CHANGE:
+                index = 0
+            _, msg = self._thumbnails.pop(index)
+            self._total_tokens -= msg.estimate_tokens(self.model)
+            msg.set_image_bytes(None)
+            msg.content = f"[截图已移除] {(msg.content or '').replace('[缩略图] ', '', 1)}"
+            self._total_tokens += msg.estimate_tokens(self.model)
+
+    def _apply_summary(self):
+        """后台摘要完成后替换滚动摘要消息"""
+        if not self.summarizer:
+            return
+        summary = self.summarizer.poll()
+        if summary is not None:
+            self._summary_message = Message("user", f"[早期对话摘要]\n{summary}", pinned=True) if summary else None
 
     def _load_insights(self):
         if not os.path.exists(self.save_dir):
@@ -308,47 +735,29 @@ class MemoryManager:
                 os.makedirs(self.save_dir)
             except OSError:
                 pass
-        
-        if os.path.exists(self.insights_file):
-            try:
-                with open(self.insights_file, 'r', encoding='utf-8') as f:
-                    self.insights = json.load(f)
-            except Exception:
-                self.insights = {}
-
-    def _save_insights(self):
-        try:
-            if not os.path.exists(self.save_dir):
-                 os.makedirs(self.save_dir)
-            with open(self.insights_file, 'w', encoding='utf-8') as f:
-                json.dump(self.insights, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+        self.insights = self._insights_store.load()
+        for topic, knowledge in self.insights.items():
+            self.insight_index.add(topic, str(knowledge))
 
     def _load_function_stats(self):
         """加载function调用统计"""
-        if os.path.exists(self.function_stats_file):
-            try:
-                with open(self.function_stats_file, 'r', encoding='utf-8') as f:
-                    self.function_stats = json.load(f)
-            except Exception:
-                self.function_stats = {}
-        else:
-            self.function_stats = {}
-
-    def _save_function_stats(self):
-        """保存function调用统计"""
-        try:
-            if not os.path.exists(self.save_dir):
-                os.makedirs(self.save_dir)
-            with open(self.function_stats_file, 'w', encoding='utf-8') as f:
-                json.dump(self.function_stats, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+        self.function_stats = self._function_stats_store.load()
 
     def clear_short_term(self):
         """清空对话历史，但保留学到的 Insights 和 Function 统计"""
-        self.history = []
+        self.history.clear()
+        self._pending_images = []
+        self._total_tokens = 0
+        # 新任务开始时刷新工具统计快照
+        self._system_cache = None
+        self._stats_snapshot = None
+        self._task_query = None
+        self._summary_message = None
+        self._verbatim_turns.clear()
+        self._thumbnails = []
+        self._last_signature = None
+        if self.summarizer:
+            self.summarizer.reset()
 
     def get_function_stats(self) -> Dict[str, int]:
         """获取function调用统计"""
@@ -0,0 +1,307 @@
+"""
+长期记忆的写回(write-behind)持久化
+修改只在内存中标记为dirty，由后台线程定时或在任务结束时批量写入磁盘；
+写入时加文件锁、与磁盘上的最新内容合并后通过 临时文件+rename 原子替换，
+多个 agent 进程共享同一个 ./memory_storage 时不会互相覆盖或读到半个文件。
+也可以改用 SQLite 后端（WAL 模式），逐行 upsert，适合大量 agent 共享同一个经验库。
+"""
+
+import atexit
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+# 后台线程的写入间隔（秒），可通过环境变量 MEMORY_FLUSH_INTERVAL 配置
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+
+def get_flush_interval() -> float:
+    try:
+        return max(0.1, float(os.getenv("MEMORY_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)))
+    except ValueError:
+        return DEFAULT_FLUSH_INTERVAL
+
+
+@contextlib.contextmanager
+def file_lock(path: str):
+    """跨进程的排他文件锁（锁文件为 path + ".lock"）"""
+    with open(path + ".lock", "a+b") as f:
+        if os.name == "nt":
+            f.seek(0)
+            # LK_LOCK 最多重试10秒，超时抛出 OSError
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def read_json(path: str) -> Dict[str, Any]:
+    """读取 JSON 字典，文件不存在或损坏时返回空字典"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def write_json_atomic(path: str, data: Dict[str, Any]):
+    """写入临时文件后 rename 替换，读者只会看到旧文件或完整的新文件"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(5):
+            try:
+                os.replace(tmp_path, path)
+                return
+            except PermissionError:
+                # Windows 下目标文件正被其他进程读取时 rename 会失败，稍后重试
+                if attempt == 4:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+class WriteBehindStore:
+    """
+    写回缓存的基类
+
+    只记录本进程尚未写入的修改（覆盖的键或计数增量），flush 时交给 _write() 合并到
+    存储中，因此其他进程写入的键和计数不会丢失。子类需要实现 load() 和 _write()。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        self._increments: Dict[str, int] = {}
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._values or self._increments)
+
+    def load(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _write(self, values: Dict[str, Any], increments: Dict[str, int]):
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._values[key] = value
+            self._increments.pop(key, None)
+
+    def increment(self, key: str, amount: int = 1):
+        with self._lock:
+            self._increments[key] = self._increments.get(key, 0) + amount
+
+    def flush(self):
+        """把未写入的修改合并到存储中"""
+        with self._lock:
+            if not self.dirty:
+                return
+            values, self._values = self._values, {}
+            increments, self._increments = self._increments, {}
+        try:
+            self._write(values, increments)
+        except Exception as e:
+            logging.error("[MemoryManager]Error writing %s: %s", self, e)
+            # 写入失败时放回，下次重试
+            with self._lock:
+                for key, value in values.items():
+                    self._values.setdefault(key, value)
+                for key, amount in increments.items():
+                    if key not in self._values:
+                        self._increments[key] = self._increments.get(key, 0) + amount
+
+
+class JsonFileStore(WriteBehindStore):
+    """单个 JSON 文件：在文件锁内读取最新内容、合并后原子替换"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def __str__(self):
+        return self.path
+
+    def load(self) -> Dict[str, Any]:
+        return read_json(self.path)
+
+    def _write(self, values: Dict[str, Any], increments: Dict[str, int]):
+        with file_lock(self.path):
+            data = read_json(self.path)
+            data.update(values)
+            for key, amount in increments.items():
+                data[key] = data.get(key, 0) + amount
+            write_json_atomic(self.path, data)
+
+
+def encode_sqlite_value(value: Any) -> Any:
+    """标量原样保存；dict / list 等结构化的值编码为 JSON 的 BLOB（与普通字符串区分，读取时还原）"""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def decode_sqlite_value(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return json.loads(value.decode("utf-8"))
+    return value
+
+
+class SqliteStore(WriteBehindStore):
+    """
+    SQLite 表中属于某个 agent 的键值（WAL 模式，多个进程可以同时读写）
+
+    每个键一行，主键为 (agent, key)：flush 时逐行 upsert，计数在 SQL 中原子累加，
+    不需要重写整个存储。首次使用时自动导入同名的旧 JSON 文件。
+    结构化的值（dict / list）以 JSON 编码的 BLOB 保存，load() 时还原为原来的结构。
+    """
+
+    def __init__(self, db_path: str, table: str, agent_name: str, value_type: str = "TEXT",
+                 legacy_json: Optional[str] = None):
+        super().__init__()
+        self.db_path = db_path
+        self.table = table
+        self.agent_name = agent_name
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # 后台线程也会写入，连接的使用由 _db_lock 串行化
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._db_lock, self._transaction():
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                f"agent TEXT NOT NULL, key TEXT NOT NULL, value {value_type}, "
+                f"PRIMARY KEY (agent, key)) WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS migrations ("
+                "agent TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (agent, name)) WITHOUT ROWID"
+            )
+            if legacy_json:
+                self._migrate(legacy_json)
+
+    def __str__(self):
+        return f"{self.db_path}:{self.table}"
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE 立即获取写锁，避免并发进程在事务中途因锁升级失败
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _migrate(self, legacy_json: str):
+        """导入旧 JSON 文件（每个 agent/表只导入一次，已有的行不会被覆盖）"""
+        done = self._conn.execute(
+            "SELECT 1 FROM migrations WHERE agent = ? AND name = ?", (self.agent_name, self.table)
+        ).fetchone()
+        if done:
+            return
+        rows = [
+            (self.agent_name, key, encode_sqlite_value(value))
+            for key, value in read_json(legacy_json).items()
+        ]
+        self._conn.executemany(
+            f"INSERT OR IGNORE INTO {self.table} (agent, key, value) VALUES (?, ?, ?)", rows
+        )
+        self._conn.execute("INSERT INTO migrations (agent, name) VALUES (?, ?)", (self.agent_name, self.table))
+        if rows:
+            logging.info("[MemoryManager]Migrated %d rows from %s into %s", len(rows), legacy_json, self)
+
+    def load(self) -> Dict[str, Any]:
+        with self._db_lock:
+            rows = self._conn.execute(
+                f"SELECT key, value FROM {self.table} WHERE agent = ?", (self.agent_name,)
+            ).fetchall()
+        return {key: decode_sqlite_value(value) for key, value in rows}
+
+    def _write(self, values: Dict[str, Any], increments: Dict[str, int]):
+        with self._db_lock, self._transaction():
+            self._conn.executemany(
+                f"INSERT INTO {self.table} (agent, key, value) VALUES (?, ?, ?) "
+                f"ON CONFLICT (agent, key) DO UPDATE SET value = excluded.value",
+                [(self.agent_name, key, encode_sqlite_value(value)) for key, value in values.items()]
+            )
+            self._conn.executemany(
+                f"INSERT INTO {self.table} (agent, key, value) VALUES (?, ?, ?) "
+                f"ON CONFLICT (agent, key) DO UPDATE SET value = value + excluded.value",
+                [(self.agent_name, key, amount) for key, amount in increments.items()]
+            )
+
+
+class WriteBehindFlusher:
+    """后台写回线程：定时 flush 所有注册的 dirty store，进程退出时再 flush 一次"""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or get_flush_interval()
+        self._stores = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, store: WriteBehindStore):
+        with self._lock:
+            self._stores.add(store)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def flush_all(self):
+        with self._lock:
+            stores = list(self._stores)
+        for store in stores:
+            store.flush()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush_all()
+
+
+# 全局写回线程（懒加载）
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def get_flusher() -> WriteBehindFlusher:
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = WriteBehindFlusher()
+            atexit.register(_flusher.flush_all)
+        return _flusher
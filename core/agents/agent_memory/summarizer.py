@@ -0,0 +1,160 @@
+"""
+被淘汰历史的后台摘要（压缩模式）
+Token 淘汰移出的消息交给后台线程，用较便宜的 CodeAgent 模型与已有摘要合并为一条滚动摘要；
+主循环不等待摘要完成，新摘要在下一次 add / get_context 时替换旧摘要。
+摘要有独立的 token 预算和超时，预算用完后退化为直接丢弃（与未开启压缩时相同）。
+"""
+
+import logging
+import os
+import threading
+from typing import List, Optional
+
+try:
+    from litellm import completion
+except ImportError:
+    completion = None
+
+
+SUMMARY_PROMPT = (
+    "你负责压缩智能体的早期对话历史。根据已有摘要和刚被移出上下文的对话，输出更新后的摘要："
+    "保留任务目标、计划、已完成的步骤及其结果、关键数据（文件路径、变量名、坐标、账号等）"
+    "和尚未解决的问题，删除重复和无关的细节。只输出摘要本身，不超过{max_tokens}个token。"
+)
+
+
+def render_messages(messages) -> str:
+    """把被淘汰的消息渲染为摘要模型的输入文本（截图只保留文字说明，长内容截断）"""
+    lines = []
+    for msg in messages:
+        content = msg.content or ""
+        if msg.tool_calls:
+            calls = ", ".join(
+                f"{call.get('function', {}).get('name', 'unknown')}({str(call.get('function', {}).get('arguments', ''))[:300]})"
+                for call in msg.tool_calls
+            )
+            lines.append(f"assistant 调用工具: {calls} {content[:500]}".rstrip())
+        elif msg.role == "tool":
+            lines.append(f"tool 结果: {content[:800]}")
+        elif msg.has_image:
+            lines.append(f"{msg.role}: [截图] {content[:500]}")
+        else:
+            lines.append(f"{msg.role}: {content[:1500]}")
+    return "\n".join(lines)
+
+
+class HistorySummarizer:
+    """
+    滚动摘要的后台工作线程
+
+    - submit(): 提交被淘汰的消息，立即返回；摘要进行中提交的内容合并到下一次摘要
+    - poll(): 若有新摘要则返回，否则返回 None
+    - reset(): 新任务开始时清空摘要，丢弃进行中的结果
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        api_base: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_summary_tokens: int = 500,
+        timeout: float = 20,
+        token_budget: int = 20000,
+        max_input_chars: int = 8000
+    ):
+        if model is None:
+            model = f"volcengine/{os.getenv('CodeAgent_MODEL')}"
+        self.model = model
+        self.api_base = api_base if api_base is not None else os.getenv("CodeAgent_API_BASE")
+        self.api_key = api_key if api_key is not None else os.getenv("CodeAgent_API_KEY")
+        self.max_summary_tokens = max_summary_tokens
+        # 单次摘要的延迟上限（秒）
+        self.timeout = timeout
+        # 每个任务摘要可消耗的 token 总量
+        self.token_budget = token_budget
+        self.max_input_chars = max_input_chars
+
+        self.summary = ""
+        self.used_tokens = 0
+        self._version = 0
+        self._polled_version = 0
+        self._generation = 0
+        self._pending: List[str] = []
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, messages):
+        if not messages or completion is None:
+            return
+        with self._condition:
+            if self.used_tokens >= self.token_budget:
+                return
+            self._pending.append(render_messages(messages))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def poll(self) -> Optional[str]:
+        with self._condition:
+            if self._version == self._polled_version:
+                return None
+            self._polled_version = self._version
+            return self.summary
+
+    def reset(self):
+        with self._condition:
+            self._generation += 1
+            self._pending = []
+            self.summary = ""
+            self.used_tokens = 0
+            self._version = self._polled_version = 0
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                span = "\n".join(self._pending)
+                self._pending = []
+                previous = self.summary
+                generation = self._generation
+
+            if len(span) > self.max_input_chars:
+                half = self.max_input_chars // 2
+                span = f"{span[:half]}\n...[省略]...\n{span[-half:]}"
+            summary, tokens = self._summarize(previous, span)
+
+            with self._condition:
+                if generation != self._generation:
+                    continue
+                self.used_tokens += tokens
+                if self.used_tokens >= self.token_budget:
+                    logging.warning("[MemoryManager]History summary token budget exhausted (%d tokens)", self.used_tokens)
+                if summary:
+                    self.summary = summary
+                    self._version += 1
+
+    def _summarize(self, previous: str, span: str):
+        """调用摘要模型，返回 (摘要, 消耗的token数)；失败时返回 (None, 0)"""
+        user_content = f"[已有摘要]\n{previous or '无'}\n\n[刚被移出上下文的对话]\n{span}"
+        try:
+            response = completion(
+                model=self.model,
+                api_base=self.api_base,
+                api_key=self.api_key,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT.format(max_tokens=self.max_summary_tokens)},
+                    {"role": "user", "content": user_content}
+                ],
+                max_tokens=self.max_summary_tokens,
+                timeout=self.timeout,
+                stream=False
+            )
+            summary = (response.choices[0].message.content or "").strip()
+            usage = getattr(response, "usage", None)
+            tokens = getattr(usage, "total_tokens", None) or (len(user_content) + len(summary)) // 4
+            return summary, tokens
+        except Exception as e:
+            logging.error("[MemoryManager]Error summarizing evicted history: %s", e)
+            return None, 0
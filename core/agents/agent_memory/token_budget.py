@@ -0,0 +1,241 @@
+"""
+Token 预算
+- 图片 token 按实际编码尺寸和模型家族的切片规则计算（而不是每张图固定的 token 数）
+- 上下文预算取自 litellm 的模型元数据，可用环境变量 <Agent>_CONTEXT_WINDOW 覆盖
+- 截图的输出尺寸和 detail 按每张图片的 token 预算选择（fit_image_size / choose_image_detail）
+- 模型是否接受图片输入取自 litellm 的模型元数据，可用环境变量 <Agent>_VISION 覆盖
+"""
+
+import io
+import logging
+import math
+import os
+from typing import Optional, Tuple
+
+try:
+    import litellm
+except ImportError:
+    litellm = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# 模型元数据不可用时的上下文预算（与之前写死的值相同）
+DEFAULT_CONTEXT_BUDGET = 8000
+# 为模型回复预留的 token 数（最多占上下文窗口的 1/4）
+RESPONSE_RESERVE_TOKENS = 4096
+
+# 按 28x28 像素切片计费的模型：(最少 token, 普通/高清最多 token, detail=low 最多 token)
+PATCH_LIMITS = {
+    "doubao": (4, 5120, 1280),
+    "qwen": (4, 16384, 16384),
+}
+
+
+def get_image_size(image_data: bytes) -> Optional[Tuple[int, int]]:
+    """读取图片尺寸（只解析文件头），Pillow 不可用或无法识别时返回 None"""
+    if Image is None or not image_data:
+        return None
+    try:
+        with Image.open(io.BytesIO(image_data)) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+def get_model_family(model: Optional[str]) -> str:
+    """按模型名判断图片计费规则所属的家族，未知模型按 OpenAI 规则计算"""
+    name = (model or "").lower()
+    if "claude" in name:
+        return "anthropic"
+    if "gemini" in name:
+        return "gemini"
+    if "doubao" in name or "ui-tars" in name or "seed" in name or name.startswith("volcengine/"):
+        return "doubao"
+    if "qwen" in name:
+        return "qwen"
+    return "openai"
+
+
+def _openai_tokens(width: int, height: int, detail: Optional[str]) -> int:
+    # 缩放到 2048x2048 以内，再把短边缩到 768，按 512x512 切片
+    if detail == "low":
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def _anthropic_tokens(width: int, height: int) -> int:
+    # 长边超过 1568 或面积超过约 1.15MP 时缩小，之后按 宽*高/750 计
+    scale = min(1.0, 1568 / max(width, height), math.sqrt(1_150_000 / (width * height)))
+    return math.ceil(width * scale * height * scale / 750)
+
+
+def _gemini_tokens(width: int, height: int) -> int:
+    # 两边都不超过 384 时按一张计，否则按 768x768 切片，每片 258
+    if width <= 384 and height <= 384:
+        return 258
+    return 258 * math.ceil(width / 768) * math.ceil(height / 768)
+
+
+def _patch_tokens(width: int, height: int, family: str, detail: Optional[str]) -> int:
+    # 按 28x28 像素计一个 token，超出上限时等比缩小
+    min_tokens, max_tokens, low_max_tokens = PATCH_LIMITS[family]
+    limit = low_max_tokens if detail == "low" else max_tokens
+    tokens = max(1, round(width / 28)) * max(1, round(height / 28))
+    if tokens > limit:
+        scale = math.sqrt(limit * 28 * 28 / (width * height))
+        tokens = max(1, math.floor(width * scale / 28)) * max(1, math.floor(height * scale / 28))
+    return max(min_tokens, tokens)
+
+
+def estimate_image_tokens(size: Tuple[int, int], model: Optional[str], detail: Optional[str] = None) -> int:
+    """按图片尺寸和模型家族的切片规则估算一张图片的 token 数"""
+    width, height = size
+    family = get_model_family(model)
+    if family == "anthropic":
+        return _anthropic_tokens(width, height)
+    if family == "gemini":
+        return _gemini_tokens(width, height)
+    if family in PATCH_LIMITS:
+        return _patch_tokens(width, height, family, detail)
+    return _openai_tokens(width, height, detail)
+
+
+def get_context_window(model: Optional[str], env_prefix: Optional[str] = None) -> Optional[int]:
+    """
+    模型的输入上下文窗口
+
+    优先使用环境变量 <env_prefix>_CONTEXT_WINDOW，其次是 litellm 的模型元数据
+    （先按完整模型名查找，找不到时去掉 provider 前缀再查找）；都没有时返回 None
+    """
+    if env_prefix:
+        value = os.getenv(f"{env_prefix}_CONTEXT_WINDOW")
+        if value:
+            try:
+                return int(value)
+            except ValueError:
+                logging.warning("[MemoryManager]Invalid %s_CONTEXT_WINDOW: %s", env_prefix, value)
+    if litellm is None or not model:
+        return None
+    candidates = [model]
+    if "/" in model:
+        candidates.append(model.split("/", 1)[1])
+    for candidate in candidates:
+        try:
+            info = litellm.get_model_info(candidate)
+        except Exception:
+            continue
+        window = info.get("max_input_tokens") or info.get("max_tokens")
+        if window:
+            return int(window)
+    return None
+
+
+def supports_vision(model: Optional[str], env_prefix: Optional[str] = None) -> bool:
+    """
+    模型是否接受图片输入
+
+    优先使用环境变量 <env_prefix>_VISION（1/0），其次是 litellm 的模型元数据
+    （先按完整模型名查找，找不到时去掉 provider 前缀再查找）；都没有时视为不支持
+    """
+    if env_prefix:
+        value = os.getenv(f"{env_prefix}_VISION")
+        if value:
+            return value.lower() in ("1", "true", "yes")
+    if litellm is None or not model:
+        return False
+    candidates = [model]
+    if "/" in model:
+        candidates.append(model.split("/", 1)[1])
+    for candidate in candidates:
+        try:
+            if litellm.supports_vision(model=candidate):
+                return True
+        except Exception:
+            continue
+    return False
+
+
+def get_context_budget(
+    model: Optional[str],
+    env_prefix: Optional[str] = None,
+    default: int = DEFAULT_CONTEXT_BUDGET
+) -> int:
+    """记忆可使用的 token 预算：上下文窗口减去为回复预留的部分，窗口未知时返回 default"""
+    window = get_context_window(model, env_prefix)
+    if window is None:
+        logging.info("[MemoryManager]Context window of %s unknown, using %d tokens", model, default)
+        return default
+    budget = window - min(RESPONSE_RESERVE_TOKENS, window // 4)
+    logging.info("[MemoryManager]Context window of %s: %d tokens, memory budget %d", model, window, budget)
+    return budget
+
+
+# 截图默认的图片 token 预算（约等于 1080p 截图缩放 0.8 后在 UI-TARS 上的开销）
+DEFAULT_IMAGE_TOKEN_BUDGET = 1700
+# 支持 detail 参数的模型家族，以及 detail=low 时的 token 上限
+LOW_DETAIL_LIMITS = {"openai": 85, "doubao": PATCH_LIMITS["doubao"][2]}
+# 缩放后的最短边长下限（像素）
+MIN_IMAGE_SIDE = 256
+
+
+def choose_image_detail(model: Optional[str], token_budget: int) -> Optional[str]:
+    """按预算选择 detail：预算不超过低清上限时用 "low"，不支持 detail 的模型返回 None"""
+    limit = LOW_DETAIL_LIMITS.get(get_model_family(model))
+    if limit is None:
+        return None
+    return "low" if token_budget <= limit else "high"
+
+
+def _provider_scale(width: int, height: int, family: str, detail: Optional[str]) -> float:
+    """服务端会把图片缩小到的比例（发送更大的图片只会浪费带宽和编码时间）"""
+    if family == "openai":
+        if detail == "low":
+            return min(1.0, 512 / max(width, height))
+        scale = min(1.0, 2048 / max(width, height))
+        return scale * min(1.0, 768 / (min(width, height) * scale))
+    if family == "anthropic":
+        return min(1.0, 1568 / max(width, height), math.sqrt(1_150_000 / (width * height)))
+    if family in PATCH_LIMITS:
+        _, max_tokens, low_max_tokens = PATCH_LIMITS[family]
+        limit = low_max_tokens if detail == "low" else max_tokens
+        return min(1.0, math.sqrt(limit * 28 * 28 / (width * height)))
+    return 1.0
+
+
+def fit_image_size(
+    size: Tuple[int, int],
+    model: Optional[str],
+    token_budget: int = DEFAULT_IMAGE_TOKEN_BUDGET,
+    detail: Optional[str] = None
+) -> Tuple[int, int]:
+    """
+    在图片 token 预算内选择最大的输出尺寸（保持宽高比，不放大，不超过服务端会缩小到的尺寸）
+
+    Returns:
+        (宽, 高)
+    """
+    width, height = size
+    family = get_model_family(model)
+    high = _provider_scale(width, height, family, detail)
+    low = min(high, MIN_IMAGE_SIDE / min(width, height))
+
+    def scaled(scale: float) -> Tuple[int, int]:
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    if estimate_image_tokens(scaled(high), model, detail) <= token_budget:
+        return scaled(high)
+    # token 数随尺寸单调不减，二分查找预算内最大的比例
+    for _ in range(20):
+        middle = (low + high) / 2
+        if estimate_image_tokens(scaled(middle), model, detail) <= token_budget:
+            low = middle
+        else:
+            high = middle
+    return scaled(low)
@@ -1,6 +1,5 @@
 import logging
 import os
-import json
 import queue
 import threading
 from queue import Queue
@@ -10,7 +9,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from core.tools import initialize_all_tools, get_global_registry
-from core.agents.agent_memory.memory import MemoryManager
+from core.tools.tool_output import bound_text, get_output_budget
+from core.agents.agent_memory.token_budget import get_context_budget, supports_vision
+from core.agents.agent_memory.memory import MemoryManager, encode_function_result, split_function_result_images
 from .default_prompt import default_prompt, default_prompt_end
 
 
@@ -34,11 +35,13 @@ class CodeAgent:
         # Initialize memory manager
         self.memory = MemoryManager(
             agent_name="CodeAgent",
-            max_tokens=8000,
-            keep_last_screenshots=0,
+            max_tokens=get_context_budget(f"volcengine/{self.model}", "CodeAgent"),  # 可用 CodeAgent_CONTEXT_WINDOW 覆盖
+            keep_last_screenshots=1,  # 只保留最近一张工具返回的截图
             keep_function_calls=10,  # 保留更多function call历史
             save_dir="./memory_storage/code_agent",
-            model=self.model
+            model=f"volcengine/{self.model}",
+            # 默认的 DeepSeek 模型只接受文本，截图等图片只保留占位文本；可用 CodeAgent_VISION=1 覆盖
+            vision=supports_vision(f"volcengine/{self.model}", "CodeAgent")
         )
         
         # Set system prompt in memory
@@ -98,9 +101,20 @@ class CodeAgent:
                             "content": f"[错误] {error}"
                         })
             
-            # 记录工具调用结果到memory
-            result_text = json.dumps(result, ensure_ascii=False)
-            self.memory.add_function_result(tool_call_id, function_name, result_text)
+            # 记录工具调用结果到memory（紧凑编码，完整结果已发送给客户端）
+            # 截图等图片拆出后作为图片消息发送（模型不支持图片输入时丢弃），不以base64文本计入token
+            text_result, images = split_function_result_images(result, attach=self.memory.vision)
+            result_text = encode_function_result(text_result)
+            # 兜底：execute_code的输出已限长，其他工具的超长结果同样只保留开头和结尾
+            budget = get_output_budget()
+            if len(result_text) > 2 * budget:
+                result_text, _ = bound_text(result_text, self.code_executer.artifacts, budget, prefix=function_name)
+            self.memory.add_function_result(
+                tool_call_id,
+                function_name,
+                result_text,
+                images=[image for _, image in images]
+            )
             
             # 发送工具执行状态到客户端
             message_to_client.put({
@@ -119,6 +133,9 @@ class CodeAgent:
     def task(self, description: str, message_from_client: Queue, message_to_client: Queue):
         self.stop_agent = False
         
+        # 只注入与任务相关的长期记忆
+        self.memory.set_task(description)
+        
         # Add user task to memory
         self.memory.add("user", description)
         
@@ -210,6 +227,9 @@ class CodeAgent:
             logging.warning(f"[CodeAgent] 达到最大迭代次数 {max_iterations}")
             message_to_client.put({"name": "CodeAgent", "type": "text", "content": f"达到最大迭代次数 {max_iterations}"})
         
+        # 任务结束时把长期记忆写入磁盘
+        self.memory.flush()
+        
         logging.info("[CodeAgent][STOP]: 任务完成")
         message_to_client.put({"name": "CodeAgent", "type": "status", "content": "[STOP]"})
         
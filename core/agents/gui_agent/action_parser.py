@@ -51,6 +51,21 @@ def parse_action(action_str: str) -> Tuple[str, Dict[str, Any]]:
         
     return function_name, args
 
+def compact_turn(response: str) -> Optional[str]:
+    """
+    Compact an old assistant turn to its parsed action (plus Action_Summary if present),
+    dropping Reflection/Thought prose. Returns None if no action can be parsed.
+    """
+    action_text = parse_response(response)
+    action_name, _ = parse_action(action_text)
+    if not action_name:
+        return None
+    compacted = f"Action: {action_text.splitlines()[0].strip()}"
+    summary = re.search(r"Action_Summary:\s*(.+)", response)
+    if summary:
+        compacted += f"\nAction_Summary: {summary.group(1).strip()}"
+    return compacted
+
 def extract_point(point_str: str) -> Optional[Tuple[int, int]]:
     """
     Extract x, y from <point>x y</point>
@@ -60,13 +75,43 @@ def extract_point(point_str: str) -> Optional[Tuple[int, int]]:
         return int(match.group(1)), int(match.group(2))
     return None
 
-def get_action_coordinates(action_name: str, args: Dict[str, Any], screen_width: int, screen_height: int) -> Optional[Dict[str, int]]:
+# Phrases in the model response meaning it cannot make out the target element
+NOT_FOUND_PATTERN = re.compile(
+    r"can(?:no|')t (?:find|locate|see)|unable to (?:find|locate|see)|not (?:visible|clear)|too small|"
+    r"找不到|没有找到|未找到|无法找到|看不清|无法看清|无法识别|太小",
+    re.IGNORECASE,
+)
+
+def reports_not_found(response: str) -> bool:
+    """
+    Whether the model says it cannot find / make out an element (Reflection or Thought),
+    in which case the next screenshot should be sent at a higher resolution.
+    """
+    action_text = parse_response(response)
+    reasoning = response[:len(response) - len(action_text)] if action_text else response
+    return bool(NOT_FOUND_PATTERN.search(reasoning))
+
+def to_screen_point(x_rel: int, y_rel: int, screen_width: int, screen_height: int, offset_x: int = 0, offset_y: int = 0) -> Tuple[int, int]:
+    """
+    Convert relative coordinates (0-1000, relative to the screenshot) to absolute screen pixels.
+    The screenshot always covers the whole captured area, so the mapping only depends on the
+    capture size, not on the resolution the screenshot was encoded at.
+    """
+    x = min(int(x_rel / 1000 * screen_width), screen_width - 1)
+    y = min(int(y_rel / 1000 * screen_height), screen_height - 1)
+    return x + offset_x, y + offset_y
+
+def get_action_coordinates(action_name: str, args: Dict[str, Any], screen_width: int, screen_height: int, frame=None) -> Optional[Dict[str, int]]:
     """
     Get the absolute coordinates for the action.
     Returns dict with keys 'x', 'y' (and 'xx', 'yy' for drag) or None.
+    frame: layout of a composed screenshot (e.g. FoveatedFrame) that maps screenshot
+    coordinates to the capture via frame.to_screen(); None when the screenshot is the whole capture.
     """
     def to_abs(x_rel, y_rel):
-        return int(x_rel / 1000 * screen_width), int(y_rel / 1000 * screen_height)
+        if frame is not None:
+            return frame.to_screen(x_rel, y_rel)
+        return to_screen_point(x_rel, y_rel, screen_width, screen_height)
 
     if action_name in ["click", "left_double", "right_single", "scroll"]:
         if 'point' in args:
@@ -90,17 +135,21 @@ def get_action_coordinates(action_name: str, args: Dict[str, Any], screen_width:
                 return result
     return None
 
-def map_action_to_function(action_name: str, args: Dict[str, Any], screen_width: int, screen_height: int, offset_x: int = 0, offset_y: int = 0) -> None:
+def map_action_to_function(action_name: str, args: Dict[str, Any], screen_width: int, screen_height: int, offset_x: int = 0, offset_y: int = 0, settle=None, drag_duration: float = 1.0, frame=None):
     """
     Map the parsed action to the actual mouse/keyboard function calls.
+    frame: see get_action_coordinates.
+    With a SettleDetector, waits until the screen settles and returns its SettleResult;
+    otherwise sleeps a fixed delay (5s for wait(), 0.5s for other actions) and returns None.
     """
     logging.info(f"Executing action: {action_name} with args: {args}")
     
     # Helper to convert relative coordinates (0-1000) to absolute
     def to_abs(x_rel, y_rel):
-        # return int(x_rel / 1000), int(y_rel / 1000)
-        # print (f"origin width: {screen_width}, height: {screen_height}")
-        return int(x_rel / 1000 * screen_width) + offset_x, int(y_rel / 1000 * screen_height) + offset_y
+        if frame is not None:
+            x, y = frame.to_screen(x_rel, y_rel)
+            return x + offset_x, y + offset_y
+        return to_screen_point(x_rel, y_rel, screen_width, screen_height, offset_x, offset_y)
 
     if action_name == "click":
         if 'point' in args:
@@ -136,7 +185,7 @@ def map_action_to_function(action_name: str, args: Dict[str, Any], screen_width:
                 print(f"Dragging from: {start_x}, {start_y} to {end_x}, {end_y}")
                 # Move to start, then drag to end
                 mouse.move(start_x, start_y)
-                mouse.drag(end_x, end_y)
+                mouse.drag(end_x, end_y, duration=drag_duration)
                 
     elif action_name == "hotkey":
         if 'key' in args:
@@ -169,7 +218,8 @@ def map_action_to_function(action_name: str, args: Dict[str, Any], screen_width:
                     mouse.scroll(clicks)
                 
     elif action_name == "wait":
-        time.sleep(5)
+        # Handled by the settle wait below
+        pass
         
     elif action_name == "finished":
         logging.info(f"Task finished: {args.get('content', '')}")
@@ -178,4 +228,7 @@ def map_action_to_function(action_name: str, args: Dict[str, Any], screen_width:
     else:
         logging.warning(f"Unknown action: {action_name}")
 
-    time.sleep(0.5)
+    if settle is not None:
+        return settle.wait(action_name)
+    time.sleep(5 if action_name == "wait" else 0.5)
+    return None
@@ -30,9 +30,23 @@ load_dotenv()
 
 from core.tools import initialize_all_tools
 from core.tools.screen.screen import screen
+from core.tools.screen.encoder import ScreenshotEncoder
+from core.agents.agent_memory.token_budget import (
+    DEFAULT_IMAGE_TOKEN_BUDGET,
+    choose_image_detail,
+    fit_image_size,
+    get_context_budget,
+)
 from core.agents.agent_memory.memory import MemoryManager
 from .default_prompt import get_default_prompt
-from .action_parser import parse_response, parse_action, map_action_to_function, get_action_coordinates
+from .action_parser import parse_response, parse_action, map_action_to_function, get_action_coordinates, compact_turn, reports_not_found
+from .screen_change import ScreenChangeDetector, UNCHANGED_NOTE
+from .stagnation import StagnationDetector
+from .settle import SettleDetector
+from .foveation import CAPTURE_MODES, FOVEATED_NOTE, choose_focus, plan_foveated_frame
+
+# 模型表示找不到/看不清元素时，下一张截图的图片 token 预算倍数
+HIGH_RES_BUDGET_FACTOR = 3
 
 class GUIAgent:
     def __init__(self):
@@ -48,15 +62,41 @@ class GUIAgent:
         # Initialize memory manager
         self.memory = MemoryManager(
             agent_name="GUIAgent",
-            max_tokens=8000,
+            max_tokens=get_context_budget(f"volcengine/{self.model}", "GUIAgent"),  # 可用 GUIAgent_CONTEXT_WINDOW 覆盖
             keep_last_screenshots=2,
+            keep_thumbnails=4,  # 更早的截图保留为缩略图
             keep_function_calls=5,
             save_dir="./memory_storage/gui_agent",
-            model=self.model
+            model=f"volcengine/{self.model}",
+            turn_compactor=compact_turn,  # 较早的回复只保留 Action (+ Action_Summary)
+            keep_verbatim_turns=3
         )
         
         # Set system prompt in memory
         self.memory.set_system_prompt(self.default_prompt)
+        
+        # 画面没有变化时不重复发送截图（策略见 screen_change.py）
+        self.screen_monitor = ScreenChangeDetector()
+        # 截图编码（格式/缩放算法见 encoder.py，可由 SCREENSHOT_* 环境变量配置）
+        self.encoder = ScreenshotEncoder()
+        # 每张截图的图片 token 预算，决定发送的分辨率和 detail（GUIAgent_IMAGE_DETAIL 可强制指定 detail）
+        self.image_token_budget = int(os.getenv("GUIAgent_IMAGE_TOKENS", DEFAULT_IMAGE_TOKEN_BUDGET))
+        self.image_detail = os.getenv("GUIAgent_IMAGE_DETAIL") or None
+        # 模型找不到元素时，下一张截图临时提高分辨率
+        self.high_res_next = False
+        # 截图方式: full(整屏) / foveated(缩小的整屏 + 注视区域原分辨率裁剪图，见 foveation.py)
+        self.capture_mode = os.getenv("GUIAgent_CAPTURE_MODE", "full")
+        if self.capture_mode not in CAPTURE_MODES:
+            raise ValueError(f"不支持的截图方式: {self.capture_mode}")
+        # 只截取某个窗口: foreground(前台窗口) 或窗口标题，未设置时截取整屏；找不到窗口时回退到整屏
+        self.capture_window = os.getenv("GUIAgent_CAPTURE_WINDOW") or None
+        # 模型当前看到的截图的布局（整屏截图时为 None）和上一次动作的截屏坐标
+        self.frame = None
+        self.last_action_point = None
+        # 原地打转（循环/长时间没有新画面）时提前结束，交给 SmartRouter 处理
+        self.stagnation = StagnationDetector()
+        # 动作执行后等待画面稳定再截屏（替代固定 sleep）
+        self.settle = SettleDetector()
 
     def _listener(self, message_from_client: Queue):
         """监听来自客户端的信息"""
@@ -75,7 +115,84 @@ class GUIAgent:
                     self.stop_agent = True
                     logging.info("[GUIAgent]用户停止agent")
 
+    def _image_format(self, size, high_res: bool = False):
+        """按图片 token 预算选择截图的输出尺寸和 detail，返回 (尺寸, detail)"""
+        model = f"volcengine/{self.model}"
+        budget = self.image_token_budget * (HIGH_RES_BUDGET_FACTOR if high_res else 1)
+        detail = self.image_detail or choose_image_detail(model, budget)
+        return fit_image_size(size, model, budget, detail), detail
+
+    def _plan_frame(self, size, high_res: bool = False):
+        """注视点截图的布局：拼接图（宽为截屏的两倍）与普通截图使用相同的图片 token 预算"""
+        composite_size, _ = self._image_format((size[0] * 2, size[1]), high_res)
+        focus = choose_focus(
+            self.screen_monitor.changed_box,
+            self.last_action_point,
+            (composite_size[0] // 2, composite_size[1])
+        )
+        return plan_foveated_frame(size, composite_size, focus)
+
+    def _grab(self):
+        """按截图范围截屏，返回 (image, left, top)，left/top 为截图在屏幕中的偏移"""
+        if self.capture_window is None:
+            return screen.grab()
+        return screen.grab_window(None if self.capture_window == "foreground" else self.capture_window)
+
+    def _observe_screen(self):
+        """
+        截屏并与上一次发送给模型的截图比较
+        wait 策略下画面无变化时在这里退避等待并重新截屏（不计入迭代次数）；
+        请求了高分辨率截图时即使画面无变化也发送
+
+        Returns:
+            (下一步, 截图, 原始宽, 原始高, 左偏移, 上偏移)，下一步为 "send"、"reprompt" 或 "abort"
+        """
+        high_res, self.high_res_next = self.high_res_next, False
+        while True:
+            image, offset_left, offset_top = self._grab()
+            origin_width, origin_height = image.size
+            size, detail = self._image_format(image.size, high_res)
+            # 小窗口等已经按原尺寸发送的情况，高分辨率截图与普通截图相同，不需要强制发送
+            force = high_res and size != self._image_format(image.size)[0]
+            frame = None
+            if self.capture_mode == "foveated":
+                # 裁剪区域取决于画面变化区域，先做变化检测再拼接
+                changed = self.screen_monitor.is_changed(image, force=force)
+                if changed:
+                    frame = self._plan_frame(image.size, high_res)
+                    if frame is not None:
+                        image, size = frame.compose(image, self.encoder.resample), frame.size
+                    pending = self.encoder.submit(image, size=size)
+            else:
+                # 后台缩放编码的同时在原始截屏上做画面变化检测
+                pending = self.encoder.submit(image, size=size)
+                changed = self.screen_monitor.is_changed(image, force=force)
+            if changed:
+                step = "send"
+            else:
+                step = self.screen_monitor.next_step()
+            # 画面无变化时不等待编码结果
+            screenshot_dict = pending.result() if step == "send" else None
+            if screenshot_dict is not None:
+                screenshot_dict["detail"] = detail
+                self.frame = frame
+                if force:
+                    logging.info("[GUIAgent] Sending high resolution screenshot %dx%d", *size)
+            if step == "wait" and not self.stop_agent:
+                delay = self.screen_monitor.backoff_delay()
+                logging.info("[GUIAgent] Screen unchanged, waiting %.1fs", delay)
+                time.sleep(delay)
+                continue
+            return step, screenshot_dict, origin_width, origin_height, offset_left, offset_top
+
     def task(self, description: str, message_from_client: Queue, message_to_client: Queue):
+        try:
+            return self._run_task(description, message_from_client, message_to_client)
+        finally:
+            # 任务结束时把长期记忆写入磁盘
+            self.memory.flush()
+
+    def _run_task(self, description: str, message_from_client: Queue, message_to_client: Queue):
         logging.info("[GUIAgent]任务: %s", description)
         
         # 1. 初始化记忆模块
@@ -83,6 +200,12 @@ class GUIAgent:
         self.memory.clear_short_term()
         # 更新 System Prompt 包含当前任务描述
         self.memory.set_system_prompt(self.default_prompt.format(instruction=description))
+        # 只注入与任务相关的长期记忆
+        self.memory.set_task(description)
+        self.screen_monitor.reset()
+        self.stagnation.reset()
+        self.frame = None
+        self.last_action_point = None
         
         self.stop_agent = False
         listener_thread = threading.Thread(target=self._listener, args=(message_from_client,))
@@ -101,22 +224,34 @@ class GUIAgent:
             
             # 2. 截屏
             try:
-                screenshot_dict, origin_width, origin_height, offset_left, offset_top = screen.screenshot_base64(
-                    resize_factor=0.8
-                )
+                step, screenshot_dict, origin_width, origin_height, offset_left, offset_top = self._observe_screen()
             except Exception as e:
                 logging.error(f"截屏失败: {e}")
                 return f"任务失败: 截屏错误"
             
-            message_to_client.put({"name": "GUIAgent", **screenshot_dict})
+            if self.stop_agent:
+                break
+            if step == "abort":
+                logging.info("[GUIAgent][STOP]: Screen unchanged for %d screenshots", self.screen_monitor.unchanged_streak)
+                message_to_client.put({"name": "GUIAgent", "type": "status", "content": "[STOP]"})
+                return "Task failed: Screen unchanged"
             
-            # 3. 将截图添加到记忆 (MemoryManager会自动处理图片修剪，只保留最近N张)
-            # 注意: 我们添加一个简单的文本content描述，这对VLM有时有帮助
-            self.memory.add(
-                role="user",
-                content="(Current Screen State)", 
-                image_base64=screenshot_dict['content']
-            )
+            if step == "send":
+                detail = screenshot_dict.pop("detail")
+                message_to_client.put({"name": "GUIAgent", **screenshot_dict})
+                
+                # 3. 将截图添加到记忆 (MemoryManager会自动处理图片修剪，只保留最近N张)
+                # 注意: 我们添加一个简单的文本content描述，这对VLM有时有帮助
+                self.memory.add(
+                    role="user",
+                    content="(Current Screen State)" + (f" {FOVEATED_NOTE}" if self.frame else ""),
+                    image_base64=screenshot_dict['content'],
+                    image_mime=screenshot_dict['type'],
+                    image_detail=detail
+                )
+            else:
+                # 画面与上一张截图相同：只发送文字提示，模型仍能看到记忆中的上一张截图
+                self.memory.add(role="user", content=UNCHANGED_NOTE)
             
             # 4. 从记忆获取完整上下文
             messages = self.memory.get_context()
@@ -154,6 +289,8 @@ class GUIAgent:
             
             # 6. 将AI回复添加到记忆
             self.memory.add(role="assistant", content=ai_content)
+            # 模型找不到/看不清目标元素时，下一张截图使用更高的分辨率
+            self.high_res_next = reports_not_found(ai_content)
             
             # 7. 解析并执行动作
             try:
@@ -168,16 +305,31 @@ class GUIAgent:
                     message_to_client.put({"name": "GUIAgent", "type": "status", "content": "[STOP]"})
                     return f"Task finished: {action_args.get('content', '')}"
                 
+                # 注视点截图中同一位置的坐标随裁剪区域变化，按整个截屏的坐标比较
+                stagnation = self.stagnation.record(
+                    action_name,
+                    self.frame.screen_args(action_args) if self.frame else action_args,
+                    self.screen_monitor.state_id
+                )
+                if stagnation:
+                    stagnation["iteration"] = iteration
+                    logging.warning(f"[GUIAgent][STOP]: Stagnation detected: {stagnation}")
+                    message_to_client.put({"name": "GUIAgent", "type": "metric", "content": stagnation})
+                    message_to_client.put({"name": "GUIAgent", "type": "status", "content": "[STOP]"})
+                    return f"Task failed: Stagnation detected ({stagnation['kind']}): {', '.join(stagnation['recent_steps'])}"
+                
                 # 发送可视化坐标点
-                action_point = get_action_coordinates(action_name, action_args, origin_width, origin_height)
+                action_point = get_action_coordinates(action_name, action_args, origin_width, origin_height, self.frame)
                 if action_point:
+                    # 注视点裁剪区域以截图坐标为准，可视化使用加上截图偏移后的屏幕坐标（与实际点击位置一致）
+                    self.last_action_point = (action_point['x'], action_point['y'])
                     content = {
-                        "x": action_point['x'], 
-                        "y": action_point['y'], 
+                        "x": action_point['x'] + offset_left, 
+                        "y": action_point['y'] + offset_top, 
                         "action": action_name
                     }
-                    if 'xx' in action_point: content['xx'] = action_point['xx']
-                    if 'yy' in action_point: content['yy'] = action_point['yy']
+                    if 'xx' in action_point: content['xx'] = action_point['xx'] + offset_left
+                    if 'yy' in action_point: content['yy'] = action_point['yy'] + offset_top
                         
                     message_to_client.put({
                         "name": "GUIAgent", 
@@ -185,15 +337,20 @@ class GUIAgent:
                         "content": content
                     })
                 
-                # 执行函数
-                map_action_to_function(
+                # 执行函数，并等待画面稳定
+                settle_result = map_action_to_function(
                     action_name, 
                     action_args, 
                     origin_width, 
                     origin_height, 
                     offset_left, 
-                    offset_top
+                    offset_top,
+                    settle=self.settle,
+                    drag_duration=0.5,
+                    frame=self.frame
                 )
+                if settle_result:
+                    message_to_client.put({"name": "GUIAgent", "type": "metric", "content": settle_result.to_dict()})
                 
             except Exception as e:
                 logging.error(f"[GUIAgent] Error executing action: {e}", exc_info=True)
@@ -201,6 +358,8 @@ class GUIAgent:
                 # 可以选择将错误信息加回记忆，帮助模型下一次纠正
                 # self.memory.add(role="system", content=f"Previous action failed: {str(e)}")
         
+        logging.info("[GUIAgent] Skipped %d unchanged screenshots", self.screen_monitor.skipped_frames)
+        logging.info("[GUIAgent] Settle stats (reason: [count, seconds]): %s", self.settle.stats)
         message_to_client.put({"name": "GUIAgent", "type": "status", "content": "[STOP]"})
         if iteration >= max_iterations:
             return "Task failed: Max iterations reached"
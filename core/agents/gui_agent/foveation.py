@@ -0,0 +1,128 @@
+"""
+注视点截图（foveated capture）
+把整屏缩小后的概览图（左）和注视区域的原分辨率裁剪图（右）拼成一张图片发送给模型：
+概览图提供全局布局，裁剪图保证注视区域的小字清晰，总 token 数按与普通截图相同的预算计算。
+
+注视区域以画面变化区域（与上一张截图相比）为中心，变化区域比裁剪图大或没有变化区域时以上一次动作的坐标为中心。
+模型给出的 <point> 相对于拼接后的整张图片，落在概览图上时按缩放比例映射回截屏，
+落在裁剪图上时按裁剪位置平移，见 FoveatedFrame.to_screen。
+
+通过环境变量 GUIAgent_CAPTURE_MODE=foveated 开启（默认 full，发送整屏截图）
+"""
+
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from core.tools.screen.encoder import resize_image
+
+CAPTURE_MODES = ("full", "foveated")
+
+FOVEATED_NOTE = (
+    "(The screenshot has two parts: the left part is the whole screen (downscaled), "
+    "the right part is a full-resolution view of the area outlined in red. "
+    "Point coordinates are relative to the whole combined image; use either part.)"
+)
+
+# 概览图上标出裁剪区域的边框颜色和宽度
+OUTLINE_COLOR = (255, 0, 0)
+OUTLINE_WIDTH = 2
+
+
+class FoveatedFrame:
+    """
+    拼接截图的布局：宽 overview_size[0] + 裁剪宽、高 overview_size[1]
+
+    Args:
+        screen_size: 原始截屏尺寸
+        overview_size: 概览图尺寸（与裁剪区域尺寸相同）
+        crop_box: 裁剪区域在截屏中的位置 (left, top, right, bottom)
+    """
+
+    def __init__(self, screen_size: Tuple[int, int], overview_size: Tuple[int, int], crop_box: Tuple[int, int, int, int]):
+        self.screen_size = screen_size
+        self.overview_size = overview_size
+        self.crop_box = crop_box
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.overview_size[0] + self.crop_box[2] - self.crop_box[0], self.overview_size[1]
+
+    def compose(self, image: Image.Image, resample: str = "fast") -> Image.Image:
+        """由原始截屏生成拼接截图"""
+        overview = resize_image(image, self.overview_size, resample)
+        if overview is image:
+            overview = image.copy()
+        if overview.mode != "RGB":
+            overview = overview.convert("RGB")
+        scale_x = self.overview_size[0] / self.screen_size[0]
+        scale_y = self.overview_size[1] / self.screen_size[1]
+        left, top, right, bottom = self.crop_box
+        ImageDraw.Draw(overview).rectangle(
+            (int(left * scale_x), int(top * scale_y), int(right * scale_x) - 1, int(bottom * scale_y) - 1),
+            outline=OUTLINE_COLOR,
+            width=OUTLINE_WIDTH
+        )
+        composite = Image.new("RGB", self.size)
+        composite.paste(overview, (0, 0))
+        composite.paste(image.crop(self.crop_box), (self.overview_size[0], 0))
+        return composite
+
+    def to_screen(self, x_rel: int, y_rel: int) -> Tuple[int, int]:
+        """把相对拼接截图的坐标（0-1000）转换为截屏中的像素坐标（不含截屏偏移）"""
+        width, height = self.size
+        x = min(int(x_rel / 1000 * width), width - 1)
+        y = min(int(y_rel / 1000 * height), height - 1)
+        if x < self.overview_size[0]:
+            return (
+                min(int(x * self.screen_size[0] / self.overview_size[0]), self.screen_size[0] - 1),
+                min(int(y * self.screen_size[1] / self.overview_size[1]), self.screen_size[1] - 1)
+            )
+        left, top, right, bottom = self.crop_box
+        return min(left + x - self.overview_size[0], right - 1), min(top + y, bottom - 1)
+
+    def screen_args(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """把参数中的 <point> 换算为相对整个截屏的坐标（0-1000），供停滞检测比较不同帧的坐标"""
+        def convert(match):
+            x, y = self.to_screen(int(match.group(1)), int(match.group(2)))
+            return f"<point>{x * 1000 // self.screen_size[0]} {y * 1000 // self.screen_size[1]}</point>"
+
+        return {
+            key: re.sub(r"<point>(\d+)\s+(\d+)</point>", convert, value) if isinstance(value, str) else value
+            for key, value in args.items()
+        }
+
+
+def choose_focus(
+    changed_box: Optional[Tuple[int, int, int, int]],
+    action_point: Optional[Tuple[int, int]],
+    crop_size: Tuple[int, int]
+) -> Optional[Tuple[int, int]]:
+    """注视点：能放进裁剪区域的变化区域中心，其次是上一次动作的坐标，其次是任意变化区域的中心"""
+    center = None
+    if changed_box:
+        left, top, right, bottom = changed_box
+        center = ((left + right) // 2, (top + bottom) // 2)
+        if right - left <= crop_size[0] and bottom - top <= crop_size[1]:
+            return center
+    return action_point or center
+
+
+def plan_foveated_frame(
+    screen_size: Tuple[int, int],
+    composite_size: Tuple[int, int],
+    focus: Optional[Tuple[int, int]]
+) -> Optional[FoveatedFrame]:
+    """
+    按拼接截图的目标尺寸（由图片 token 预算决定，宽高比为截屏的 2:1）规划布局；
+    没有注视点，或概览图已经不需要缩小时返回 None（直接发送整屏截图）
+    """
+    width, height = screen_size
+    overview_size = (composite_size[0] // 2, composite_size[1])
+    if focus is None or overview_size[0] >= width or overview_size[1] >= height:
+        return None
+    crop_width, crop_height = overview_size
+    left = min(max(0, focus[0] - crop_width // 2), width - crop_width)
+    top = min(max(0, focus[1] - crop_height // 2), height - crop_height)
+    return FoveatedFrame(screen_size, overview_size, (left, top, left + crop_width, top + crop_height))
@@ -0,0 +1,177 @@
+"""
+画面变化检测
+与上一次发送给模型的截图比较，画面没有变化时不再重复发送截图（也就省去一次视觉模型调用）。
+比较由快到慢：字节哈希完全相同 -> 感知哈希(dHash)差异大 -> 缩小后的灰度图逐像素比较。
+发送的截图同样与最近发送过的画面比较，回到之前的画面时沿用其状态编号（供停滞检测使用）。
+有变化时记录变化像素的外接矩形（changed_box，供注视点截图选择裁剪区域）。
+
+连续无变化时的策略（GUIAgent_UNCHANGED_POLICY）：
+- wait:     按指数退避等待后重新截屏，不调用模型；超过 max_unchanged 次后改为 reprompt
+- reprompt: 立即用纯文本提示"画面没有变化"让模型重新决策
+- abort:    先 reprompt，连续 max_unchanged 次无变化后结束任务
+"""
+
+import base64
+import collections
+import hashlib
+import io
+import os
+from typing import Optional, Tuple, Union
+
+from PIL import Image, ImageChops
+
+UNCHANGED_POLICIES = ("wait", "reprompt", "abort")
+
+UNCHANGED_NOTE = (
+    "(Screen unchanged: the screen looks the same as in the previous screenshot, "
+    "the last action had no visible effect. Try a different action.)"
+)
+
+
+def dhash(gray: Image.Image) -> int:
+    """64 位差值哈希：9x8 灰度图中每个像素与右侧像素的大小关系"""
+    pixels = list(gray.resize((9, 8), Image.Resampling.BILINEAR).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+class ScreenChangeDetector:
+    """
+    判断当前截图相对上一次发送给模型的截图是否有变化，并记录连续无变化的次数
+
+    Args:
+        policy: 连续无变化时的策略，见模块说明
+        max_unchanged: wait 策略最多等待的次数 / abort 策略结束任务前允许的连续无变化次数
+        hash_threshold: dHash 汉明距离超过该值时直接判定为有变化
+        pixel_threshold: 缩小后灰度差超过 pixel_delta 的像素占比超过该值时判定为有变化
+        pixel_delta: 逐像素比较时视为不同的灰度差
+        reduce_factor: 逐像素比较前的缩小倍数（光标闪烁等零星像素变化会被平均掉）
+        backoff_base / backoff_max: wait 策略第 n 次等待 backoff_base * 2^(n-1) 秒，不超过 backoff_max
+        recent_states: 用于识别"回到之前画面"的最近画面数
+    """
+
+    def __init__(
+        self,
+        policy: Optional[str] = None,
+        max_unchanged: Optional[int] = None,
+        hash_threshold: int = 6,
+        pixel_threshold: float = 0.00005,
+        pixel_delta: int = 24,
+        reduce_factor: int = 2,
+        backoff_base: float = 1.0,
+        backoff_max: float = 8.0,
+        recent_states: int = 8
+    ):
+        if policy is None:
+            policy = os.getenv("GUIAgent_UNCHANGED_POLICY", "wait")
+        if policy not in UNCHANGED_POLICIES:
+            raise ValueError(f"不支持的画面无变化策略: {policy}")
+        if max_unchanged is None:
+            max_unchanged = int(os.getenv("GUIAgent_MAX_UNCHANGED", "3"))
+        self.policy = policy
+        self.max_unchanged = max_unchanged
+        self.hash_threshold = hash_threshold
+        self.pixel_threshold = pixel_threshold
+        self.pixel_delta = pixel_delta
+        self.reduce_factor = reduce_factor
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.recent_states = recent_states
+
+        # 统计：省去的截图发送次数
+        self.skipped_frames = 0
+        self.reset()
+
+    def reset(self):
+        """新任务开始时清空参考帧"""
+        self.unchanged_streak = 0
+        self._digest: Optional[bytes] = None
+        self._hash: Optional[int] = None
+        self._gray: Optional[Image.Image] = None
+        # 最近发送过的画面: [(状态编号, dHash, 灰度图)]
+        self._recent = collections.deque(maxlen=self.recent_states)
+        self._next_state = 0
+        self.state_id: Optional[int] = None  # 模型当前看到的画面的状态编号
+        # 最近一次有变化时，变化像素在原始截屏中的外接矩形 (left, top, right, bottom)
+        self.changed_box: Optional[Tuple[int, int, int, int]] = None
+
+    def is_changed(self, image: Union[str, Image.Image], force: bool = False) -> bool:
+        """
+        比较截图（base64 编码的图片，或未编码的 PIL 截屏）与参考帧；
+        有变化时该截图成为新的参考帧（调用方随后会把它发送给模型），无变化时累加 unchanged_streak。
+        force 为 True 时无论是否变化都按已发送处理（画面相同时 state_id 不变）
+        """
+        if isinstance(image, str):
+            image_data = base64.b64decode(image)
+            digest = hashlib.blake2b(image_data, digest_size=16).digest()
+            if digest == self._digest and not force:
+                return self._unchanged()
+            image = Image.open(io.BytesIO(image_data))
+            gray = self._to_gray(image)
+        else:
+            gray = self._to_gray(image)
+            digest = hashlib.blake2b(gray.tobytes(), digest_size=16).digest()
+            if digest == self._digest and not force:
+                return self._unchanged()
+        frame_hash = dhash(gray)
+
+        if not force and self._gray is not None and self._same_frame(self._hash, self._gray, frame_hash, gray):
+            return self._unchanged()
+
+        self.changed_box = self._changed_box(self._gray, gray)
+        self._digest, self._hash, self._gray = digest, frame_hash, gray
+        self.unchanged_streak = 0
+        self._assign_state(frame_hash, gray)
+        return True
+
+    def _to_gray(self, image: Image.Image) -> Image.Image:
+        if image.mode not in ("L", "RGB", "RGBA"):
+            image = image.convert("RGB")
+        if self.reduce_factor > 1:
+            image = image.reduce(self.reduce_factor)
+        return image.convert("L")
+
+    def _same_frame(self, hash_a: int, gray_a: Image.Image, hash_b: int, gray_b: Image.Image) -> bool:
+        if gray_a.size != gray_b.size or bin(hash_a ^ hash_b).count("1") > self.hash_threshold:
+            return False
+        histogram = ImageChops.difference(gray_a, gray_b).histogram()
+        return sum(histogram[self.pixel_delta:]) / (gray_b.size[0] * gray_b.size[1]) <= self.pixel_threshold
+
+    def _changed_box(self, previous: Optional[Image.Image], gray: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+        if previous is None or previous.size != gray.size:
+            return None
+        mask = ImageChops.difference(previous, gray).point(lambda value: 255 if value >= self.pixel_delta else 0)
+        box = mask.getbbox()
+        if box is None:
+            return None
+        return tuple(value * self.reduce_factor for value in box)
+
+    def _assign_state(self, frame_hash: int, gray: Image.Image):
+        for index, (state, known_hash, known_gray) in enumerate(self._recent):
+            if self._same_frame(known_hash, known_gray, frame_hash, gray):
+                del self._recent[index]
+                break
+        else:
+            state = self._next_state
+            self._next_state += 1
+        self._recent.append((state, frame_hash, gray))
+        self.state_id = state
+
+    def _unchanged(self) -> bool:
+        self.unchanged_streak += 1
+        self.skipped_frames += 1
+        return False
+
+    def next_step(self) -> str:
+        """画面无变化时的下一步: "wait"、"reprompt" 或 "abort" """
+        if self.policy == "wait":
+            return "wait" if self.unchanged_streak <= self.max_unchanged else "reprompt"
+        if self.policy == "abort" and self.unchanged_streak >= self.max_unchanged:
+            return "abort"
+        return "reprompt"
+
+    def backoff_delay(self) -> float:
+        return min(self.backoff_max, self.backoff_base * 2 ** max(0, self.unchanged_streak - 1))
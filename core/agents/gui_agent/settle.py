@@ -0,0 +1,124 @@
+"""
+动作后的画面稳定检测（替代固定的 sleep）
+动作执行后轮询低分辨率灰度帧：连续若干帧没有变化且超过最短等待时间就返回，超过最长等待时间则放弃。
+界面响应快时不再白等，响应慢时也不会在动画/加载中途截图。
+"""
+
+import logging
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from PIL import Image, ImageChops
+
+# 每种动作的 (最短等待秒数, 最长等待秒数, 需要连续稳定的帧数)
+SETTLE_DEFAULTS: Dict[str, Tuple[float, float, int]] = {
+    "click": (0.15, 2.0, 2),
+    "left_double": (0.2, 2.0, 2),
+    "right_single": (0.15, 1.5, 2),
+    "drag": (0.1, 2.0, 2),
+    "hotkey": (0.2, 3.0, 2),
+    "type": (0.1, 2.0, 2),
+    "scroll": (0.15, 1.5, 2),
+    # wait(): 等待界面加载，需要稳定更久
+    "wait": (1.0, 5.0, 5),
+}
+DEFAULT_SETTLE = (0.15, 2.0, 2)
+
+# 无法截屏时退回到原来的固定等待
+FIXED_DELAYS = {"wait": 5.0}
+FIXED_DELAY = 0.5
+
+
+class SettleResult:
+    """一次稳定检测的结果：reason 为 "stable"、"timeout" 或 "fixed"（无法截屏，使用固定等待）"""
+
+    __slots__ = ("action", "reason", "waited", "frames")
+
+    def __init__(self, action: str, reason: str, waited: float, frames: int):
+        self.action = action
+        self.reason = reason
+        self.waited = waited
+        self.frames = frames
+
+    def to_dict(self) -> dict:
+        return {
+            "event": "gui_settle",
+            "action": self.action,
+            "reason": self.reason,
+            "waited": round(self.waited, 3),
+            "frames": self.frames,
+        }
+
+
+class SettleDetector:
+    """
+    Args:
+        capture: 返回低分辨率灰度帧（PIL.Image）的函数，默认使用 screen.capture_low_res
+        poll_interval: 轮询间隔（秒）
+        pixel_delta: 视为不同的灰度差
+        pixel_threshold: 变化像素占比不超过该值时视为稳定（光标闪烁等零星变化在低分辨率下几乎不可见）
+        defaults: 覆盖 SETTLE_DEFAULTS 中的部分动作
+    """
+
+    def __init__(
+        self,
+        capture: Optional[Callable[[], Image.Image]] = None,
+        poll_interval: float = 0.1,
+        pixel_delta: int = 16,
+        pixel_threshold: float = 0.0005,
+        defaults: Optional[Dict[str, Tuple[float, float, int]]] = None
+    ):
+        self.capture = capture
+        self.poll_interval = poll_interval
+        self.pixel_delta = pixel_delta
+        self.pixel_threshold = pixel_threshold
+        self.defaults = {**SETTLE_DEFAULTS, **(defaults or {})}
+
+        # 统计: reason -> [次数, 总等待秒数]
+        self.stats: Dict[str, list] = {}
+
+    def _capture(self) -> Image.Image:
+        if self.capture is None:
+            from core.tools.screen.screen import screen
+            self.capture = screen.capture_low_res
+        return self.capture()
+
+    def _stable(self, previous: Image.Image, current: Image.Image) -> bool:
+        if previous.size != current.size:
+            return False
+        histogram = ImageChops.difference(previous, current).histogram()
+        return sum(histogram[self.pixel_delta:]) <= self.pixel_threshold * current.size[0] * current.size[1]
+
+    def wait(self, action_name: str) -> SettleResult:
+        """动作执行后等待画面稳定"""
+        min_dwell, timeout, stable_frames = self.defaults.get(action_name, DEFAULT_SETTLE)
+        start = time.monotonic()
+        frames = 0
+        try:
+            previous = self._capture()
+            frames = 1
+            stable = 0
+            while True:
+                time.sleep(self.poll_interval)
+                current = self._capture()
+                frames += 1
+                stable = stable + 1 if self._stable(previous, current) else 0
+                previous = current
+                waited = time.monotonic() - start
+                if stable >= stable_frames and waited >= min_dwell:
+                    reason = "stable"
+                    break
+                if waited >= timeout:
+                    reason = "timeout"
+                    break
+        except Exception as e:
+            logging.warning(f"[GUIAgent] Settle detection unavailable, using fixed delay: {e}")
+            time.sleep(max(0.0, FIXED_DELAYS.get(action_name, FIXED_DELAY) - (time.monotonic() - start)))
+            reason = "fixed"
+
+        result = SettleResult(action_name, reason, time.monotonic() - start, frames)
+        entry = self.stats.setdefault(reason, [0, 0.0])
+        entry[0] += 1
+        entry[1] += result.waited
+        logging.info(f"[GUIAgent] Settle after {action_name}: {reason} in {result.waited:.2f}s ({frames} frames)")
+        return result
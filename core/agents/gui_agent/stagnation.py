@@ -0,0 +1,120 @@
+"""
+停滞/循环检测
+GUIAgent 每一步记录 (动作, 归一化坐标, 画面状态)，在最近的窗口内检测：
+- cycle:       最近若干步以 1~max_period 步为周期重复（同样的动作、几乎相同的坐标、相同的画面）
+- no_progress: 连续多步之后的画面都是窗口内出现过的画面（没有进入新的界面）
+检测到时由 GUIAgent 结束任务，交给 SmartRouter 切换 Agent 或请求人类介入，而不是耗尽剩余迭代。
+"""
+
+import collections
+from typing import Any, Dict, Optional
+
+from .action_parser import extract_point
+
+# 参与比较的非坐标参数
+ACTION_ARG_KEYS = ("key", "content", "direction")
+
+
+class Step:
+    """一步动作：动作名、非坐标参数、归一化坐标(0-1000)和画面状态编号"""
+
+    __slots__ = ("action", "args", "points", "state")
+
+    def __init__(self, action: str, args: tuple, points: tuple, state: int):
+        self.action = action
+        self.args = args
+        self.points = points
+        self.state = state
+
+    def describe(self) -> str:
+        points = " ".join(f"({x},{y})" for x, y in self.points)
+        return f"{self.action}{points}@s{self.state}"
+
+
+class StagnationDetector:
+    """
+    Args:
+        window: 保留的最近步数
+        max_period: 检测的最长循环周期（步）
+        cycle_repeats: 一个周期至少连续出现几次才算循环
+        no_progress_limit: 连续多少步没有出现新画面算作停滞
+        point_tolerance: 坐标（0-1000）在该距离内视为同一位置
+    """
+
+    def __init__(
+        self,
+        window: int = 12,
+        max_period: int = 3,
+        cycle_repeats: int = 3,
+        no_progress_limit: int = 8,
+        point_tolerance: int = 20
+    ):
+        self.window = window
+        self.max_period = max_period
+        self.cycle_repeats = cycle_repeats
+        self.no_progress_limit = no_progress_limit
+        self.point_tolerance = point_tolerance
+        self.reset()
+
+    def reset(self):
+        """新任务开始时清空窗口"""
+        self.steps = collections.deque(maxlen=self.window)
+        self.no_progress_streak = 0
+        # 画面状态未知时使用的编号（每次都视为新画面）
+        self._unknown_state = -1
+
+    def record(self, action_name: str, action_args: Dict[str, Any], state: Optional[int]) -> Optional[Dict[str, Any]]:
+        """
+        记录一步动作（state 为做出该动作时模型看到的画面的状态编号，见 ScreenChangeDetector.state_id）
+
+        Returns:
+            检测到循环或停滞时返回事件字典，否则返回 None
+        """
+        if state is None:
+            state = self._unknown_state
+            self._unknown_state -= 1
+        is_new = all(step.state != state for step in self.steps)
+        points = tuple(
+            point for point in (extract_point(args) for key, args in sorted(action_args.items()) if "point" in key)
+            if point
+        )
+        args = tuple((key, action_args[key]) for key in ACTION_ARG_KEYS if key in action_args)
+        self.steps.append(Step(action_name, args, points, state))
+
+        self.no_progress_streak = 0 if is_new else self.no_progress_streak + 1
+
+        period = self._find_cycle()
+        if period:
+            return self._event("cycle", period=period, repeats=self.cycle_repeats)
+        if self.no_progress_streak >= self.no_progress_limit:
+            return self._event("no_progress", streak=self.no_progress_streak)
+        return None
+
+    def _same(self, a: Step, b: Step) -> bool:
+        if a.action != b.action or a.args != b.args or a.state != b.state or len(a.points) != len(b.points):
+            return False
+        return all(
+            abs(pa[0] - pb[0]) <= self.point_tolerance and abs(pa[1] - pb[1]) <= self.point_tolerance
+            for pa, pb in zip(a.points, b.points)
+        )
+
+    def _find_cycle(self) -> Optional[int]:
+        """最近 period * cycle_repeats 步以 period 为周期重复时返回 period"""
+        steps = list(self.steps)
+        for period in range(1, self.max_period + 1):
+            length = period * self.cycle_repeats
+            if length > len(steps):
+                break
+            tail = steps[-length:]
+            if all(self._same(tail[i], tail[i - period]) for i in range(period, length)):
+                return period
+        return None
+
+    def _event(self, kind: str, **details) -> Dict[str, Any]:
+        return {
+            "event": "gui_stagnation",
+            "kind": kind,
+            **details,
+            "distinct_states": len({step.state for step in self.steps}),
+            "recent_steps": [step.describe() for step in list(self.steps)[-6:]],
+        }
@@ -6,6 +6,11 @@ class BaseLanguage:
         self.start_time = None
         self.elapsed_time = 0
         self.should_stop = False
+        # 执行代码的线程，消费方据此判断执行是否已异常退出
+        self.worker = None
+    
+    def is_worker_alive(self):
+        return self.worker is not None and self.worker.is_alive()
     
     def run(self, code: str):
         raise NotImplementedError("[BaseLanguage]Subclasses must implement this method")
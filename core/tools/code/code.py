@@ -3,19 +3,43 @@
 包装原有的代码执行功能为工具
 """
 
+import atexit
+import logging
+import os
 import queue
-from .languages import PythonLanguage, BashLanguage, PowerShellLanguage
+import time
+from .languages import PythonLanguage, BashLanguage, PowerShellLanguage, get_kernel_pool
 from ..base_tool import FunctionTool
+from ..tool_output import ArtifactStore, BoundedOutput, get_output_budget
+
+
+DEFAULT_EXECUTION_TIMEOUT = 600
+
+
+def get_execution_timeout() -> float:
+    """单次代码执行的最长时间（秒），可由环境变量 CODE_EXECUTION_TIMEOUT 修改"""
+    try:
+        return max(1.0, float(os.getenv("CODE_EXECUTION_TIMEOUT", DEFAULT_EXECUTION_TIMEOUT)))
+    except ValueError:
+        return DEFAULT_EXECUTION_TIMEOUT
 
 
 class Code:
     """代码执行器"""
     
+    # 等待输出时检查执行线程是否存活的间隔（秒）
+    POLL_INTERVAL = 1.0
+    # 超时中断后等待执行结束的时间（秒），仍未结束则重置运行环境
+    INTERRUPT_GRACE = 10.0
+    
     def __init__(self):
-        self.python = PythonLanguage()
+        self.kernel_pool = get_kernel_pool()
+        self.python = PythonLanguage(pool=self.kernel_pool)
         self.bash = BashLanguage()
         self.powershell = PowerShellLanguage()
         self.current_language = None
+        # 会话级artifact存储，保存超出预算的完整输出
+        self.artifacts = ArtifactStore()
         self.language_map = {
             "python": self.python,
             "powershell": self.powershell,
@@ -30,6 +54,8 @@ class Code:
                     self.language_list.append(lang)
             else:
                 self.language_list.append(lang)
+        # 进程退出时关闭常驻内核，避免遗留子进程
+        atexit.register(self.shutdown)
 
     def run(self, lang: str, code: str):
         """运行代码"""
@@ -40,8 +66,54 @@ class Code:
         else:
             message = queue.Queue()
             message.put({"type": "error", "content": f"[Code]不支持的语言:{lang}"})
+            message.put({"type": "end"})
             return message
 
+    def iter_messages(self, message: queue.Queue, timeout: float = None):
+        """
+        逐条读取执行结果直到end消息（含end）
+        执行线程已退出却没有发送end时，或超过timeout秒时（先中断，INTERRUPT_GRACE秒后仍未结束则重置该语言），
+        补发error和end消息，而不是一直阻塞
+        """
+        language = self.current_language
+        timeout = get_execution_timeout() if timeout is None else timeout
+        deadline = time.time() + timeout
+        interrupted_at = None
+        while True:
+            try:
+                msg = message.get(timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                msg = None
+            if msg is None and not (language and language.is_worker_alive()):
+                # 线程退出前可能刚放入最后的消息
+                try:
+                    msg = message.get_nowait()
+                except queue.Empty:
+                    logging.error("[Code]Execution thread exited without end message")
+                    yield {"type": "error", "content": "[Code]执行线程异常退出，没有返回结束信号"}
+                    yield {"type": "end"}
+                    return
+            if msg is not None:
+                if msg.get("type") == "end" and interrupted_at is not None:
+                    yield {"type": "error", "content": f"[Code]代码执行超过{timeout:g}秒，已中断"}
+                yield msg
+                if msg.get("type") == "end":
+                    return
+            now = time.time()
+            if now < deadline:
+                continue
+            if interrupted_at is None:
+                logging.warning("[Code]Execution timed out after %ss, interrupting", timeout)
+                language.interrupt()
+                interrupted_at = now
+            elif now - interrupted_at >= self.INTERRUPT_GRACE:
+                logging.error("[Code]Execution did not stop after interrupt, resetting %s", type(language).__name__)
+                # 不经过执行锁直接关闭：执行线程读到进程/内核被关闭后自行结束，下次执行时重新启动
+                language.stop()
+                yield {"type": "error", "content": f"[Code]代码执行超过{timeout:g}秒且无法中断，运行环境已重置（会话状态丢失）"}
+                yield {"type": "end"}
+                return
+
     def interrupt(self):
         """中断执行中的代码"""
         message = queue.Queue()
@@ -52,6 +124,26 @@ class Code:
             message.put({"type": "text", "content": "没有正在运行的代码"})
         return message
 
+    def reset(self, lang: str = None):
+        """重置语言运行环境（丢弃会话状态）。不指定语言时重置所有语言"""
+        targets = [self.language_map[lang.lower()]] if lang else set(self.language_map.values())
+        for lang_obj in targets:
+            if hasattr(lang_obj, 'reset'):
+                lang_obj.reset()
+
+    def shutdown(self):
+        """关闭所有常驻的运行环境（会话结束时调用）"""
+        for lang_obj in set(self.language_map.values()):
+            if hasattr(lang_obj, 'stop'):
+                lang_obj.stop()
+        self.artifacts.cleanup()
+
+    def get_kernel_pool_stats(self):
+        """获取Python内核预热池的命中率与启动耗时指标，未启用预热池时返回None"""
+        if self.kernel_pool:
+            return self.kernel_pool.get_stats()
+        return None
+
     def get_elapsed_time(self):
         """获取代码已运行时间"""
         if self.current_language:
@@ -78,35 +170,39 @@ def create_code_tools():
         try:
             result_queue = code_executor.run(language, code)
             
-            # 收集所有输出
-            outputs = []
+            # 收集所有输出，直到收到语言执行器发出的结束信号
+            # 输出超出预算时只保留开头和结尾，完整内容写入artifact文件
+            output = BoundedOutput(code_executor.artifacts, get_output_budget())
             errors = []
             
-            while True:
-                try:
-                    msg = result_queue.get(timeout=0.1)
+            try:
+                for msg in code_executor.iter_messages(result_queue):
                     msg_type = msg.get("type", "")
                     content = msg.get("content", "")
                     
                     if msg_type == "text":
-                        outputs.append(content)
+                        output.write(content)
                     elif msg_type == "error":
                         errors.append(content)
                     elif msg_type == "end":
                         break
-                except queue.Empty:
-                    # 检查是否还在运行
-                    if not code_executor.is_running():
-                        break
+            finally:
+                output.close()
             
-            return {
+            output_text = output.getvalue()
+            result = {
                 "success": len(errors) == 0,
                 "language": language,
-                "outputs": outputs,
+                "outputs": [output_text] if output_text else [],
                 "errors": errors,
-                "output": "\n".join(outputs) if outputs else "",
+                "output": output_text,
                 "error": "\n".join(errors) if errors else ""
             }
+            if output.truncated:
+                result["output_truncated"] = True
+                result["output_ref"] = output.ref
+                result["output_total_chars"] = output.total_chars
+            return result
         except Exception as e:
             return {
                 "success": False,
@@ -117,7 +213,7 @@ def create_code_tools():
     
     code_tool = FunctionTool(
         name="execute_code",
-        description=f"执行代码。支持的语言: {', '.join(code_executor.language_list)}。代码将在隔离的环境中执行并返回输出",
+        description=f"执行代码。支持的语言: {', '.join(code_executor.language_list)}。Python在常驻会话中执行，变量在多次调用之间保留",
         parameters_schema={
             "type": "object",
             "properties": {
@@ -166,4 +262,76 @@ def create_code_tools():
     )
     tools.append(interrupt_tool)
     
+    # Output Paging Tool
+    def read_output_func(ref: str, start_line: int = 1, max_lines: int = 200):
+        """分页读取被截断的完整输出"""
+        return code_executor.artifacts.read(ref, start_line=start_line, max_lines=max_lines)
+    
+    read_output_tool = FunctionTool(
+        name="read_output",
+        description="分页查看被截断的完整输出。当工具结果提示输出过长并给出引用(如 output_1.txt)时使用",
+        parameters_schema={
+            "type": "object",
+            "properties": {
+                "ref": {
+                    "type": "string",
+                    "description": "输出引用，例如 output_1.txt"
+                },
+                "start_line": {
+                    "type": "integer",
+                    "description": "起始行号（从1开始）",
+                    "default": 1,
+                    "minimum": 1
+                },
+                "max_lines": {
+                    "type": "integer",
+                    "description": "最多读取的行数",
+                    "default": 200,
+                    "minimum": 1
+                }
+            },
+            "required": ["ref"]
+        },
+        execute_func=read_output_func
+    )
+    tools.append(read_output_tool)
+    
+    # Code Reset Tool
+    def reset_code_func(language: str = None):
+        """重置代码运行环境工具函数"""
+        try:
+            if language and language.lower() not in code_executor.language_list:
+                return {
+                    "success": False,
+                    "error": f"不支持的语言:{language}"
+                }
+            code_executor.reset(language)
+            return {
+                "success": True,
+                "message": "运行环境已重置"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    reset_tool = FunctionTool(
+        name="reset_code",
+        description="重置代码运行环境，清除之前定义的所有变量。仅在运行环境异常或需要全新环境时使用",
+        parameters_schema={
+            "type": "object",
+            "properties": {
+                "language": {
+                    "type": "string",
+                    "enum": code_executor.language_list,
+                    "description": "要重置的语言，不指定则重置全部"
+                }
+            },
+            "required": []
+        },
+        execute_func=reset_code_func
+    )
+    tools.append(reset_tool)
+    
     return tools, code_executor
\ No newline at end of file
@@ -4,9 +4,11 @@
 
 
 from .bash import BashLanguage
+from .kernel_pool import KernelPool, get_kernel_pool
 from .powershell import PowerShellLanguage
 from .python import PythonLanguage
+from .shell_language import ShellLanguage
 
-__all__ = ['PythonLanguage', 'BashLanguage', 'PowerShellLanguage']
+__all__ = ['PythonLanguage', 'BashLanguage', 'PowerShellLanguage', 'ShellLanguage', 'KernelPool', 'get_kernel_pool']
 
 __version__ = '1.0.0'
\ No newline at end of file
@@ -1,63 +1,23 @@
-import queue
 import shutil
-import subprocess
-import threading
-import time
 
-from ..base_language import BaseLanguage
+from .shell_language import ShellLanguage
 
 
-class BashLanguage(BaseLanguage):
-    def __init__(self):
-        super().__init__()
-        self.process = None
+class BashLanguage(ShellLanguage):
+    name = "BashLanguage"
+    script_suffix = ".sh"
 
     def is_available(self):
         return shutil.which("bash") is not None
 
-    def run(self, code: str):
-        message = queue.Queue()
-        execution_thread = threading.Thread(target=self._execute, args=(code, message))
-        execution_thread.daemon = True
-        execution_thread.start()
-        return message
+    def get_command(self):
+        return ["bash", "--noprofile", "--norc"]
 
-    def _execute(self, code: str, message: queue.Queue):
-        self.is_running = True
-        self.start_time = time.time()
-        self.should_stop = False
-        
-        try:
-            self.process = subprocess.Popen(
-                ["bash"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
-            
-            self.process.stdin.write(code)
-            self.process.stdin.close()
-            
-            for line in self.process.stdout:
-                message.put({"type": "text", "content": line})
-            
-            return_code = self.process.wait()
-            message.put({"type": "text", "content": f"Return code: {return_code}"})
-            
-        except Exception as e:
-            message.put({"type": "error", "content": f"[BashLanguage]Error: {e}"})
-        finally:
-            self.is_running = False
-            self.process = None
-            
-    def interrupt(self):
-        self.should_stop = True
-        if self.process:
-            self.process.terminate()
-            try:
-                self.process.wait(timeout=2)
-            except subprocess.TimeoutExpired:
-                self.process.kill()
+    def get_init_script(self):
+        # 收到SIGINT时结束当前脚本（前台子进程按默认行为退出），Shell本身继续运行
+        return "trap 'return 130 2>/dev/null' INT"
+
+    def wrap_command(self, script_path: str):
+        script_path = script_path.replace("\\", "/").replace("'", "'\\''")
+        # 用户代码的stdin重定向到/dev/null，避免读取到后续命令
+        return f"source '{script_path}' < /dev/null; printf '%s:%s\\n' '{self.marker}' \"$?\""
@@ -0,0 +1,303 @@
+"""
+Jupyter内核预热池
+预先启动若干备用内核，崩溃恢复、强制重启和新会话可以直接取用，无需等待wait_for_ready
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from jupyter_client.manager import KernelManager
+
+
+DEFAULT_PRELOAD_MODULES = ("json", "csv", "pathlib")
+
+
+def boot_kernel(
+    kernel_name: str = "python3",
+    preload_modules: Optional[List[str]] = None,
+    timeout: float = 60
+) -> Tuple[KernelManager, Any]:
+    """
+    启动一个内核并等待就绪
+
+    Args:
+        kernel_name: 内核名称
+        preload_modules: 启动后预先导入的模块
+        timeout: 等待就绪的超时时间（秒）
+
+    Returns:
+        (km, kc): 内核管理器和已启动通道的客户端
+    """
+    km = KernelManager(kernel_name=kernel_name)
+    km.start_kernel()
+    kc = km.client()
+    try:
+        kc.start_channels()
+        kc.wait_for_ready(timeout=timeout)
+        if preload_modules:
+            msg_id = kc.execute(f"import {', '.join(preload_modules)}", silent=True, store_history=False)
+            # 等待导入完成，保证取出的内核可以立即使用
+            deadline = time.time() + timeout
+            while time.time() < deadline:
+                reply = kc.get_shell_msg(timeout=timeout)
+                if reply['parent_header'].get('msg_id') == msg_id:
+                    break
+    except Exception:
+        shutdown_kernel(km, kc)
+        raise
+    return km, kc
+
+
+def shutdown_kernel(km: Optional[KernelManager], kc: Any = None):
+    """关闭内核并释放通道，忽略清理过程中的错误"""
+    try:
+        if kc:
+            kc.stop_channels()
+    except Exception as e:
+        logging.error("[KernelPool]Error stopping kernel channels: %s", e)
+    try:
+        if km:
+            km.shutdown_kernel(now=True)
+    except Exception as e:
+        logging.error("[KernelPool]Error shutting down kernel: %s", e)
+
+
+def _is_healthy(km: KernelManager, kc: Any) -> bool:
+    """进程存活且心跳正常"""
+    try:
+        return km.is_alive() and kc.is_alive()
+    except Exception:
+        return False
+
+
+class KernelPool:
+    """
+    备用内核池
+
+    - 容量上限: 备用内核数量不超过max_size
+    - 空闲回收: 超过idle_timeout秒没有取用时，回收全部备用内核，下次取用时再补充
+    - 健康检查: 取用前和后台维护时检查进程与心跳，异常内核直接丢弃
+    - 启动失败: 后台补充按指数退避重试（最长max_backoff秒），连续失败max_boot_failures次后停止补充，
+      直到acquire()同步启动成功
+    - 指标: get_stats()返回命中率、启动耗时等，用于确定池大小
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        max_size: int = 4,
+        idle_timeout: float = 600,
+        preload_modules: Optional[List[str]] = DEFAULT_PRELOAD_MODULES,
+        kernel_name: str = "python3",
+        check_interval: float = 5,
+        max_boot_failures: int = 5,
+        max_backoff: float = 300
+    ):
+        self.max_size = max_size
+        self.size = max(0, min(size, max_size))
+        self.idle_timeout = idle_timeout
+        self.preload_modules = list(preload_modules) if preload_modules else []
+        self.kernel_name = kernel_name
+        self.check_interval = check_interval
+        self.max_boot_failures = max_boot_failures
+        self.max_backoff = max_backoff
+
+        # 备用内核: (km, kc, 就绪时间)
+        self._standby: List[Tuple[KernelManager, Any, float]] = []
+        self._booting = 0
+        self._last_acquire = time.time()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        # 连续启动失败次数与下次允许后台补充的时间
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+
+        # 指标
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.health_failures = 0
+        self.boot_failures = 0
+        self.boot_times: List[float] = []
+
+        self._maintainer = threading.Thread(target=self._maintain, daemon=True)
+        self._maintainer.start()
+        # 立即开始预热
+        self._wakeup.set()
+
+    def acquire(self) -> Tuple[KernelManager, Any]:
+        """
+        取出一个就绪的内核。池中没有可用内核时同步启动一个新内核
+
+        Returns:
+            (km, kc): 调用方负责在使用结束后关闭
+        """
+        while True:
+            with self._lock:
+                self._last_acquire = time.time()
+                if not self._standby:
+                    break
+                km, kc, _ = self._standby.pop(0)
+            if _is_healthy(km, kc):
+                with self._lock:
+                    self.hits += 1
+                self._wakeup.set()
+                return km, kc
+            # 不健康的备用内核直接丢弃，继续取下一个
+            with self._lock:
+                self.health_failures += 1
+            threading.Thread(target=shutdown_kernel, args=(km, kc), daemon=True).start()
+
+        with self._lock:
+            self.misses += 1
+        self._wakeup.set()
+        return self._boot()
+
+    def release(self, km: KernelManager, kc: Any):
+        """归还用过的内核。内核状态已被修改，不再复用，在后台关闭"""
+        threading.Thread(target=shutdown_kernel, args=(km, kc), daemon=True).start()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取池的命中率与启动耗时指标"""
+        with self._lock:
+            total = self.hits + self.misses
+            boot_times = sorted(self.boot_times)
+            return {
+                "size": self.size,
+                "max_size": self.max_size,
+                "standby": len(self._standby),
+                "booting": self._booting,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "health_failures": self.health_failures,
+                "boot_failures": self.boot_failures,
+                "refill_disabled": self._consecutive_failures >= self.max_boot_failures,
+                "boot_count": len(boot_times),
+                "boot_time_avg": sum(boot_times) / len(boot_times) if boot_times else 0.0,
+                "boot_time_p50": boot_times[len(boot_times) // 2] if boot_times else 0.0,
+                "boot_time_max": boot_times[-1] if boot_times else 0.0,
+            }
+
+    def close(self):
+        """关闭池以及所有备用内核"""
+        with self._lock:
+            self._closed = True
+            standby, self._standby = self._standby, []
+        self._wakeup.set()
+        for km, kc, _ in standby:
+            shutdown_kernel(km, kc)
+
+    def _boot(self) -> Tuple[KernelManager, Any]:
+        start = time.time()
+        try:
+            km, kc = boot_kernel(self.kernel_name, self.preload_modules)
+        except Exception:
+            with self._lock:
+                self.boot_failures += 1
+                self._consecutive_failures += 1
+                self._retry_at = time.time() + min(
+                    self.max_backoff, self.check_interval * 2 ** (self._consecutive_failures - 1)
+                )
+                if self._consecutive_failures == self.max_boot_failures:
+                    logging.error(
+                        "[KernelPool]Kernel failed to boot %d times in a row, stop refilling standby kernels",
+                        self._consecutive_failures
+                    )
+            raise
+        with self._lock:
+            self._consecutive_failures = 0
+            self._retry_at = 0.0
+            self.boot_times.append(time.time() - start)
+            # 只保留最近的样本
+            if len(self.boot_times) > 100:
+                self.boot_times = self.boot_times[-100:]
+        logging.info("[KernelPool]Booted kernel in %.2fs", time.time() - start)
+        return km, kc
+
+    def _maintain(self):
+        """后台维护线程：补充、健康检查、空闲回收"""
+        while not self._closed:
+            self._wakeup.wait(timeout=self.check_interval)
+            self._wakeup.clear()
+            if self._closed:
+                break
+
+            with self._lock:
+                idle = time.time() - self._last_acquire > self.idle_timeout
+                standby = list(self._standby)
+
+            # 健康检查
+            for km, kc, ready_at in standby:
+                if not _is_healthy(km, kc):
+                    with self._lock:
+                        if (km, kc, ready_at) not in self._standby:
+                            continue
+                        self._standby.remove((km, kc, ready_at))
+                        self.health_failures += 1
+                    shutdown_kernel(km, kc)
+
+            # 空闲回收
+            if idle:
+                with self._lock:
+                    evicted, self._standby = self._standby, []
+                    self.evictions += len(evicted)
+                for km, kc, _ in evicted:
+                    shutdown_kernel(km, kc)
+                continue
+
+            # 补充到目标数量（启动失败后退避，连续失败过多时停止）
+            while True:
+                with self._lock:
+                    if self._closed or len(self._standby) + self._booting >= self.size:
+                        break
+                    if self._consecutive_failures >= self.max_boot_failures or time.time() < self._retry_at:
+                        break
+                    self._booting += 1
+                try:
+                    km, kc = self._boot()
+                except Exception as e:
+                    logging.error("[KernelPool]Error booting standby kernel: %s", e)
+                    with self._lock:
+                        self._booting -= 1
+                    break
+                with self._lock:
+                    self._booting -= 1
+                    if self._closed:
+                        closed = True
+                    else:
+                        closed = False
+                        self._standby.append((km, kc, time.time()))
+                if closed:
+                    shutdown_kernel(km, kc)
+                    break
+
+
+# 全局内核池实例（懒加载）
+_kernel_pool = None
+_kernel_pool_lock = threading.Lock()
+
+
+def get_kernel_pool() -> Optional[KernelPool]:
+    """
+    获取全局内核池。池大小由环境变量KERNEL_POOL_SIZE配置，默认0（不启用预热池）
+    """
+    global _kernel_pool
+    with _kernel_pool_lock:
+        if _kernel_pool is None:
+            size = int(os.getenv("KERNEL_POOL_SIZE", "0"))
+            if size <= 0:
+                return None
+            _kernel_pool = KernelPool(
+                size=size,
+                max_size=int(os.getenv("KERNEL_POOL_MAX_SIZE", "4")),
+                idle_timeout=float(os.getenv("KERNEL_POOL_IDLE_TIMEOUT", "600"))
+            )
+            atexit.register(_kernel_pool.close)
+        return _kernel_pool
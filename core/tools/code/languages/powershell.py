@@ -1,64 +1,26 @@
-import queue
 import shutil
-import subprocess
-import threading
-import time
 
-from ..base_language import BaseLanguage
+from .shell_language import ShellLanguage
 
 
-class PowerShellLanguage(BaseLanguage):
-    def __init__(self):
-        super().__init__()
-        self.process = None
+class PowerShellLanguage(ShellLanguage):
+    name = "PowerShellLanguage"
+    script_suffix = ".ps1"
+    # Windows PowerShell 5.1 按ANSI代码页读取没有BOM的脚本，带BOM才能正确读取非ASCII字符
+    script_encoding = "utf-8-sig"
 
     def is_available(self):
         return shutil.which("powershell") is not None or shutil.which("pwsh") is not None
 
-    def run(self, code: str):
-        message = queue.Queue()
-        execution_thread = threading.Thread(target=self._execute, args=(code, message))
-        execution_thread.daemon = True
-        execution_thread.start()
-        return message
-
-    def _execute(self, code: str, message: queue.Queue):
-        self.is_running = True
-        self.start_time = time.time()
-        self.should_stop = False
-        
+    def get_command(self):
         executable = "pwsh" if shutil.which("pwsh") else "powershell"
-        
-        try:
-            # -Command - tells powershell to read command from stdin
-            self.process = subprocess.Popen(
-                [executable, "-NoProfile", "-Command", code],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
-            
-            for line in self.process.stdout:
-                if self.should_stop:
-                    break
-                message.put({"type": "text", "content": line})
-            
-            return_code = self.process.wait()
-            message.put({"type": "text", "content": f"Return code: {return_code}"})
-            
-        except Exception as e:
-            message.put({"type": "error", "content": f"[PowerShellLanguage]Error: {e}"})
-        finally:
-            self.is_running = False
-            self.process = None
-            
-    def interrupt(self):
-        super().interrupt()
-        if self.process:
-            self.process.terminate()
-            try:
-                self.process.wait(timeout=2)
-            except subprocess.TimeoutExpired:
-                self.process.kill()
+        # -Command - 表示从stdin逐行读取命令
+        return [executable, "-NoProfile", "-NoLogo", "-NonInteractive", "-ExecutionPolicy", "Bypass", "-Command", "-"]
+
+    def wrap_command(self, script_path: str):
+        script_path = script_path.replace("'", "''")
+        return (
+            f"$global:LASTEXITCODE = 0; . '{script_path}'; "
+            f"$__argus_rc = if (-not $?) {{ 1 }} else {{ $global:LASTEXITCODE }}; "
+            f"[Console]::Out.WriteLine('{self.marker}:' + $__argus_rc)"
+        )
@@ -3,74 +3,154 @@ import queue
 import re
 import threading
 import time
-
-from jupyter_client.manager import KernelManager
+from typing import Optional
 
 from ..base_language import BaseLanguage
+from .kernel_pool import KernelPool, boot_kernel, shutdown_kernel
+
+
+ANSI_ESCAPE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
 
 
 class PythonLanguage(BaseLanguage):
-    def __init__(self):
+    """
+    基于Jupyter内核的Python执行器。
+
+    内核在首次执行时启动，并在整个会话内常驻复用（变量在多次调用之间保留）；
+    只有在内核崩溃或显式调用reset()时才会重启，stop()用于会话结束时关闭内核。
+    配置了预热池(KernelPool)时，重启直接从池中取用已就绪的内核。
+    """
+
+    # 合并stream输出时单个chunk的最大字符数
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, pool: Optional[KernelPool] = None, interrupt_timeout: float = 3):
         super().__init__()
         self.km = None
         self.kc = None
         self.current_msg_id = None
-    
-    def start(self):
-        self.should_stop = False
-        self.start_time = time.time()
-        self.elapsed_time = 0
-        
-        if self.km:
-            self.stop()
+        self.pool = pool
+        # interrupt_kernel后超过该时间仍未结束则强制重启内核
+        self.interrupt_timeout = interrupt_timeout
+        # 保证同一时间只有一段代码在内核中执行
+        self._lock = threading.Lock()
+        # 串行化内核的启动和关闭（看门狗线程与执行线程可能同时操作km/kc）
+        self._lifecycle_lock = threading.RLock()
+        # 每次执行的编号，看门狗据此判断超时的是否仍是被中断的那次执行
+        self._execution_id = 0
+
+    def is_alive(self):
+        """内核是否存活"""
         try:
-            self.km = KernelManager(kernel_name='python3')
-            self.is_running = True
-            self.km.start_kernel()
-            self.kc = self.km.client()
-            self.kc.start_channels()
-            self.kc.wait_for_ready()
-            logging.info("[PythonLanguage]Started kernel client&manager")
-        except Exception as e:
-            self.stop()
-            logging.error("[PythonLanguage]Error starting kernel: %s", e)
+            return self.km is not None and self.kc is not None and self.km.is_alive()
+        except Exception:
+            return False
+
+    def start(self):
+        """启动内核（若已有存活的内核则直接复用，配置了预热池时优先从池中取用）"""
+        with self._lifecycle_lock:
+            if self.is_alive():
+                return
+            if self.km or self.kc:
+                # 内核已崩溃，先清理残留的manager/client
+                self.stop()
+            try:
+                if self.pool:
+                    self.km, self.kc = self.pool.acquire()
+                else:
+                    self.km, self.kc = boot_kernel()
+                logging.info("[PythonLanguage]Started kernel client&manager")
+            except Exception as e:
+                self.stop()
+                logging.error("[PythonLanguage]Error starting kernel: %s", e)
 
     def stop(self):
+        """关闭内核（会话结束时调用）"""
         self.is_running = False
-        if self.start_time:
-            self.elapsed_time = time.time() - self.start_time
-        self.start_time = None
-        
-        try:
-            if self.km:
-                self.km.shutdown_kernel()
-                self.is_running = False
-                self.km = None
-            if self.kc:
-                self.kc.stop_channels()
-                self.current_msg_id = None
-                self.kc = None
-            logging.info("[PythonLanguage]Stopped kernel client&manager")
-        except Exception as e:
-            logging.error("[PythonLanguage]Error during cleanup kernel: %s", e)
+        with self._lifecycle_lock:
+            km, kc = self.km, self.kc
+            if km is None and kc is None:
+                return
+            self.km = None
+            self.kc = None
+            self.current_msg_id = None
+        if self.pool and km:
+            self.pool.release(km, kc)
+        else:
+            shutdown_kernel(km, kc)
+        logging.info("[PythonLanguage]Stopped kernel client&manager")
+
+    def reset(self):
+        """显式重置：丢弃当前内核状态并启动新内核"""
+        self.interrupt()
+        with self._lock:
+            self.stop()
+            self.start()
 
     def wait_for_shutdown(self):
         while self.is_running or self.kc:
             time.sleep(0.1)
 
+    def interrupt(self):
+        """中断正在运行的代码，内核本身保持存活；中断无效时强制关闭内核，下次执行时重启"""
+        super().interrupt()
+        if self.is_running and self.km:
+            try:
+                self.km.interrupt_kernel()
+            except Exception as e:
+                logging.error("[PythonLanguage]Error interrupting kernel: %s", e)
+            watchdog = threading.Thread(target=self._interrupt_watchdog, args=(self._execution_id, self.km))
+            watchdog.daemon = True
+            watchdog.start()
+
+    def _interrupt_watchdog(self, execution_id: int, km):
+        """
+        等待中断生效，超时则强制关闭内核（不持有执行锁，执行循环会检测到内核被关闭），
+        新内核由下一次执行按需启动，看门狗本身不启动内核。
+        只在被中断的那次执行仍在运行时关闭，中断后很快开始的新执行不受影响
+        """
+        deadline = time.time() + self.interrupt_timeout
+        while time.time() < deadline:
+            if not self.is_running or self._execution_id != execution_id or self.km is not km:
+                return
+            time.sleep(0.1)
+        with self._lifecycle_lock:
+            if not self.is_running or self._execution_id != execution_id or self.km is not km:
+                return
+            logging.warning("[PythonLanguage]Interrupt timed out, force stopping kernel")
+            self.stop()
+
     def run(self, code: str):
         message = queue.Queue()
 
         excecution_thread = threading.Thread(target=self._execute_jupyter, args=(code, message))
         excecution_thread.daemon = True
         excecution_thread.start()
+        self.worker = excecution_thread
 
         return message
 
     def _execute_jupyter(self, code: str, message: queue.Queue):
+        with self._lock:
+            self._execution_id += 1
+            self.is_running = True
+            self.should_stop = False
+            self.start_time = time.time()
+            self.elapsed_time = 0
+            try:
+                self._execute_in_kernel(code, message)
+            finally:
+                self.elapsed_time = time.time() - self.start_time
+                self.start_time = None
+                self.current_msg_id = None
+                self.is_running = False
+                # 显式的结束信号，消费方据此停止读取，不会丢失尾部输出
+                message.put({"type": "end"})
+
+    def _execute_in_kernel(self, code: str, message: queue.Queue):
         self.start()
 
-        if self.km.is_alive() is False:
+        if not self.is_alive():
             message.put({"type": "error", "content": "[PythonLanguage]Faild to start Jupyter kernel"})
             return
 
@@ -78,54 +158,91 @@ class PythonLanguage(BaseLanguage):
         if "matplotlib" in code and "%matplotlib" not in code:
             code = "%matplotlib inline\n" + code
 
+        kc = self.kc
         try:
-            self.current_msg_id=self.kc.execute(code)
+            self.current_msg_id = kc.execute(code)
         except Exception as e:
             message.put({"type": "error", "content": f"[PythonLanguage]Error while executing code: {e}"})
             logging.error("[PythonLanguage]Error while executing code: %s", e)
-        print("[PythonLanguage]start runing...")
+            return
         while True:
-            if self.should_stop:
-                self.km.interrupt_kernel()
-
+            if self.kc is not kc:
+                # 内核在执行过程中被强制关闭
+                message.put({"type": "error", "content": "[PythonLanguage]Kernel was stopped after interrupt, it will be restarted on next run, session state was lost"})
+                return
             try:
-                msg = self.kc.get_iopub_msg(timeout=1)
+                # 阻塞等待下一条消息，超时仅用于检测内核是否崩溃
+                msg = kc.get_iopub_msg(timeout=1)
             except queue.Empty:
+                if self.kc is kc and not self.is_alive():
+                    # 内核崩溃，清理后下次执行会自动重启
+                    message.put({"type": "error", "content": "[PythonLanguage]Jupyter kernel died, it will be restarted on next run"})
+                    logging.error("[PythonLanguage]Kernel died during execution")
+                    self.stop()
+                    return
                 continue
-
-            if msg['parent_header'].get('msg_id') != self.current_msg_id:
-                continue
-
-            msg_type = msg['msg_type']
-            content = msg['content']
-
-            print("get_one_msg")
-
-            if msg_type == "stream":
-                message.put({"type": "text", "content": content['text']})
-
-            elif msg_type == "error":
-                content = "\n".join(content["traceback"])
-                # 移除颜色标识
-                ansi_escape = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
-                content = ansi_escape.sub("", content)
-                message.put({"type": "text", "content": content})
-
-            elif msg_type in ["display_data", "execute_result"]:
-                data = content["data"]
-                if "image/png" in data:
-                    message.put({"type": "image/png", "content": data["image/png"]})
-                elif "image/jpeg" in data:
-                    message.put({"type": "image/jpeg", "content": data["image/jpeg"]})
-                elif "text/html" in data:
-                    message.put({"type": "html", "content": data["text/html"]})
-                elif "text/plain" in data:
-                    message.put({"type": "text", "content": data["text/plain"]})
-                elif "application/javascript" in data:
-                    message.put({"type": "javascript", "content": data["application/javascript"]})
-
-            elif msg_type == 'status':
-                if content['execution_state'] == 'idle':
+            except Exception as e:
+                if self.kc is not kc:
+                    continue
+                message.put({"type": "error", "content": f"[PythonLanguage]Error while reading kernel output: {e}"})
+                logging.error("[PythonLanguage]Error while reading kernel output: %s", e)
+                return
+
+            # 取出所有已到达的消息，连续的stream输出合并为一个chunk
+            chunk = []
+            chunk_size = 0
+            finished = False
+            while True:
+                if msg['parent_header'].get('msg_id') == self.current_msg_id:
+                    if msg['msg_type'] == "stream":
+                        chunk.append(msg['content']['text'])
+                        chunk_size += len(chunk[-1])
+                    else:
+                        self._flush_chunk(chunk, message)
+                        chunk_size = 0
+                        finished = self._handle_msg(msg, message)
+                if finished or chunk_size >= self.CHUNK_SIZE:
+                    break
+                try:
+                    msg = kc.get_iopub_msg(timeout=0)
+                except Exception:
                     break
-        print("[PythonLanguage]finished.")
-        self.stop()
+            self._flush_chunk(chunk, message)
+            if finished:
+                return
+
+    @staticmethod
+    def _flush_chunk(chunk: list, message: queue.Queue):
+        if chunk:
+            message.put({"type": "text", "content": "".join(chunk)})
+            chunk.clear()
+
+    @staticmethod
+    def _handle_msg(msg: dict, message: queue.Queue) -> bool:
+        """处理非stream消息，返回执行是否已结束"""
+        msg_type = msg['msg_type']
+        content = msg['content']
+
+        if msg_type == "error":
+            content = "\n".join(content["traceback"])
+            # 移除颜色标识
+            content = ANSI_ESCAPE.sub("", content)
+            message.put({"type": "text", "content": content + "\n"})
+
+        elif msg_type in ["display_data", "execute_result"]:
+            data = content["data"]
+            if "image/png" in data:
+                message.put({"type": "image/png", "content": data["image/png"]})
+            elif "image/jpeg" in data:
+                message.put({"type": "image/jpeg", "content": data["image/jpeg"]})
+            elif "text/html" in data:
+                message.put({"type": "html", "content": data["text/html"]})
+            elif "text/plain" in data:
+                message.put({"type": "text", "content": data["text/plain"] + "\n"})
+            elif "application/javascript" in data:
+                message.put({"type": "javascript", "content": data["application/javascript"]})
+
+        elif msg_type == 'status':
+            if content['execution_state'] == 'idle':
+                return True
+        return False
@@ -0,0 +1,244 @@
+import codecs
+import io
+import locale
+import logging
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+from ..base_language import BaseLanguage
+
+
+class ShellLanguage(BaseLanguage):
+    """
+    常驻Shell会话的基类。
+
+    每个会话只启动一个Shell进程，命令通过stdin逐条发送：代码先写入临时脚本，
+    再在Shell中执行该脚本并输出结束标记（含退出码），读取到标记即表示命令结束。
+    工作目录、环境变量在多次调用之间保留；中断只向进程组发送SIGINT，Shell本身继续存活。
+    SIGINT在interrupt_timeout秒内没有结束命令（例如命令忽略了SIGINT）时，结束整个进程组，
+    下次执行时重新启动Shell（会话状态丢失）。
+    子类需要实现get_command()、get_init_script()和wrap_command()。
+    """
+
+    name = "ShellLanguage"
+    script_suffix = ".sh"
+    # 临时脚本的编码
+    script_encoding = "utf-8"
+    # 单次读取输出的最大字节数
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, interrupt_timeout: float = 3):
+        super().__init__()
+        self.process = None
+        # 中断后超过该时间仍未读到结束标记则强制结束Shell
+        self.interrupt_timeout = interrupt_timeout
+        # 每次执行的编号，看门狗据此判断超时的是否仍是被中断的那次执行
+        self._execution_id = 0
+        self._killed_execution = None
+        self.marker = f"__ARGUS_DONE_{uuid.uuid4().hex}__"
+        self.script_dir = None
+        self.encoding = locale.getpreferredencoding(False)
+        # 保证同一时间只有一条命令在Shell中执行
+        self._lock = threading.Lock()
+
+    def get_command(self) -> list:
+        """启动Shell进程的命令行"""
+        raise NotImplementedError(f"[{self.name}]Subclasses must implement this method")
+
+    def get_init_script(self) -> str:
+        """Shell启动后执行的初始化脚本"""
+        return ""
+
+    def wrap_command(self, script_path: str) -> str:
+        """生成执行脚本并输出 `{marker}:{退出码}` 的单行命令"""
+        raise NotImplementedError(f"[{self.name}]Subclasses must implement this method")
+
+    def is_alive(self):
+        """Shell进程是否存活"""
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        """启动Shell进程（已存活则直接复用）"""
+        if self.is_alive():
+            return
+        self.stop()
+        self.script_dir = tempfile.mkdtemp(prefix="argus_shell_")
+
+        popen_kwargs = {}
+        if os.name == "nt":
+            popen_kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            # 独立进程组，中断时向整个组发送SIGINT
+            popen_kwargs["start_new_session"] = True
+
+        self.process = subprocess.Popen(
+            self.get_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            **popen_kwargs
+        )
+        init_script = self.get_init_script()
+        if init_script:
+            self._send(init_script)
+        logging.info(f"[{self.name}]Started shell process {self.process.pid}")
+
+    def stop(self):
+        """关闭Shell进程（会话结束时调用）"""
+        process, self.process = self.process, None
+        if self.script_dir:
+            shutil.rmtree(self.script_dir, ignore_errors=True)
+            self.script_dir = None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except Exception:
+            pass
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        logging.info(f"[{self.name}]Stopped shell process")
+
+    def _send(self, command: str):
+        self.process.stdin.write((command + "\n").encode(self.encoding, errors="replace"))
+        self.process.stdin.flush()
+
+    def reset(self):
+        """显式重置：丢弃工作目录、环境变量等会话状态并启动新Shell"""
+        self.interrupt()
+        with self._lock:
+            self.stop()
+            self.start()
+
+    def run(self, code: str):
+        message = queue.Queue()
+        execution_thread = threading.Thread(target=self._execute, args=(code, message))
+        execution_thread.daemon = True
+        execution_thread.start()
+        self.worker = execution_thread
+        return message
+
+    def _execute(self, code: str, message: queue.Queue):
+        with self._lock:
+            self._execution_id += 1
+            self.is_running = True
+            self.start_time = time.time()
+            self.should_stop = False
+            try:
+                self._execute_in_shell(code, message)
+            except Exception as e:
+                message.put({"type": "error", "content": f"[{self.name}]Error: {e}"})
+            finally:
+                self.elapsed_time = time.time() - self.start_time
+                self.start_time = None
+                self.is_running = False
+                # 显式的结束信号，消费方据此停止读取，不会丢失尾部输出
+                message.put({"type": "end"})
+
+    def _execute_in_shell(self, code: str, message: queue.Queue):
+        self.start()
+        process = self.process
+
+        script_path = os.path.join(self.script_dir, f"command{self.script_suffix}")
+        with open(script_path, "w", encoding=self.script_encoding) as f:
+            f.write(code)
+            if not code.endswith("\n"):
+                f.write("\n")
+
+        self._send(self.wrap_command(script_path))
+
+        # 按块读取已到达的全部输出（而不是逐行），大量输出时合并为少量chunk
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(self.encoding)(errors="replace"), translate=True
+        )
+        # 保留可能是结束标记前缀的尾部字符，避免标记被拆分到两个块中
+        keep = len(self.marker) - 1
+        buffer = ""
+        # 已输出内容的最后一个字符，用于保证退出码单独成行
+        last = "\n"
+        while True:
+            data = process.stdout.read1(self.CHUNK_SIZE)
+            if not data:
+                break
+            buffer += decoder.decode(data)
+            index = buffer.find(self.marker)
+            if index != -1:
+                end = buffer.find("\n", index)
+                if end == -1:
+                    # 退出码所在行尚未读完
+                    continue
+                # 结束标记之前可能有未换行的输出
+                if index > 0:
+                    last = buffer[index - 1]
+                    message.put({"type": "text", "content": buffer[:index]})
+                return_code = buffer[index + len(self.marker):end].strip().lstrip(":")
+                self._put_return_code(return_code, last, message)
+                return
+            if len(buffer) > keep:
+                last = buffer[-keep - 1]
+                message.put({"type": "text", "content": buffer[:-keep]})
+                buffer = buffer[-keep:]
+
+        buffer += decoder.decode(b"", final=True)
+        if buffer:
+            last = buffer[-1]
+            message.put({"type": "text", "content": buffer})
+        # 未读到结束标记Shell就退出了（例如代码中调用了exit），下次执行时会重新启动
+        self._put_return_code(process.wait(), last, message)
+        if self._killed_execution == self._execution_id:
+            message.put({"type": "error", "content": f"[{self.name}]Shell was restarted after interrupt, session state was lost"})
+        if self.process is process:
+            self.process = None
+
+    @staticmethod
+    def _put_return_code(return_code, last: str, message: queue.Queue):
+        prefix = "" if last == "\n" else "\n"
+        message.put({"type": "text", "content": f"{prefix}Return code: {return_code}"})
+
+    def interrupt(self):
+        """中断正在运行的命令，Shell进程保持存活；中断无效时强制结束Shell"""
+        super().interrupt()
+        process = self.process
+        if not (self.is_running and self.is_alive()):
+            return
+        try:
+            if os.name == "nt":
+                # Windows下无法只中断前台命令，只能结束整个Shell（会话状态丢失）
+                process.terminate()
+            else:
+                os.killpg(os.getpgid(process.pid), signal.SIGINT)
+        except Exception as e:
+            logging.error(f"[{self.name}]Error interrupting: {e}")
+        watchdog = threading.Thread(target=self._interrupt_watchdog, args=(self._execution_id, process))
+        watchdog.daemon = True
+        watchdog.start()
+
+    def _interrupt_watchdog(self, execution_id: int, process: subprocess.Popen):
+        """等待中断生效，超时则结束Shell所在的整个进程组（执行循环读到EOF后结束，下次执行重新启动Shell）"""
+        deadline = time.time() + self.interrupt_timeout
+        while time.time() < deadline:
+            if not self.is_running or self._execution_id != execution_id:
+                return
+            time.sleep(0.1)
+        if process.poll() is not None:
+            return
+        logging.warning(f"[{self.name}]Interrupt timed out, killing shell process {process.pid}")
+        self._killed_execution = execution_id
+        try:
+            if os.name == "nt":
+                process.kill()
+            else:
+                os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+        except Exception as e:
+            logging.error(f"[{self.name}]Error killing shell: {e}")
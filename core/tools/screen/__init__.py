@@ -1,4 +1,5 @@
 # 屏幕工具模块
+from .encoder import ScreenshotEncoder
 from .screen import Screen, screen, create_screen_tools
 
-__all__ = ['Screen', 'screen', 'create_screen_tools']
+__all__ = ['Screen', 'screen', 'create_screen_tools', 'ScreenshotEncoder']
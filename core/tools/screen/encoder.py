@@ -0,0 +1,144 @@
+"""
+截图编码
+把截屏缩放并编码为 base64，缩放算法、格式和质量可配置：
+- 缩放: lanczos / bicubic / bilinear / nearest，或 fast（先用 reduce() 按整数倍快速缩小，再用 bilinear 缩放到目标尺寸）
+- 格式: png（可调压缩级别）/ jpeg / webp（Pillow 不支持 webp 时退回 jpeg）
+- submit() 在后台线程编码（Pillow 的缩放和编码会释放 GIL），调用方可以同时做其他工作
+
+默认 png + fast + 压缩级别 1（无损，1080p 下耗时约为 lanczos + 默认压缩级别的一半），
+可由环境变量 SCREENSHOT_FORMAT / SCREENSHOT_QUALITY / SCREENSHOT_RESAMPLE / SCREENSHOT_PNG_COMPRESS 修改
+"""
+
+import base64
+import io
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, features
+
+RESAMPLE_FILTERS = {
+    "lanczos": Image.Resampling.LANCZOS,
+    "bicubic": Image.Resampling.BICUBIC,
+    "bilinear": Image.Resampling.BILINEAR,
+    "nearest": Image.Resampling.NEAREST,
+}
+FORMATS = ("png", "jpeg", "webp")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshot-encoder")
+        return _executor
+
+
+def smart_resize(height: int, width: int, max_size: int = 1024):
+    """等比缩放到最大边长不超过 max_size，返回 (new_height, new_width)"""
+    if height <= max_size and width <= max_size:
+        return height, width
+    scale = max_size / max(height, width)
+    return int(height * scale), int(width * scale)
+
+
+def resize_image(image: Image.Image, size, resample: str = "lanczos") -> Image.Image:
+    """按指定算法缩放；fast 先用 reduce()（或 JPEG 源图的 draft）按整数倍缩小，再精确缩放"""
+    if image.size == tuple(size):
+        return image
+    if resample == "fast":
+        if image.format == "JPEG":
+            image.draft(image.mode, size)
+        factor = min(image.size[0] // size[0], image.size[1] // size[1])
+        if factor >= 2:
+            image = image.reduce(factor)
+        return image.resize(size, Image.Resampling.BILINEAR)
+    return image.resize(size, RESAMPLE_FILTERS[resample])
+
+
+class ScreenshotEncoder:
+    """
+    Args:
+        format: "png"、"jpeg" 或 "webp"
+        quality: jpeg / webp 的质量（1-100）
+        resample: RESAMPLE_FILTERS 中的算法或 "fast"
+        png_compress_level: png 的 zlib 压缩级别（0-9），越低越快、文件越大
+    """
+
+    def __init__(
+        self,
+        format: Optional[str] = None,
+        quality: Optional[int] = None,
+        resample: Optional[str] = None,
+        png_compress_level: Optional[int] = None
+    ):
+        format = (format or os.getenv("SCREENSHOT_FORMAT", "png")).lower()
+        if format not in FORMATS:
+            raise ValueError(f"[Screen]不支持的格式: {format}")
+        if format == "webp" and not features.check("webp"):
+            logging.warning("[Screen]Pillow 不支持 webp，改用 jpeg")
+            format = "jpeg"
+        resample = (resample or os.getenv("SCREENSHOT_RESAMPLE", "fast")).lower()
+        if resample != "fast" and resample not in RESAMPLE_FILTERS:
+            raise ValueError(f"[Screen]不支持的缩放算法: {resample}")
+        self.format = format
+        self.quality = quality if quality is not None else int(os.getenv("SCREENSHOT_QUALITY", "85"))
+        self.resample = resample
+        self.png_compress_level = (
+            png_compress_level if png_compress_level is not None else int(os.getenv("SCREENSHOT_PNG_COMPRESS", "1"))
+        )
+
+    @property
+    def mime(self) -> str:
+        return f"image/{self.format}"
+
+    def encode_bytes(
+        self,
+        image: Image.Image,
+        resize_factor: Optional[float] = None,
+        size: Optional[Tuple[int, int]] = None
+    ) -> bytes:
+        """缩放并编码：指定 size 时缩放到该尺寸，否则按 resize_factor，都为 None 时缩放到最大边长 1024"""
+        width, height = image.size
+        if size is not None:
+            new_width, new_height = size
+        elif resize_factor is None:
+            new_height, new_width = smart_resize(height, width)
+        else:
+            new_width, new_height = int(width * resize_factor), int(height * resize_factor)
+        image = resize_image(image, (new_width, new_height), self.resample)
+
+        buffer = io.BytesIO()
+        if self.format == "png":
+            image.save(buffer, format="png", compress_level=self.png_compress_level)
+        else:
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            image.save(buffer, format=self.format, quality=self.quality)
+        return buffer.getvalue()
+
+    def encode(
+        self,
+        image: Image.Image,
+        resize_factor: Optional[float] = None,
+        size: Optional[Tuple[int, int]] = None
+    ) -> Dict[str, str]:
+        """返回 {"type": MIME, "content": base64}"""
+        return {
+            "type": self.mime,
+            "content": base64.b64encode(self.encode_bytes(image, resize_factor, size)).decode("utf-8")
+        }
+
+    def submit(
+        self,
+        image: Image.Image,
+        resize_factor: Optional[float] = None,
+        size: Optional[Tuple[int, int]] = None
+    ) -> Future:
+        """在后台线程编码，返回结果为 encode() 字典的 Future"""
+        return _get_executor().submit(self.encode, image, resize_factor, size)
@@ -3,45 +3,26 @@
 包装原有的屏幕截图功能为工具
 """
 
-import base64
-import io
 import ctypes
+import logging
 from ctypes import windll
 from PIL import Image, ImageGrab
 from ..base_tool import FunctionTool
+from ..window.window import get_window_info, get_foreground_window_info
+from .encoder import ScreenshotEncoder, smart_resize
 
 
-def smart_resize(height: int, width: int, max_size: int = 1024):
-    """
-    智能调整图片尺寸
-    
-    Args:
-        height: 原始高度
-        width: 原始宽度  
-        max_size: 最大边长
-        
-    Returns:
-        (new_height, new_width): 调整后的尺寸
-    """
-    # 如果尺寸已经小于等于最大值，直接返回
-    if height <= max_size and width <= max_size:
-        return height, width
-    
-    # 计算缩放比例，保持宽高比
-    if height > width:
-        scale = max_size / height
-    else:
-        scale = max_size / width
-    
-    new_height = int(height * scale)
-    new_width = int(width * scale)
-    
-    return new_height, new_width
-
+def clip_region(region, width: int, height: int):
+    """把 (left, top, width, height) 区域裁剪到屏幕 (0, 0, width, height) 内，没有交集时返回 None"""
+    left, top = max(0, region[0]), max(0, region[1])
+    right, bottom = min(width, region[0] + region[2]), min(height, region[1] + region[3])
+    if right <= left or bottom <= top:
+        return None
+    return left, top, right - left, bottom - top
 
 
-def capture_screen_win32():
-    """使用Win32 API捕获主屏幕"""
+def capture_screen_win32(region=None):
+    """使用Win32 API捕获主屏幕，指定 region=(left, top, width, height) 时只捕获该区域（裁剪到屏幕内）"""
     # Simply capture primary screen
     user32 = windll.user32
     gdi32 = windll.gdi32
@@ -58,6 +39,10 @@ def capture_screen_win32():
     height = user32.GetSystemMetrics(1) # SM_CYSCREEN
     x = 0
     y = 0
+    if region is not None:
+        clipped = clip_region(region, width, height)
+        if clipped is not None:
+            x, y, width, height = clipped
 
     hwnd = 0
     hwndDC = user32.GetWindowDC(hwnd)
@@ -104,7 +89,7 @@ def capture_screen_win32():
     gdi32.DeleteDC(mfcDC)
     user32.ReleaseDC(hwnd, hwndDC)
 
-    return image, 0, 0
+    return image, x, y
 
 
 class Screen:
@@ -113,57 +98,55 @@ class Screen:
     def __init__(self):
         pass
 
-    def screenshot_base64(
-        self, 
-        resize_factor: float = None, 
-        format: str = "png", 
-        quality: int = 100
-    ):
-        """获取截屏并转换为base64"""
+    def grab(self, region=None):
+        """获取原始分辨率的截屏，返回 (image, left, top)；region=(left, top, width, height) 时只截取该区域"""
         try:
-            image, left, top = capture_screen_win32()
+            return capture_screen_win32(region)
         except Exception as e:
             print(f"[Screen] Win32失败，回退到ImageGrab: {e}")
             image = ImageGrab.grab() # Default grabs all screens or primary
             # Ensure we are consistent if multi-mon support is removed, standard PIL grab might grab all.
             # But "Delete multi-display related code" usually implies simplification.
-            left, top = 0, 0
+            clipped = clip_region(region, *image.size) if region is not None else None
+            if clipped is None:
+                return image, 0, 0
+            left, top, width, height = clipped
+            return image.crop((left, top, left + width, top + height)), left, top
+
+    def grab_window(self, title: str = None):
+        """
+        截取窗口区域（title 为 None 时为前台窗口，否则按标题模糊匹配），返回 (image, left, top)
+        找不到窗口、窗口最小化、没有标题（桌面/任务栏）或不在主屏幕内时回退到整屏
+        """
+        info = get_foreground_window_info() if title is None else get_window_info(title)
+        if not info.get('found') or info.get('is_minimized') or not info.get('title'):
+            logging.info("[Screen] 窗口不可用，截取整屏: %s", info.get('message') or info.get('error') or info.get('title'))
+            return self.grab()
+        return self.grab((info['left'], info['top'], info['width'], info['height']))
 
-        origin_width = image.size[0]
-        origin_height = image.size[1]
-        
-        if resize_factor is None:
-            new_height, new_width = smart_resize(origin_height, origin_width)
-        else:
-            new_width = int(origin_width * resize_factor)
-            new_height = int(origin_height * resize_factor)
-        
-        image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-        img_byte_arr = io.BytesIO()
-        format = format.lower()
-        if format == "png":
-            image.save(img_byte_arr, format=format)
-        elif format == "jpeg":
-            image.save(img_byte_arr, format=format, quality=quality)
+    def screenshot_base64(
+        self, 
+        resize_factor: float = None, 
+        format: str = "png", 
+        quality: int = 100,
+        encoder: ScreenshotEncoder = None,
+        window: str = None
+    ):
+        """
+        获取截屏并转换为base64（指定 encoder 时忽略 format / quality）
+        window: 只截取该窗口（"foreground" 为前台窗口，其他值按标题匹配），None 时截取整屏
+        """
+        if window:
+            image, left, top = self.grab_window(None if window == "foreground" else window)
         else:
-            raise ValueError(f"[Screen]不支持的格式: {format}")
-
-        img_bytes = img_byte_arr.getvalue()
-        base64_encoded = base64.b64encode(img_bytes).decode('utf-8')
-
-        return {
-            "type": f"image/{format}", 
-            "content": base64_encoded
-        }, origin_width, origin_height, left, top
+            image, left, top = self.grab()
+        if encoder is None:
+            encoder = ScreenshotEncoder(format=format, quality=quality, resample="lanczos", png_compress_level=6)
+        return encoder.encode(image, resize_factor), image.size[0], image.size[1], left, top
 
     def screenshot_pil(self, resize_factor: float = 0.5):
         """获取PIL格式的截屏"""
-        try:
-            image, left, top = capture_screen_win32()
-        except Exception:
-            image = ImageGrab.grab()
-            left, top = 0, 0
+        image, left, top = self.grab()
             
         origin_width = image.size[0]
         origin_height = image.size[1]
@@ -177,6 +160,11 @@ class Screen:
         image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
         return image, origin_width, origin_height, left, top
 
+    def capture_low_res(self, reduce: int = 8):
+        """获取低分辨率灰度截屏（用于检测画面是否稳定，不做编码）"""
+        image, _, _ = self.grab()
+        return image.reduce(reduce).convert("L")
+
 
 # 创建全局实例
 screen = Screen()
@@ -190,12 +178,13 @@ def create_screen_tools():
     tools = []
     
     # Screenshot Tool
-    def screenshot_tool_func(resize_factor: float = 0.8, format: str = "png"):
+    def screenshot_tool_func(resize_factor: float = 0.8, format: str = "png", window: str = None):
         """截屏工具函数"""
         try:
             result, width, height, left, top = screen.screenshot_base64(
                 resize_factor=resize_factor,
-                format=format
+                format=format,
+                window=window
             )
             return {
                 "success": True,
@@ -227,9 +216,13 @@ def create_screen_tools():
                 },
                 "format": {
                     "type": "string",
-                    "enum": ["png", "jpeg"],
+                    "enum": ["png", "jpeg", "webp"],
                     "description": "图片格式",
                     "default": "png"
+                },
+                "window": {
+                    "type": "string",
+                    "description": "只截取该窗口：foreground 为前台窗口，其他值按窗口标题模糊匹配；找不到时截取整屏。不指定时截取整屏"
                 }
             },
             "required": []
@@ -0,0 +1,228 @@
+"""
+工具输出限长
+超出预算的输出只保留开头和结尾，完整内容写入会话的artifact文件，模型可通过read_output工具分页查看
+"""
+
+import collections
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, Any, Optional
+
+
+# 单个工具结果的默认字符预算（约2500 tokens），可通过环境变量 TOOL_OUTPUT_MAX_CHARS 配置
+DEFAULT_MAX_CHARS = 10000
+
+
+def get_output_budget() -> int:
+    """获取单个工具结果的字符预算"""
+    try:
+        return max(200, int(os.getenv("TOOL_OUTPUT_MAX_CHARS", DEFAULT_MAX_CHARS)))
+    except ValueError:
+        return DEFAULT_MAX_CHARS
+
+
+class ArtifactStore:
+    """
+    会话级artifact文件存储
+    目录在首次写入时创建，cleanup()时删除
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def new_file(self, prefix: str = "output"):
+        """
+        创建新的artifact文件
+
+        Returns:
+            (ref, 可写文件对象)
+        """
+        with self._lock:
+            if self.root is None or not os.path.isdir(self.root):
+                self.root = tempfile.mkdtemp(prefix="argus_artifacts_")
+            self._counter += 1
+            ref = f"{prefix}_{self._counter}.txt"
+        return ref, open(os.path.join(self.root, ref), "w", encoding="utf-8")
+
+    def get_path(self, ref: str) -> Optional[str]:
+        """获取artifact路径，只允许访问本会话目录下的文件"""
+        if not self.root or not ref:
+            return None
+        path = os.path.join(self.root, os.path.basename(ref))
+        return path if os.path.isfile(path) else None
+
+    def read(self, ref: str, start_line: int = 1, max_lines: int = 200, max_chars: Optional[int] = None) -> Dict[str, Any]:
+        """
+        分页读取artifact文件
+
+        Args:
+            ref: artifact引用
+            start_line: 起始行号（从1开始）
+            max_lines: 最多读取的行数
+            max_chars: 最多读取的字符数，默认为单个工具结果的预算
+
+        Returns:
+            包含content、start_line、end_line、total_lines、has_more的结果字典
+        """
+        path = self.get_path(ref)
+        if not path:
+            return {"success": False, "error": f"artifact不存在: {ref}"}
+        if max_chars is None:
+            max_chars = get_output_budget()
+        start_line = max(1, start_line)
+
+        lines = []
+        size = 0
+        end_line = start_line - 1
+        total_lines = 0
+        full = False
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            # 逐行扫描，内存占用只与单页大小有关
+            for line_no, line in enumerate(f, 1):
+                total_lines = line_no
+                if line_no < start_line or full:
+                    continue
+                if len(lines) >= max_lines or size + len(line) > max_chars:
+                    if not lines:
+                        # 单行超长时截断该行
+                        lines.append(line[:max_chars])
+                        end_line = line_no
+                    full = True
+                    continue
+                lines.append(line)
+                size += len(line)
+                end_line = line_no
+
+        return {
+            "success": True,
+            "ref": ref,
+            "content": "".join(lines),
+            "start_line": start_line,
+            "end_line": end_line,
+            "total_lines": total_lines,
+            "has_more": end_line < total_lines
+        }
+
+    def cleanup(self):
+        """删除本会话的所有artifact"""
+        with self._lock:
+            if self.root:
+                shutil.rmtree(self.root, ignore_errors=True)
+                self.root = None
+
+
+class BoundedOutput:
+    """
+    限长的流式输出缓冲区
+
+    内存中只保留开头和结尾各约一半预算的内容；总长度超出预算时，
+    完整输出写入artifact文件（之后的内容直接追加到文件），内存占用与输出总量无关。
+    """
+
+    def __init__(self, store: ArtifactStore, max_chars: Optional[int] = None, prefix: str = "output"):
+        self.store = store
+        self.max_chars = max_chars or get_output_budget()
+        self.head_limit = self.max_chars // 2
+        self.tail_limit = self.max_chars - self.head_limit
+        self.prefix = prefix
+
+        self.total_chars = 0
+        self.total_lines = 0
+        self._ends_with_newline = True
+        self.ref = None
+        self._head = []
+        self._head_size = 0
+        self._tail = collections.deque()
+        self._tail_size = 0
+        self._file = None
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_chars > self.max_chars
+
+    def write(self, text: str):
+        if not text:
+            return
+        self.total_chars += len(text)
+        self.total_lines += text.count("\n")
+        self._ends_with_newline = text.endswith("\n")
+        if self._file is not None:
+            self._file.write(text)
+
+        rest = text
+        if self._head_size < self.head_limit:
+            take = rest[:self.head_limit - self._head_size]
+            self._head.append(take)
+            self._head_size += len(take)
+            rest = rest[len(take):]
+        if rest:
+            self._tail.append(rest)
+            self._tail_size += len(rest)
+
+        if self._file is None and self.truncated:
+            self._spill()
+
+        # 结尾只保留tail_limit个字符
+        while self._tail_size > self.tail_limit:
+            excess = self._tail_size - self.tail_limit
+            first = self._tail[0]
+            if len(first) <= excess:
+                self._tail.popleft()
+                self._tail_size -= len(first)
+            else:
+                self._tail[0] = first[excess:]
+                self._tail_size -= excess
+
+    def _spill(self):
+        """首次超出预算：此前的内容尚未丢弃，全部写入artifact文件"""
+        try:
+            self.ref, self._file = self.store.new_file(self.prefix)
+            self._file.write("".join(self._head))
+            self._file.write("".join(self._tail))
+        except OSError:
+            self.ref, self._file = None, None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def getvalue(self) -> str:
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        if not self.truncated:
+            return head + tail
+
+        # 尽量在行边界截断，便于阅读
+        cut = head.rfind("\n")
+        if cut >= len(head) // 2:
+            head = head[:cut + 1]
+        cut = tail.find("\n")
+        if 0 <= cut < len(tail) // 2:
+            tail = tail[cut + 1:]
+
+        omitted = self.total_chars - len(head) - len(tail)
+        total_lines = self.total_lines + (0 if self._ends_with_newline else 1)
+        if self.ref:
+            notice = (f"\n...[输出过长，已省略{omitted}个字符。完整输出共{total_lines}行/{self.total_chars}个字符，"
+                      f"已保存为 {self.ref}，可使用 read_output 工具分页查看]...\n")
+        else:
+            notice = f"\n...[输出过长，已省略{omitted}个字符]...\n"
+        return head + notice + tail
+
+
+def bound_text(text: str, store: ArtifactStore, max_chars: Optional[int] = None, prefix: str = "result"):
+    """
+    对完整文本做限长
+
+    Returns:
+        (限长后的文本, artifact引用或None)
+    """
+    output = BoundedOutput(store, max_chars, prefix)
+    output.write(text)
+    output.close()
+    return output.getvalue(), output.ref
@@ -3,7 +3,9 @@
 提供窗口列表、查找、调整大小、移动、最大化最小化等功能
 """
 
+import os
 import sys
+import ctypes
 import logging
 from typing import List, Dict, Any, Optional
 from ..base_tool import FunctionTool
@@ -95,28 +97,31 @@ class WindowManager:
                     'found': False,
                     'message': f'未找到窗口: {title}'
                 }
-            
-            rect = win32gui.GetWindowRect(hwnd)
-            left, top, right, bottom = rect
-            
-            placement = win32gui.GetWindowPlacement(hwnd)
-            is_minimized = (placement[1] == win32con.SW_SHOWMINIMIZED)
-            is_maximized = (placement[1] == win32con.SW_SHOWMAXIMIZED)
-            is_active = (win32gui.GetForegroundWindow() == hwnd)
-            
+            return self._window_info(hwnd)
+        except Exception as e:
             return {
-                'success': True,
-                'found': True,
-                'hwnd': hwnd,
-                'title': win32gui.GetWindowText(hwnd),
-                'left': left,
-                'top': top,
-                'width': right - left,
-                'height': bottom - top,
-                'is_minimized': is_minimized,
-                'is_maximized': is_maximized,
-                'is_active': is_active
+                'success': False,
+                'error': str(e),
+                'error_type': type(e).__name__
             }
+    
+    def get_foreground_window_info(self, exclude_own: bool = True) -> Dict[str, Any]:
+        """
+        获取前台窗口详细信息
+        exclude_own 时前台窗口如果是本进程的窗口（Argus 自己的界面）或启动它的控制台窗口，
+        则按 Z 序取其后第一个可见、有标题且未最小化的其他窗口
+        """
+        try:
+            hwnd = win32gui.GetForegroundWindow()
+            if hwnd and exclude_own and self._is_own_window(hwnd):
+                hwnd = self._next_window(hwnd)
+            if not hwnd:
+                return {
+                    'success': False,
+                    'found': False,
+                    'message': '没有可用的前台窗口'
+                }
+            return self._window_info(hwnd)
         except Exception as e:
             return {
                 'success': False,
@@ -124,6 +129,51 @@ class WindowManager:
                 'error_type': type(e).__name__
             }
     
+    def _is_own_window(self, hwnd: int) -> bool:
+        """是否为本进程的窗口或本进程所在的控制台窗口"""
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        if pid == os.getpid():
+            return True
+        console = ctypes.windll.kernel32.GetConsoleWindow()
+        return bool(console) and hwnd == console
+    
+    def _next_window(self, hwnd: int) -> Optional[int]:
+        """Z 序中 hwnd 之后第一个可见、有标题、未最小化且不属于本进程的窗口"""
+        hwnd = win32gui.GetWindow(hwnd, win32con.GW_HWNDNEXT)
+        while hwnd:
+            if (
+                win32gui.IsWindowVisible(hwnd)
+                and not win32gui.IsIconic(hwnd)
+                and win32gui.GetWindowText(hwnd)
+                and not self._is_own_window(hwnd)
+            ):
+                return hwnd
+            hwnd = win32gui.GetWindow(hwnd, win32con.GW_HWNDNEXT)
+        return None
+    
+    def _window_info(self, hwnd: int) -> Dict[str, Any]:
+        rect = win32gui.GetWindowRect(hwnd)
+        left, top, right, bottom = rect
+        
+        placement = win32gui.GetWindowPlacement(hwnd)
+        is_minimized = (placement[1] == win32con.SW_SHOWMINIMIZED)
+        is_maximized = (placement[1] == win32con.SW_SHOWMAXIMIZED)
+        is_active = (win32gui.GetForegroundWindow() == hwnd)
+        
+        return {
+            'success': True,
+            'found': True,
+            'hwnd': hwnd,
+            'title': win32gui.GetWindowText(hwnd),
+            'left': left,
+            'top': top,
+            'width': right - left,
+            'height': bottom - top,
+            'is_minimized': is_minimized,
+            'is_maximized': is_maximized,
+            'is_active': is_active
+        }
+    
     def resize_window(self, title: str, width: int, height: int) -> Dict[str, Any]:
         """调整窗口大小"""
         try:
@@ -313,6 +363,12 @@ def get_window_info(title: str):
         return _window_manager.get_window_info(title)
     return {'success': False, 'error': 'WindowManager未初始化'}
 
+def get_foreground_window_info(exclude_own: bool = True):
+    """获取前台窗口信息（默认跳过 Argus 自己的窗口和控制台窗口）"""
+    if _window_manager:
+        return _window_manager.get_foreground_window_info(exclude_own)
+    return {'success': False, 'error': 'WindowManager未初始化'}
+
 def resize(title: str, width: int, height: int):
     """调整窗口大小"""
     if _window_manager:
@@ -0,0 +1,60 @@
+"""
+MemoryManager 分层视觉记忆测试
+"""
+
+import base64
+import io
+import random
+
+import pytest
+
+from core.agents.agent_memory.memory import MemoryManager
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def make_frame(index: int, size=(640, 360)) -> str:
+    rng = random.Random(index)
+    image = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    for _ in range(6):
+        x, y = rng.randrange(size[0] - 100), rng.randrange(size[1] - 60)
+        image.paste(tuple(rng.randrange(256) for _ in range(3)), (x, y, x + rng.randrange(20, 100), y + rng.randrange(20, 60)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="png")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def test_thumbnails_keep_the_frames_before_the_full_screenshots(tmp_path):
+    memory = MemoryManager(
+        agent_name="test_visual",
+        max_tokens=10 ** 9,
+        keep_last_screenshots=2,
+        keep_thumbnails=4,
+        save_dir=str(tmp_path),
+        model="gpt-4o"
+    )
+    frames = [make_frame(i) for i in range(5)]
+    for i in range(30):
+        memory.add("user", f"frame={i}", image_base64=frames[i % 5])
+        memory.add("assistant", "Action: wait()")
+
+    def frames_with(detail):
+        return [int(msg.content.split("frame=")[1]) for msg in memory.history if msg.has_image and msg.image_detail == detail]
+
+    assert frames_with("low") == [24, 25, 26, 27]
+    assert [int(msg.content.split("frame=")[1]) for msg in memory.history if msg.has_image] == [24, 25, 26, 27, 28, 29]
+    # 第一帧不因为没有可比较的上一帧而一直占用缩略图
+    assert "[截图已移除]" in next(msg.content for msg in memory.history if msg.content and msg.content.endswith("frame=0"))
+
+
+@pytest.mark.parametrize("vision", [True, False])
+def test_tool_result_images_follow_vision_support(tmp_path, vision):
+    memory = MemoryManager(agent_name="test_tool_images", save_dir=str(tmp_path), model="gpt-4o", vision=vision)
+    memory.add("user", "take a screenshot")
+    memory.add_function_result("call_1", "screen_screenshot", {"success": True, "image": {"type": "image/png", "content": make_frame(0)}})
+    memory.add("user", "continue")
+
+    tool_message = next(msg for msg in memory.history if msg.role == "tool")
+    assert make_frame(0) not in tool_message.content
+    assert ("附件" in tool_message.content) is vision
+    assert any(msg.has_image for msg in memory.history) is vision
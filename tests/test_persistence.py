@@ -0,0 +1,37 @@
+"""
+SQLite 记忆存储的迁移与读写测试
+"""
+
+import json
+
+from core.agents.agent_memory.persistence import SqliteStore
+
+NESTED = {"steps": ["open", {"app": "notepad", "args": [1, 2.5, None]}], "ok": True}
+
+
+def write_legacy(tmp_path):
+    legacy = tmp_path / "GUIAgent_insights.json"
+    legacy.write_text(json.dumps({"nested": NESTED, "list": [1, [2, 3]], "text": "[not json]"}), encoding="utf-8")
+    return str(legacy)
+
+
+def test_migrated_nested_values_round_trip(tmp_path):
+    legacy = write_legacy(tmp_path)
+    store = SqliteStore(str(tmp_path / "memory.db"), "insights", "GUIAgent", "TEXT", legacy_json=legacy)
+    data = store.load()
+    assert data["nested"] == NESTED
+    assert data["list"] == [1, [2, 3]]
+    # 看起来像 JSON 的普通字符串保持为字符串
+    assert data["text"] == "[not json]"
+
+    # 重新打开（不会再次迁移）后仍能还原
+    reopened = SqliteStore(str(tmp_path / "memory.db"), "insights", "GUIAgent", "TEXT", legacy_json=legacy)
+    assert reopened.load()["nested"] == NESTED
+
+
+def test_set_nested_value_round_trip(tmp_path):
+    store = SqliteStore(str(tmp_path / "memory.db"), "insights", "GUIAgent", "TEXT")
+    store.set("nested", NESTED)
+    store.flush()
+    assert store.load()["nested"] == NESTED
+
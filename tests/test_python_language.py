@@ -0,0 +1,91 @@
+"""
+PythonLanguage 中断看门狗测试（使用假的内核和预热池，不启动真实的 Jupyter 内核）
+"""
+
+import queue
+import threading
+import time
+
+from core.tools.code.languages.python import PythonLanguage
+
+
+class FakeKernelManager:
+    def __init__(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def interrupt_kernel(self):
+        # 模拟中断无效的内核（例如卡在C扩展里）
+        pass
+
+
+class FakeKernelClient:
+    """第一个内核执行后永远不返回 idle，之后的内核立即执行完成"""
+
+    def __init__(self, stuck: bool):
+        self.stuck = stuck
+        self.pending = queue.Queue()
+
+    def execute(self, code):
+        msg_id = f"msg-{id(self)}-{code}"
+        if not self.stuck:
+            self.pending.put({"parent_header": {"msg_id": msg_id}, "msg_type": "stream", "content": {"text": "done\n"}})
+            self.pending.put({"parent_header": {"msg_id": msg_id}, "msg_type": "status", "content": {"execution_state": "idle"}})
+        return msg_id
+
+    def get_iopub_msg(self, timeout=None):
+        return self.pending.get(timeout=timeout or 0.01)
+
+
+class FakePool:
+    def __init__(self):
+        self.acquired = []
+        self.released = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            # 启动内核需要一段时间，放大并发启动的竞争窗口
+            time.sleep(0.2)
+            pair = (FakeKernelManager(), FakeKernelClient(stuck=not self.acquired))
+            self.acquired.append(pair)
+            return pair
+
+    def release(self, km, kc):
+        km.alive = False
+        self.released.append((km, kc))
+
+
+def drain(message: queue.Queue, timeout: float = 20) -> list:
+    deadline = time.time() + timeout
+    output = []
+    while True:
+        msg = message.get(timeout=max(0.01, deadline - time.time()))
+        if msg["type"] == "end":
+            return output
+        output.append(msg)
+
+
+def test_watchdog_does_not_boot_a_second_kernel():
+    pool = FakePool()
+    language = PythonLanguage(pool=pool, interrupt_timeout=0.3)
+    stuck = language.run("while True: pass")
+    deadline = time.time() + 5
+    while language.current_msg_id is None and time.time() < deadline:
+        time.sleep(0.01)
+
+    language.interrupt()
+    # 中断后立即开始下一次执行，与看门狗的强制关闭并发
+    following = language.run("print('done')")
+
+    stuck_output = drain(stuck)
+    assert any(msg["type"] == "error" and "restarted on next run" in msg["content"] for msg in stuck_output)
+    assert "done\n" in [msg.get("content") for msg in drain(following)]
+
+    # 只有卡住的内核被关闭，下一次执行只启动了一个新内核
+    time.sleep(0.5)
+    assert len(pool.acquired) == 2
+    assert pool.released == [pool.acquired[0]]
+    assert (language.km, language.kc) == pool.acquired[1]
@@ -0,0 +1,51 @@
+"""
+常驻Shell会话的中断测试
+"""
+
+import queue
+import shutil
+import time
+
+import pytest
+
+from core.tools.code.languages.bash import BashLanguage
+
+pytestmark = pytest.mark.skipif(shutil.which("bash") is None, reason="需要bash")
+
+
+def drain(message: queue.Queue, timeout: float = 20) -> str:
+    """读取到end消息为止，返回拼接后的输出；超时说明执行线程卡住"""
+    deadline = time.time() + timeout
+    output = []
+    while True:
+        msg = message.get(timeout=max(0.01, deadline - time.time()))
+        if msg["type"] == "end":
+            return "".join(str(item.get("content", "")) for item in output)
+        output.append(msg)
+
+
+@pytest.fixture
+def bash():
+    language = BashLanguage(interrupt_timeout=1)
+    yield language
+    language.stop()
+
+
+@pytest.mark.parametrize("code", [
+    "while true; do :; done",
+    "while true; do sleep 0.2; done",
+    # 忽略SIGINT的命令只能在超时后结束整个Shell
+    "trap '' INT; while true; do :; done",
+])
+def test_interrupt_busy_loop_then_next_command_runs(bash, code):
+    message = bash.run(code)
+    time.sleep(0.5)
+    bash.interrupt()
+    output = drain(message)
+    assert "Return code: 0" not in output
+    assert "next\nReturn code: 0" in drain(bash.run("echo next"))
+
+
+def test_session_state_kept_after_normal_command(bash):
+    drain(bash.run("export ARGUS_TEST=1"))
+    assert "1\nReturn code: 0" in drain(bash.run("echo $ARGUS_TEST"))